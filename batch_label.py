@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+พิมพ์/สร้างป้ายกำกับจำนวนมากจากรายการหมายเลข Lot โดยไม่ต้องเปิดหน้าจอ
+อ่าน Lot จากไฟล์หรือ stdin ทีละบรรทัด แล้วส่งผ่าน pipeline แบบ generator:
+อ่าน Lot -> ค้นหา Part/Revision -> จัดรูปแบบป้าย -> เขียนไฟล์หรือส่งพิมพ์ครั้งเดียว
+
+ใช้งาน:
+    python batch_label.py lots.txt --output labels.txt --misses misses.txt
+    type lots.txt | python batch_label.py --print
+    python batch_label.py lots.txt --print --language zpl
+"""
+
+import argparse
+import io
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from bulk_io import open_manager
+from print_config import (PrinterConfig, format_label_native, get_native_format,
+                          get_print_command, get_template)
+from raw_printer import LpPrinter, open_printer, send_label
+
+# คั่นแต่ละป้ายด้วย form feed เพื่อให้เครื่องพิมพ์ขึ้นป้ายใหม่
+LABEL_SEPARATOR = "\f"
+
+
+def iter_lots(streams):
+    """อ่านหมายเลข Lot ทีละบรรทัดจากหลาย stream (ข้ามบรรทัดว่าง)"""
+    for stream in streams:
+        for line in stream:
+            lot = line.strip().upper()
+            if lot:
+                yield lot
+
+
+def resolve_lots(lots, manager, misses, chunk_size=4096):
+    """ค้นหา Part/Revision ของแต่ละ Lot ทีละชุด, Lot ที่ไม่พบจะถูกเพิ่มใน misses"""
+    lots = iter(lots)
+    while True:
+        chunk = list(itertools.islice(lots, chunk_size))
+        if not chunk:
+            return
+        for lot, (part, rev) in zip(chunk, manager.get_part_rev_many(chunk)):
+            if part is None or rev is None:
+                misses.append(lot)
+                continue
+            yield lot, part, rev
+
+
+def render_labels(records, time, template="macarton_label", language="text"):
+    if language != "text":
+        # ภาษาเครื่องพิมพ์: แต่ละป้ายมีเฉพาะค่าของฟิลด์ ฟอร์มเขียนครั้งเดียวใน write_labels
+        for lot, part, rev in records:
+            yield format_label_native(lot, part, rev, time, language)
+        return
+    render = get_template(template).render
+    for lot, part, rev in records:
+        yield render(lot, part, rev, time)
+
+
+def write_labels(labels, stream, language="text"):
+    """เขียนป้ายทั้งหมดลง stream คืนค่าจำนวนป้าย"""
+    count = 0
+    if language != "text":
+        for label in labels:
+            if not count:
+                stream.write(get_native_format(language))
+            stream.write(label)
+            count += 1
+        return count
+    for label in labels:
+        if count:
+            stream.write(LABEL_SEPARATOR)
+        stream.write(label)
+        count += 1
+    if count:
+        stream.write("\n")
+    return count
+
+
+def print_labels(labels, language="text"):
+    """รวมป้ายทั้งหมดเป็นงานพิมพ์เดียวแล้วส่งไปยังเครื่องพิมพ์ คืนค่าจำนวนป้าย"""
+    if PrinterConfig.DEVICE_URI or os.name != "nt":
+        # ส่งตรงไปยัง socket/device หรือ lp ทาง stdin ไม่ต้องสร้างไฟล์
+        if PrinterConfig.DEVICE_URI:
+            printer = open_printer(PrinterConfig.DEVICE_URI, raw=language != "text")
+        else:
+            printer = LpPrinter(PrinterConfig.PRINTER_NAME, raw=language != "text")
+        buffer = io.StringIO()
+        count = write_labels(labels, buffer, language)
+        if count:
+            send_label(printer, buffer.getvalue())
+        return count
+
+    # Windows ที่ไม่มี device ตั้งไว้ ใช้คำสั่ง print กับไฟล์ชั่วคราวไฟล์เดียว
+    fd, filename = tempfile.mkstemp(prefix="macarton_batch_", suffix=".txt")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            count = write_labels(labels, f, language)
+        if count:
+            # คำสั่งของ Windows (print /D:"...") ต้องรันผ่าน shell
+            subprocess.run(get_print_command(filename, "normal", "Label"), shell=True, check=True)
+        return count
+    finally:
+        os.remove(filename)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch labeling from a list of lot numbers")
+    parser.add_argument("inputs", nargs="*", help="files with one lot number per line (default: stdin)")
+    parser.add_argument("--output", help="write labels to this file ('-' for stdout)")
+    parser.add_argument("--print", dest="send_to_printer", action="store_true",
+                        help="send all labels to the MACarton printer as one job")
+    parser.add_argument("--misses", help="write lot numbers with no part data to this file")
+    parser.add_argument("--time", help='label time "YYYY-MM-DD HH:MM:SS" (default: now)')
+    parser.add_argument("--data-file", help="part_data.json or part_data.db")
+    parser.add_argument("--language", choices=["text", "zpl", "epl", "tspl"],
+                        default=PrinterConfig.LANGUAGE, help="printer language (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.send_to_printer:
+        args.output = "-"
+
+    time = args.time or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    manager = open_manager(args.data_file)
+    streams = [open(path, "r", encoding="utf-8") for path in args.inputs] or [sys.stdin]
+    misses = []
+    try:
+        labels = render_labels(resolve_lots(iter_lots(streams), manager, misses), time,
+                               language=args.language)
+        if args.send_to_printer:
+            count = print_labels(labels, args.language)
+        elif args.output == "-":
+            count = write_labels(labels, sys.stdout, args.language)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                count = write_labels(labels, f, args.language)
+    finally:
+        for stream in streams:
+            if stream is not sys.stdin:
+                stream.close()
+        # บันทึกสถิติ Lot ที่ไม่มีข้อมูลและรวม log ก่อนจบ
+        # (DataManager ที่ใช้ร่วมกันจะถูกปิดโดย atexit ใน get_shared_data_manager แล้ว)
+        if args.data_file:
+            manager.close()
+
+    if args.misses:
+        with open(args.misses, "w", encoding="utf-8") as f:
+            f.writelines(lot + "\n" for lot in misses)
+    print(f"Labels: {count}, No data: {len(misses)}", file=sys.stderr)
+    return 0 if not misses else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+ชุดวัดประสิทธิภาพของงานหลัก: โหลดข้อมูล, ค้นหา Part/Revision, บันทึก, จัดรูปแบบป้าย
+และการสร้างรายการในตาราง Data Manager ใช้ข้อมูลสังเคราะห์ที่สร้างซ้ำได้ (seed เดิม = ข้อมูลเดิม)
+ผลลัพธ์บันทึกเป็น JSON เพื่อเทียบกับรอบก่อนหน้าว่าช้าลงหรือไม่
+
+ขั้นตอนที่วัด (ต่อขนาดตาราง):
+    load_data      อ่าน part_data.json (+ log) เข้าหน่วยความจำ
+    get_part_rev   ค้นหาจาก Lot สังเคราะห์ (มีทั้ง Lot ที่พบและไม่พบ)
+    get_part_rev_many  ค้นหาทีละ 1,000 Lot (เวลาต่อ Lot)
+    format_label   format_label_text() ของแต่ละ Lot
+    add_data       เพิ่มข้อมูลทีละรายการ (ต่อท้าย log)
+    save_data      เขียน snapshot ทั้งตาราง
+    refresh_table  reload_if_changed() + search() แบบที่ DataManagerGUI.refresh_table() ใช้
+
+ใช้งาน:
+    python benchmark_suite.py                                   ขนาด 1k, 10k, 100k
+    python benchmark_suite.py --sizes 1000 1000000 --output bench.json
+    python benchmark_suite.py --compare bench.json              เทียบกับผลเดิม (exit 1 ถ้าช้าลง)
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from data_manager import DataManager
+from print_config import format_label_text
+
+ALPHABET = string.ascii_uppercase + string.digits
+DEFAULT_SIZES = (1000, 10000, 100000)
+# ขั้นตอนที่ช้ากว่าเดิมเกินสัดส่วนนี้ (p50) ถือว่าช้าลง
+DEFAULT_THRESHOLD = 0.20
+
+
+def generate_part_data(size, seed=1):
+    """
+    ตารางสังเคราะห์ size รายการ
+    key แบบ "XX_Y" (ค้นหาจาก Lot ได้) มีได้ 36^3 = 46,656 key
+    ถ้า size มากกว่านั้นจะเพิ่ม key แบบ "XXXX_Y" ที่ใช้วัดขนาดตาราง/หน่วยความจำเท่านั้น
+    """
+    rng = random.Random(seed)
+    keys = [f"{a}{b}_{c}" for a in ALPHABET for b in ALPHABET for c in ALPHABET]
+    rng.shuffle(keys)
+    keys = keys[:size]
+    n = 0
+    while len(keys) < size:
+        keys.append(f"{n:04X}_{ALPHABET[n % 36]}")
+        n += 1
+    data = {}
+    for key in keys:
+        part = "D" + "".join(rng.choice(string.digits) for _ in range(4)) + rng.choice("ABC")
+        data[key] = {
+            "part": part,
+            "revision": f"REV.{rng.choice('ABCDEF')}",
+            "description": f"Digits 2-3: {key[:-2]}, Digit 6: {key[-1]}"
+        }
+    return data
+
+
+def write_part_data(path, size, seed=1):
+    """เขียนตารางสังเคราะห์เป็น part_data.json คืนค่า dict ที่เขียน"""
+    data = generate_part_data(size, seed)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return data
+
+
+def generate_lots(keys, count, miss_ratio=0.1, seed=2):
+    """
+    Lot สังเคราะห์ count รายการ สัดส่วน miss_ratio เป็น Lot ที่ไม่มีในตาราง
+    (ใช้ key ที่ไม่มีในตาราง หรือ Lot สั้นเกินไปถ้าตารางมีครบทุก key)
+    """
+    rng = random.Random(seed)
+    existing = set(keys)
+    hits = [key for key in keys if len(key) == 4]
+    missing = [f"{a}{b}_{c}" for a, b, c in
+               ((rng.choice(ALPHABET), rng.choice(ALPHABET), rng.choice(ALPHABET)) for _ in range(200))]
+    missing = [key for key in missing if key not in existing][:50]
+    lots = []
+    for n in range(count):
+        if not hits or rng.random() < miss_ratio:
+            if not missing:
+                lots.append(f"Q{n % 10}")
+                continue
+            key = rng.choice(missing)
+        else:
+            key = rng.choice(hits)
+        lots.append(f"{rng.choice(ALPHABET)}{key[:2]}{rng.choice(ALPHABET)}{rng.choice(ALPHABET)}"
+                    f"{key[3]}{n % 10000:04d}")
+    return lots
+
+
+def summarize(samples_ns, stage, size):
+    """สรุปเวลาต่อครั้ง (นาโนวินาที) เป็น p50/p99/mean (ไมโครวินาที) และจำนวนครั้งต่อวินาที"""
+    samples = sorted(samples_ns)
+    total = sum(samples)
+    return {
+        "stage": stage,
+        "size": size,
+        "count": len(samples),
+        "p50_us": samples[len(samples) // 2] / 1000,
+        "p99_us": samples[min(len(samples) - 1, len(samples) * 99 // 100)] / 1000,
+        "mean_us": total / len(samples) / 1000,
+        "ops_per_second": len(samples) / (total / 1e9) if total else None
+    }
+
+
+def timed(func, args_list):
+    """เรียก func(*args) ทีละชุด คืนค่าเวลาของแต่ละครั้ง (นาโนวินาที)"""
+    clock = time.perf_counter_ns
+    samples = []
+    for args in args_list:
+        start = clock()
+        func(*args)
+        samples.append(clock() - start)
+    return samples
+
+
+def peak_memory_mb(func):
+    """หน่วยความจำสูงสุดที่ Python จองระหว่างเรียก func() (MB)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def run_size(size, lot_count=100000, runs=5, seed=1):
+    """วัดทุกขั้นตอนกับตารางขนาด size คืนค่ารายการผลลัพธ์"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="macarton_bench_") as directory:
+        data_file = os.path.join(directory, "part_data.json")
+        data = write_part_data(data_file, size, seed)
+        lots = generate_lots(list(data), lot_count, seed=seed + 1)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        manager = DataManager(data_file)
+        result = summarize(timed(manager.load_data, [()] * runs), "load_data", size)
+        result["peak_mb"] = peak_memory_mb(manager.load_data)
+        results.append(result)
+
+        results.append(summarize(timed(manager.get_part_rev, [(lot,) for lot in lots]),
+                                 "get_part_rev", size))
+
+        # ค้นหาทีละ 1,000 Lot รายงานเป็นเวลาเฉลี่ยต่อ Lot
+        chunks = [(lots[n:n + 1000],) for n in range(0, len(lots), 1000)]
+        samples = timed(manager.get_part_rev_many, chunks)
+        result = summarize([sample // len(chunk) for sample, (chunk,) in zip(samples, chunks)],
+                           "get_part_rev_many", size)
+        result["count"] = len(lots)
+        results.append(result)
+
+        records = [(lot, "D3022A", "REV.B", now) for lot in lots]
+        results.append(summarize(timed(format_label_text, records), "format_label", size))
+
+        additions = [(f"N{n % 10}", ALPHABET[n % 36], "P", "R") for n in range(min(runs * 20, 360))]
+        results.append(summarize(timed(manager.add_data, additions), "add_data", size))
+
+        results.append(summarize(timed(manager.save_data, [()] * runs), "save_data", size))
+
+        def refresh():
+            manager.reload_if_changed()
+            manager.search("")
+            manager.search("D30")
+
+        manager._index = None
+        samples = timed(refresh, [()] * runs)
+        result = summarize(samples, "refresh_table", size)
+        # ครั้งแรกต้องสร้างดัชนี ครั้งต่อๆ ไปใช้ดัชนีเดิม
+        result["first_us"] = samples[0] / 1000
+        results.append(result)
+        manager.close()
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    เทียบ p50 กับผลเดิม คืนค่ารายการ (stage, size, เดิม, ใหม่, สัดส่วนที่เปลี่ยน)
+    ของขั้นตอนที่ช้าลงเกิน threshold
+    """
+    previous = {(row["stage"], row["size"]): row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = previous.get((row["stage"], row["size"]))
+        if not old or not old["p50_us"]:
+            continue
+        change = row["p50_us"] / old["p50_us"] - 1
+        if change > threshold:
+            regressions.append((row["stage"], row["size"], old["p50_us"], row["p50_us"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lookup, format and data-management hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="table sizes to generate (default: 1000 10000 100000)")
+    parser.add_argument("--lots", type=int, default=100000, help="synthetic lots per size")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions of load/save/refresh")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="JSON", help="previous results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed p50 slowdown before failing (default: 0.20)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for row in run_size(size, args.lots, args.runs, args.seed):
+            results.append(row)
+            memory = f"  peak {row['peak_mb']:.1f} MB" if "peak_mb" in row else ""
+            print(f"{row['size']:>8} {row['stage']:17} p50 {row['p50_us']:11.1f} us  "
+                  f"p99 {row['p99_us']:11.1f} us  {row['ops_per_second'] or 0:12.0f} ops/s{memory}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "lots": args.lots,
+        "runs": args.runs,
+        "seed": args.seed,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for stage, size, old, new, change in regressions:
+            print(f"Regression: {stage} at {size} keys {old:.1f} us -> {new:.1f} us (+{change:.0%})")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
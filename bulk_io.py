@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+นำเข้า/ส่งออกข้อมูล Part และ Revision จำนวนมาก (CSV, JSON, JSON Lines)
+ตรวจสอบทุกแถวด้วยกฎเดียวกับหน้า Data Manager และบันทึกทั้งหมดในครั้งเดียว
+
+ใช้งานแบบ command line:
+    python bulk_io.py import matrix.csv [--overwrite] [--dry-run] [--data-file part_data.json]
+    python bulk_io.py export backup.csv [--data-file part_data.db]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from data_manager import DataManager, get_shared_data_manager, validate_entry
+
+CSV_FIELDS = ("key", "digits_2_3", "digit_6", "part", "revision", "description")
+
+
+class ImportReport:
+    """สรุปผลการนำเข้า"""
+
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.duplicates = []   # (line, key) key ซ้ำในไฟล์ด้วยค่าเดิม
+        self.conflicts = []    # (line, key, message) key ซ้ำแต่ค่าต่างกัน
+        self.errors = []       # (line, message) แถวที่ไม่ผ่านการตรวจสอบ
+
+    @property
+    def ok(self):
+        return not self.errors and not self.conflicts
+
+    def summary(self, max_details=20):
+        lines = [
+            f"Added: {self.added}",
+            f"Updated: {self.updated}",
+            f"Unchanged: {self.unchanged}",
+            f"Duplicates: {len(self.duplicates)}",
+            f"Conflicts: {len(self.conflicts)}",
+            f"Errors: {len(self.errors)}"
+        ]
+        details = [f"  line {line}: {key} {message}" for line, key, message in self.conflicts]
+        details += [f"  line {line}: {message}" for line, message in self.errors]
+        lines.extend(details[:max_details])
+        if len(details) > max_details:
+            lines.append(f"  ... and {len(details) - max_details} more")
+        return "\n".join(lines)
+
+
+class RowError:
+    """แถวที่อ่านไม่ได้ (เช่น JSON ผิดรูปแบบ) รายงานเป็นข้อผิดพลาดของบรรทัดนั้น"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def _text(row, name):
+    """ค่าของฟิลด์เป็นข้อความ (ตัวเลขใน JSON แปลงเป็นข้อความ) raise ValueError ถ้าเป็นชนิดอื่น"""
+    value = row.get(name)
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"{name} must be a string, got {type(value).__name__}")
+
+
+def _row_from_mapping(row, key=None):
+    """แปลงแถวจากไฟล์เป็น (digits_2_3, digit_6, part, revision, description) หรือ RowError"""
+    if not isinstance(row, dict):
+        return RowError(f"Expected an object, got {type(row).__name__}")
+    try:
+        key = (key or _text(row, "key")).strip().upper()
+        digits_2_3 = _text(row, "digits_2_3").upper()
+        digit_6 = _text(row, "digit_6").upper()
+        fields = (_text(row, "part"), _text(row, "revision"), _text(row, "description"))
+    except ValueError as e:
+        return RowError(str(e))
+    if key and not (digits_2_3 or digit_6):
+        digits_2_3, _, digit_6 = key.partition("_")
+    return (digits_2_3, digit_6) + fields
+
+
+def iter_csv_rows(path):
+    """อ่าน CSV ทีละแถว (ต้องมีคอลัมน์ key หรือ digits_2_3/digit_6 และ part, revision)"""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, _row_from_mapping(row)
+
+
+def iter_jsonl_rows(path):
+    """อ่าน JSON Lines ทีละบรรทัด"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_num, RowError(f"Invalid JSON: {e}")
+                continue
+            yield line_num, _row_from_mapping(row)
+
+
+def iter_json_rows(path):
+    """อ่าน JSON ทั้งแบบ part_data.json ({key: {...}}) และแบบ list ของแถว"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    if isinstance(content, dict):
+        for index, (key, value) in enumerate(content.items(), 1):
+            yield index, _row_from_mapping(value, key)
+    elif isinstance(content, list):
+        for index, value in enumerate(content, 1):
+            yield index, _row_from_mapping(value)
+    else:
+        yield 1, RowError(f"Expected an object or a list of rows, got {type(content).__name__}")
+
+
+def iter_file_rows(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return iter_csv_rows(path)
+    if extension == ".jsonl":
+        return iter_jsonl_rows(path)
+    if extension == ".json":
+        return iter_json_rows(path)
+    raise ValueError(f"Unsupported file type: {extension}")
+
+
+def import_rows(manager, rows, overwrite=False, dry_run=False):
+    """
+    นำเข้าแถว (line, (digits_2_3, digit_6, part, revision, description)) เข้า manager
+
+    Args:
+        manager: DataManager หรือ SqliteDataManager
+        rows: iterable ของแถว
+        overwrite (bool): เขียนทับ key ที่มีอยู่แล้วแต่ค่าต่างกัน
+        dry_run (bool): ตรวจสอบอย่างเดียว ไม่บันทึก
+
+    Returns:
+        ImportReport: สรุปผลการนำเข้า
+    """
+    report = ImportReport()
+    seen = {}
+    changes = []
+
+    for line, row in rows:
+        if isinstance(row, RowError):
+            report.errors.append((line, row.message))
+            continue
+        digits_2_3, digit_6, part, revision, description = row
+        error = validate_entry(digits_2_3, digit_6, part, revision)
+        if error:
+            report.errors.append((line, error))
+            continue
+
+        key = f"{digits_2_3}_{digit_6}"
+        if key in seen:
+            if seen[key] == (part, revision):
+                report.duplicates.append((line, key))
+            else:
+                report.conflicts.append(
+                    (line, key, f"already in file as {seen[key][0]} {seen[key][1]}"))
+            continue
+        seen[key] = (part, revision)
+
+        existing = manager.data.get(key)
+        if existing is None:
+            report.added += 1
+        elif (existing["part"], existing["revision"]) == (part, revision):
+            report.unchanged += 1
+            continue
+        elif overwrite:
+            report.updated += 1
+        else:
+            report.conflicts.append(
+                (line, key, f"exists as {existing['part']} {existing['revision']}"))
+            continue
+        changes.append((digits_2_3, digit_6, part, revision, description))
+
+    if not dry_run and changes:
+        # บันทึกทุกแถวในครั้งเดียว
+        with manager.batch():
+            for digits_2_3, digit_6, part, revision, description in changes:
+                manager.add_data(digits_2_3, digit_6, part, revision, description)
+    return report
+
+
+def import_file(manager, path, overwrite=False, dry_run=False):
+    return import_rows(manager, iter_file_rows(path), overwrite, dry_run)
+
+
+def export_file(manager, path):
+    """ส่งออกข้อมูลทั้งหมดเป็น CSV, JSON หรือ JSON Lines คืนค่าจำนวนแถว"""
+    extension = os.path.splitext(path)[1].lower()
+    count = 0
+    if extension == ".csv":
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            for key, value in manager.data.items():
+                digits_2_3, _, digit_6 = key.partition("_")
+                writer.writerow((key, digits_2_3, digit_6, value["part"],
+                                 value["revision"], value.get("description", "")))
+                count += 1
+    elif extension == ".jsonl":
+        with open(path, 'w', encoding='utf-8') as f:
+            for key, value in manager.data.items():
+                f.write(json.dumps(dict(value, key=key), ensure_ascii=False) + "\n")
+                count += 1
+    elif extension == ".json":
+        table = dict(manager.data.items())
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(table, f, indent=2, ensure_ascii=False)
+        count = len(table)
+    else:
+        raise ValueError(f"Unsupported file type: {extension}")
+    return count
+
+
+def open_manager(data_file=None):
+    """เปิด DataManager ตามชนิดไฟล์ (.db = SQLite)"""
+    if data_file is None:
+        return get_shared_data_manager()
+    if data_file.lower().endswith(".db"):
+        from sqlite_data_manager import SqliteDataManager
+        return SqliteDataManager(data_file)
+    return DataManager(data_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of part mappings")
+    parser.add_argument("--data-file", help="part_data.json or part_data.db (default: next to the program)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import rows from CSV/JSON/JSONL")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--overwrite", action="store_true",
+                               help="replace existing keys that have a different part/revision")
+    import_parser.add_argument("--dry-run", action="store_true",
+                               help="validate only, do not save")
+
+    export_parser = commands.add_parser("export", help="export all rows to CSV/JSON/JSONL")
+    export_parser.add_argument("path")
+
+    args = parser.parse_args(argv)
+    manager = open_manager(args.data_file)
+    try:
+        if args.command == "import":
+            report = import_file(manager, args.path, args.overwrite, args.dry_run)
+            print(report.summary())
+            return 0 if report.ok else 1
+        count = export_file(manager, args.path)
+        print(f"Exported {count} rows to {args.path}")
+        return 0
+    finally:
+        # DataManager ที่ใช้ร่วมกันจะถูกปิดโดย atexit ใน get_shared_data_manager แล้ว
+        if args.data_file:
+            manager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,39 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import atexit
+import bisect
 import os
 import sys
+from contextlib import contextmanager
+import metrics
+from lot_misses import MissTracker, NegativeCache, misses_file_for
+from lot_rules import get_rule_engine
+from part_index import PartIndex
+from part_storage import AppendLogStorage
+from slot_table import SlotTable
+
+def lot_key(lot_number):
+    """
+    สร้าง key จากหมายเลข Lot ตามกฎใน lot_rules.json
+    (ค่าเริ่มต้น "{digits_2_3}_{digit_6}") หรือ None ถ้าไม่มีกฎใดตรง
+    """
+    return get_rule_engine().resolve(lot_number)
+
+
+def validate_entry(digits_2_3, digit_6, part, revision):
+    """
+    ตรวจสอบข้อมูลก่อนเพิ่ม คืนค่าข้อความผิดพลาด หรือ None ถ้าถูกต้อง
+    key "{digits_2_3}_{digit_6}" ต้องเป็นรูปแบบที่กฎใน lot_rules.json สร้างได้
+    (กฎเดิม: 2 ตัวอักษร + 1 ตัวอักษร, กฎอื่น เช่น "T_12" หรือ "AB_E")
+    """
+    if not all([digits_2_3, digit_6, part, revision]):
+        return "Please fill all fields"
+    engine = get_rule_engine()
+    key = f"{digits_2_3}_{digit_6}"
+    if not engine.accepts_key(key):
+        return f"Key {key} does not match any lot rule (expected {' or '.join(engine.key_shapes)})"
+    return None
+
 
 class DataManager:
     """คลาสสำหรับจัดการข้อมูล Part และ Revision"""
@@ -18,27 +49,113 @@ class DataManager:
 
     def __init__(self, data_file=None):
         self.data_file = data_file or self.get_data_file_path()
+        # ตัวนับสำหรับดูประสิทธิภาพของ cache
+        self.cache_hits = 0
+        self.cache_reloads = 0
+        self._file_signature = None
+        # รายการแก้ไขที่รอเขียนลง log เมื่ออยู่ใน batch()
+        self._pending = None
+        self.storage = AppendLogStorage(self.data_file)
+        # ดัชนีค้นหา สร้างเมื่อเรียก search() ครั้งแรก
+        self._index = None
+        # ตารางค้นหาแบบ direct-indexed สร้างเมื่อค้นหาครั้งแรก (ใหม่เมื่อโหลดข้อมูลหรือกฎเปลี่ยน)
+        self._slots = None
+        self._slots_engine = None
+        # key ที่ค้นหาไม่พบ และสถิติของ Lot ที่ไม่มีข้อมูล
+        self.negative_cache = NegativeCache()
+        self.misses = MissTracker(misses_file_for(self.data_file))
         self.data = self.load_data()
 
+    def _stat_signature(self):
+        """คืนค่า (mtime, size) ของไฟล์ข้อมูลและไฟล์ log"""
+        signature = []
+        for path in (self.data_file, self.storage.log_file):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
     def load_data(self):
+        # อ่าน signature ก่อนอ่านไฟล์ ถ้าไฟล์เปลี่ยนระหว่างอ่านจะถูกโหลดใหม่รอบถัดไป
+        self._file_signature = self._stat_signature()
+        self.cache_reloads += 1
+        self._index = None
+        self._slots_engine = None
+        self.negative_cache.clear()
         try:
-            with open(self.data_file, 'r') as f:
-                return json.load(f)
+            with metrics.timer("data_load_seconds"):
+                return self.storage.load()
         except Exception:
             return {}
 
     def save_data(self):
-        with open(self.data_file, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        """เขียน snapshot ทั้งตารางแบบ atomic และล้าง log"""
+        self.storage.write_snapshot(self.data)
+        self._file_signature = self._stat_signature()
+
+    def _commit(self, records):
+        """บันทึกการแก้ไขลง log (หรือเก็บไว้ก่อนถ้าอยู่ใน batch)"""
+        if self._pending is not None:
+            self._pending.extend(records)
+            return
+        self.storage.append(records)
+        if self.storage.needs_compaction(len(self.data)):
+            self.storage.write_snapshot(self.data)
+        self._file_signature = self._stat_signature()
+
+    @contextmanager
+    def batch(self):
+        """รวมการแก้ไขหลายรายการให้เขียนลง log ครั้งเดียวตอนจบ"""
+        if self._pending is not None:
+            yield self
+            return
+        self._pending = []
+        try:
+            yield self
+        finally:
+            records, self._pending = self._pending, None
+            self._commit(records)
+
+    def close(self):
+        """รวม log เข้า snapshot ก่อนปิดโปรแกรม"""
+        if self.storage.log_entries:
+            self.save_data()
+        self.misses.close()
+
+    def reload_if_changed(self):
+        """โหลดไฟล์ใหม่เฉพาะเมื่อ mtime/size ของไฟล์เปลี่ยน"""
+        if self._stat_signature() != self._file_signature:
+            self.data = self.load_data()
+            return True
+        self.cache_hits += 1
+        return False
+
+    def get_cache_stats(self):
+        """สถิติการใช้ cache (hits = ใช้ข้อมูลในหน่วยความจำ, reloads = อ่านไฟล์ใหม่)"""
+        return {
+            "hits": self.cache_hits,
+            "reloads": self.cache_reloads,
+            "keys": len(self.data),
+            "negative_hits": self.negative_cache.hits,
+            "negative_keys": len(self.negative_cache)
+        }
 
     def add_data(self, digits_2_3, digit_6, part, revision, description=""):
         key = f"{digits_2_3}_{digit_6}"
+        self.negative_cache.discard(key)
+        self.misses.forget(key)
         self.data[key] = {
             "part": part,
             "revision": revision,
             "description": description or f"Digits 2-3: {digits_2_3}, Digit 6: {digit_6}"
         }
-        self.save_data()
+        if self._index is not None:
+            self._index.add(key, self.data[key])
+        if self._slots is not None:
+            self._slots.set(key, part, revision)
+        self._commit([{"op": "set", "key": key, "value": self.data[key]}])
         return True
 
     def update_data(self, key, part, revision, description=""):
@@ -47,39 +164,130 @@ class DataManager:
             self.data[key]["revision"] = revision
             if description:
                 self.data[key]["description"] = description
-            self.save_data()
+            if self._index is not None:
+                self._index.add(key, self.data[key])
+            if self._slots is not None:
+                self._slots.set(key, part, revision)
+            self._commit([{"op": "set", "key": key, "value": self.data[key]}])
             return True
         return False
 
     def delete_data(self, key):
         if key in self.data:
             del self.data[key]
-            self.save_data()
+            if self._index is not None:
+                self._index.remove(key)
+            if self._slots is not None:
+                self._slots.delete(key)
+            self._commit([{"op": "del", "key": key}])
             return True
         return False
 
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = PartIndex(self.data)
+        return self._index
+
+    def search(self, query):
+        """ค้นหา key ด้วย prefix ของ key หรือคำใน part/revision/description"""
+        return self.index.search(query)
+
+    def matches_search(self, key, query):
+        return self.index.matches(key, query)
+
+    def import_file(self, path, overwrite=False, dry_run=False):
+        """นำเข้าข้อมูลจำนวนมากจาก CSV/JSON/JSONL ในการบันทึกครั้งเดียว (ดู bulk_io.py)"""
+        from bulk_io import import_file
+        return import_file(self, path, overwrite, dry_run)
+
+    def export_file(self, path):
+        """ส่งออกข้อมูลทั้งหมดเป็น CSV/JSON/JSONL"""
+        from bulk_io import export_file
+        return export_file(self, path)
+
+    def slot_table(self):
+        """SlotTable ของข้อมูลปัจจุบัน หรือ None ถ้ากฎใน lot_rules.json ไม่ใช่แบบ "XX_Y" """
+        engine = get_rule_engine()
+        if self._slots_engine is not engine:
+            layout = engine.slot_layout
+            self._slots = SlotTable.from_data(self.data, *layout) if layout else None
+            self._slots_engine = engine
+        return self._slots
+
     def get_part_rev(self, lot_number):
         try:
-            if len(lot_number) < 6:
-                return None, None
-            digit_2_3 = lot_number[1:3]
-            digit_6 = lot_number[5]
-            key = f"{digit_2_3}_{digit_6}"
-            if key in self.data:
-                return self.data[key]["part"], self.data[key]["revision"]
+            slots = self.slot_table()
+            if slots is not None:
+                value = slots.get(lot_number)
+                if value is not None:
+                    return value
+            # ไม่พบในตาราง (หรือใช้ตารางไม่ได้): ค้นหาด้วย key แบบเดิม และบันทึก Lot ที่ไม่พบ
+            key = lot_key(lot_number)
+            if key is not None and key not in self.negative_cache:
+                value = self.data.get(key)
+                if value is not None:
+                    return value["part"], value["revision"]
+                self.negative_cache.add(key)
+            self.misses.record(key, lot_number)
             return None, None
-        except Exception:
+        except (TypeError, AttributeError):
+            # Lot ที่ไม่ใช่ข้อความถือว่าไม่พบ ส่วนข้อผิดพลาดของกฎ (ValueError) ต้องแจ้งออกไป
             return None, None
 
+    def get_part_rev_many(self, lots):
+        """ค้นหาหลาย Lot ในครั้งเดียว คืนค่ารายการ (part, rev) หรือ (None, None) ตามลำดับ"""
+        lots = list(lots)
+        slots = self.slot_table()
+        if slots is None:
+            return [self.get_part_rev(lot) for lot in lots]
+        results = slots.get_many(lots)
+        for index, value in enumerate(results):
+            if value is None:
+                results[index] = self.get_part_rev(lots[index])
+        return results
+
+
+# DataManager ที่ใช้ร่วมกันตลอดอายุโปรแกรม
+_shared_data_manager = None
+
+def get_shared_data_manager():
+    """คืนค่า DataManager ตัวเดียวที่ใช้ร่วมกัน และโหลดไฟล์ใหม่เมื่อไฟล์ถูกแก้ไขเท่านั้น"""
+    global _shared_data_manager
+    if _shared_data_manager is None:
+        from lookup_client import RemoteDataManager, get_lookup_server_url
+        from sqlite_data_manager import SqliteDataManager
+        server_url = get_lookup_server_url()
+        if server_url:
+            # สถานีที่ใช้เซิร์ฟเวอร์ข้อมูลกลาง (lookup_server.py)
+            _shared_data_manager = RemoteDataManager(server_url)
+        # ถ้ามี part_data.db (ย้ายข้อมูลด้วย sqlite_data_manager.py แล้ว) ให้ใช้ SQLite
+        elif os.path.exists(SqliteDataManager.get_data_file_path()):
+            _shared_data_manager = SqliteDataManager()
+        else:
+            _shared_data_manager = DataManager()
+        atexit.register(_shared_data_manager.close)
+    else:
+        _shared_data_manager.reload_if_changed()
+    return _shared_data_manager
+
 
 class DataManagerGUI:
     """หน้าจัดการข้อมูล GUI"""
     
-    def __init__(self, parent=None):
-        self.data_manager = DataManager()
+    def __init__(self, parent=None, data_manager=None):
+        # ใช้ DataManager ตัวเดียวกับหน้าสแกน เพื่อให้การบันทึกเห็นผลทันที
+        self.data_manager = data_manager or get_shared_data_manager()
         self.window = tk.Toplevel(parent) if parent else tk.Tk()
         self.window.title("Data Manager - Part and Revision Management")
         self.window.geometry("800x600")
+        # key ที่แสดงในตาราง (เรียงลำดับ) และตำแหน่งแถวแรกที่มองเห็น
+        self.view_keys = []
+        self.top_index = 0
+        self.visible_rows = 15
+        self.row_keys = []
+        self.selected_key = None
+        self.search_query = ""
         self.setup_gui()
         self.refresh_table()
     
@@ -134,6 +342,18 @@ class DataManagerGUI:
                            command=self.add_data, bg="#4CAF50", fg="white")
         btn_add.grid(row=2, column=0, columnspan=4, pady=10)
         
+        # ช่องค้นหา (key prefix, part, revision, description)
+        search_frame = tk.Frame(self.window)
+        search_frame.pack(padx=20, fill="x")
+        
+        tk.Label(search_frame, text="Search:", font=("Arial", 10)).pack(side="left")
+        self.search_entry = tk.Entry(search_frame, font=("Arial", 10))
+        self.search_entry.pack(side="left", padx=5, fill="x", expand=True)
+        self.search_entry.bind('<KeyRelease>', self.on_search)
+        
+        self.count_label = tk.Label(search_frame, text="", font=("Arial", 9), fg="gray")
+        self.count_label.pack(side="left", padx=5)
+        
         # ตารางแสดงข้อมูล
         table_frame = tk.Frame(self.window)
         table_frame.pack(pady=10, padx=20, fill="both", expand=True)
@@ -158,12 +378,22 @@ class DataManagerGUI:
         self.tree.column("Revision", width=80)
         self.tree.column("Description", width=250)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar เลื่อนผ่านรายการ key ในหน่วยความจำ (virtual scrolling)
+        # Treeview มีแถวเท่าที่มองเห็นเท่านั้น และเปลี่ยนค่าในแถวเมื่อเลื่อน
+        self.scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.on_scroll)
         
         self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.tree.bind("<Configure>", self.on_tree_resize)
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll_rows(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.scroll_rows(self.visible_rows))
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
         
         # ปุ่มจัดการ
         button_frame = tk.Frame(self.window)
@@ -181,6 +411,14 @@ class DataManagerGUI:
                               command=self.refresh_table, bg="#FF9800", fg="white")
         btn_refresh.pack(side="left", padx=5)
         
+        btn_import = tk.Button(button_frame, text="Import...", 
+                             command=self.import_data, bg="#607D8B", fg="white")
+        btn_import.pack(side="left", padx=5)
+        
+        btn_export = tk.Button(button_frame, text="Export...", 
+                             command=self.export_data, bg="#607D8B", fg="white")
+        btn_export.pack(side="left", padx=5)
+        
         # ตัวอย่างการใช้งาน
         example_frame = tk.LabelFrame(self.window, text="Example", 
                                     font=("Arial", 10))
@@ -202,16 +440,9 @@ class DataManagerGUI:
         part = self.part_entry.get().strip()
         revision = self.revision_entry.get().strip()
         
-        if not all([digits_23, digit_6, part, revision]):
-            messagebox.showwarning("Warning", "Please fill all fields")
-            return
-        
-        if len(digits_23) != 2:
-            messagebox.showwarning("Warning", "Digits 2-3 must be 2 characters")
-            return
-        
-        if len(digit_6) != 1:
-            messagebox.showwarning("Warning", "Digit 6 must be 1 character")
+        error = validate_entry(digits_23, digit_6, part, revision)
+        if error:
+            messagebox.showwarning("Warning", error)
             return
         
         key = f"{digits_23}_{digit_6}"
@@ -220,22 +451,21 @@ class DataManagerGUI:
             return
         
         if self.data_manager.add_data(digits_23, digit_6, part, revision):
-            messagebox.showinfo("Success", "Data added successfully")
             self.clear_entries()
-            self.refresh_table()
+            self.update_row(key)
+            self.show_key(key)
+            messagebox.showinfo("Success", "Data added successfully")
         else:
             messagebox.showerror("Error", "Failed to add data")
     
     def edit_data(self):
         """แก้ไขข้อมูล"""
-        selected = self.tree.selection()
-        if not selected:
+        old_key = self.get_selected_key()
+        if old_key is None:
             messagebox.showwarning("Warning", "Please select a row to edit")
             return
         
-        item = self.tree.item(selected[0])
-        values = item['values']
-        old_key = values[0]
+        values = self.row_values(old_key)
         
         # เปิดหน้าต่างแก้ไข
         edit_window = tk.Toplevel(self.window)
@@ -295,16 +525,9 @@ class DataManagerGUI:
             new_part = part_entry.get().strip()
             new_revision = revision_entry.get().strip()
             
-            if not all([new_digits_23, new_digit_6, new_part, new_revision]):
-                messagebox.showwarning("Warning", "Please fill all fields")
-                return
-            
-            if len(new_digits_23) != 2:
-                messagebox.showwarning("Warning", "Digits 2-3 must be 2 characters")
-                return
-            
-            if len(new_digit_6) != 1:
-                messagebox.showwarning("Warning", "Digit 6 must be 1 character")
+            error = validate_entry(new_digits_23, new_digit_6, new_part, new_revision)
+            if error:
+                messagebox.showwarning("Warning", error)
                 return
             
             new_key = f"{new_digits_23}_{new_digit_6}"
@@ -314,16 +537,22 @@ class DataManagerGUI:
                 messagebox.showwarning("Warning", f"Key {new_key} already exists")
                 return
             
-            # ลบ key เก่าถ้า key เปลี่ยน
-            if new_key != old_key:
-                self.data_manager.delete_data(old_key)
-            
-            # เพิ่มข้อมูลใหม่หรืออัปเดต
+            # ลบ key เก่าและเพิ่มข้อมูลใหม่ในการบันทึกครั้งเดียว
             description = f"Digits 2-3: {new_digits_23}, Digit 6: {new_digit_6}"
-            if self.data_manager.add_data(new_digits_23, new_digit_6, new_part, new_revision, description):
-                messagebox.showinfo("Success", "Data updated successfully")
+            try:
+                with self.data_manager.batch():
+                    if new_key != old_key:
+                        self.data_manager.delete_data(old_key)
+                    saved = self.data_manager.add_data(new_digits_23, new_digit_6, new_part, new_revision, description)
+            except OSError:
+                # บันทึกไม่สำเร็จ (เช่น ติดต่อเซิร์ฟเวอร์ข้อมูลกลางไม่ได้)
+                saved = False
+            if saved:
                 edit_window.destroy()
-                self.refresh_table()
+                self.update_row(old_key)
+                self.update_row(new_key)
+                self.show_key(new_key)
+                messagebox.showinfo("Success", "Data updated successfully")
             else:
                 messagebox.showerror("Error", "Failed to update data")
         
@@ -332,42 +561,201 @@ class DataManagerGUI:
     
     def delete_data(self):
         """ลบข้อมูล"""
-        selected = self.tree.selection()
-        if not selected:
+        key = self.get_selected_key()
+        if key is None:
             messagebox.showwarning("Warning", "Please select a row to delete")
             return
         
-        item = self.tree.item(selected[0])
-        key = item['values'][0]
-        
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {key}?"):
             if self.data_manager.delete_data(key):
+                self.update_row(key)
                 messagebox.showinfo("Success", "Data deleted successfully")
-                self.refresh_table()
             else:
                 messagebox.showerror("Error", "Failed to delete data")
     
+    def import_data(self):
+        """นำเข้าข้อมูลจากไฟล์ CSV/JSON"""
+        path = filedialog.askopenfilename(parent=self.window, filetypes=[
+            ("Data files", "*.csv *.json *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+        overwrite = messagebox.askyesno(
+            "Import", "Overwrite existing keys that have a different part/revision?")
+        try:
+            report = self.data_manager.import_file(path, overwrite=overwrite)
+        except Exception as e:
+            messagebox.showerror("Error", f"Import failed: {str(e)}")
+            return
+        messagebox.showinfo("Import", report.summary())
+        self.refresh_table()
+    
+    def export_data(self):
+        """ส่งออกข้อมูลเป็นไฟล์ CSV/JSON"""
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON", "*.json"),
+                                                       ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        try:
+            count = self.data_manager.export_file(path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Export failed: {str(e)}")
+            return
+        messagebox.showinfo("Export", f"Exported {count} rows to {path}")
+    
     def refresh_table(self):
-        """รีเฟรชตาราง"""
-        # ลบข้อมูลเก่า
-        for item in self.tree.get_children():
+        """รีเฟรชตาราง (สร้างรายการ key ใหม่ทั้งหมด แต่แสดงเฉพาะแถวที่มองเห็น)"""
+        self.data_manager.reload_if_changed()
+        self.view_keys = self.data_manager.search(self.search_query)
+        self.render_rows()
+    
+    def on_search(self, event=None):
+        """กรองตารางตามคำค้นหา (ใช้ดัชนีของ DataManager)"""
+        query = self.search_entry.get().strip()
+        if query == self.search_query:
+            return
+        self.search_query = query
+        self.view_keys = self.data_manager.search(query)
+        self.top_index = 0
+        self.render_rows()
+    
+    def row_values(self, key):
+        """ค่าของแต่ละคอลัมน์สำหรับ key"""
+        data = self.data_manager.data[key]
+        if "_" in key:
+            digits_23, digit_6 = key.split("_", 1)
+        else:
+            digits_23, digit_6 = key, ""
+        return (
+            key,
+            digits_23,
+            digit_6,
+            data["part"],
+            data["revision"],
+            data.get("description", "")
+        )
+    
+    def render_rows(self):
+        """แสดงเฉพาะแถวในช่วงที่มองเห็น โดยใช้ item ของ Treeview ซ้ำ"""
+        total = len(self.view_keys)
+        self.top_index = max(0, min(self.top_index, total - self.visible_rows))
+        window_keys = self.view_keys[self.top_index:self.top_index + self.visible_rows]
+        
+        items = self.tree.get_children()
+        # ปรับจำนวน item ให้เท่ากับจำนวนแถวที่มองเห็น
+        for item in items[len(window_keys):]:
             self.tree.delete(item)
-        
-        # เพิ่มข้อมูลใหม่
-        for key, data in self.data_manager.data.items():
-            if "_" in key:
-                digits_23, digit_6 = key.split("_", 1)
-            else:
-                digits_23, digit_6 = key, ""
-            
-            self.tree.insert("", "end", values=(
-                key,
-                digits_23,
-                digit_6,
-                data["part"],
-                data["revision"],
-                data.get("description", "")
-            ))
+        for index in range(len(items), len(window_keys)):
+            self.tree.insert("", "end", iid=f"row{index}")
+        
+        selected_item = None
+        for index, key in enumerate(window_keys):
+            # อัปเดตเฉพาะแถวที่ key เปลี่ยน
+            if index >= len(self.row_keys) or self.row_keys[index] != key:
+                self.tree.item(f"row{index}", values=self.row_values(key))
+            if key == self.selected_key:
+                selected_item = f"row{index}"
+        self.row_keys = window_keys
+        
+        if selected_item:
+            if self.tree.selection() != (selected_item,):
+                self.tree.selection_set(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        
+        self.count_label.config(text=f"{total} rows")
+        if total:
+            self.scrollbar.set(self.top_index / total,
+                               (self.top_index + len(window_keys)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def update_row(self, key):
+        """อัปเดตตารางหลังจาก key ถูกเพิ่ม แก้ไข หรือลบ โดยไม่สร้างตารางใหม่"""
+        index = bisect.bisect_left(self.view_keys, key)
+        exists = index < len(self.view_keys) and self.view_keys[index] == key
+        if key in self.data_manager.data and (
+                not self.search_query or self.data_manager.matches_search(key, self.search_query)):
+            if not exists:
+                self.view_keys.insert(index, key)
+                if index < self.top_index:
+                    self.top_index += 1
+        elif exists:
+            del self.view_keys[index]
+            if index < self.top_index:
+                self.top_index -= 1
+        
+        if key in self.row_keys:
+            # บังคับให้วาดแถวนี้ใหม่ เพราะค่าอาจเปลี่ยนแม้ key เดิม
+            self.row_keys = [None if row_key == key else row_key for row_key in self.row_keys]
+        self.render_rows()
+    
+    def show_key(self, key):
+        """เลื่อนตารางให้เห็น key และเลือกแถวนั้น"""
+        index = bisect.bisect_left(self.view_keys, key)
+        if index < len(self.view_keys) and self.view_keys[index] == key:
+            if not self.top_index <= index < self.top_index + self.visible_rows:
+                self.top_index = index - self.visible_rows // 2
+            self.selected_key = key
+            self.render_rows()
+    
+    def get_selected_key(self):
+        selected = self.tree.selection()
+        if not selected:
+            return None
+        index = self.tree.index(selected[0])
+        if index < len(self.row_keys):
+            return self.row_keys[index]
+        return None
+    
+    def on_select(self, event):
+        key = self.get_selected_key()
+        if key is not None:
+            self.selected_key = key
+    
+    def move_selection(self, step):
+        """เลื่อนแถวที่เลือกด้วยปุ่มลูกศร และเลื่อนตารางเมื่อถึงขอบ"""
+        if not self.view_keys:
+            return "break"
+        if self.selected_key is None:
+            index = self.top_index
+        else:
+            index = bisect.bisect_left(self.view_keys, self.selected_key) + step
+        index = max(0, min(index, len(self.view_keys) - 1))
+        if index < self.top_index:
+            self.top_index = index
+        elif index >= self.top_index + self.visible_rows:
+            self.top_index = index - self.visible_rows + 1
+        self.selected_key = self.view_keys[index]
+        self.render_rows()
+        return "break"
+    
+    def scroll_rows(self, rows):
+        self.top_index += rows
+        self.render_rows()
+        return "break"
+    
+    def on_scroll(self, *args):
+        """รับคำสั่งจาก Scrollbar ("moveto", fraction) หรือ ("scroll", n, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.top_index = int(float(args[1]) * len(self.view_keys))
+            self.render_rows()
+        elif args[0] == "scroll":
+            rows = int(args[1])
+            if args[2] == "pages":
+                rows *= self.visible_rows
+            self.scroll_rows(rows)
+    
+    def on_mouse_wheel(self, event):
+        return self.scroll_rows(-3 if event.delta > 0 else 3)
+    
+    def on_tree_resize(self, event):
+        """คำนวณจำนวนแถวที่มองเห็นจากความสูงของ Treeview"""
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        rows = max(1, (event.height - row_height) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render_rows()
     
     def clear_entries(self):
         """ล้างข้อมูลในช่อง input"""
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+เข้ารหัสบาร์โค้ด Code128 และ Code39 ด้วย Python ล้วน
+- Code128: เลือก subset A/B/C อัตโนมัติ (ตัวเลขติดกันยาวใช้ C) พร้อม checksum
+- Code39: พร้อม check digit (mod 43) แบบเลือกได้
+ตารางสัญลักษณ์ถูกคำนวณไว้ครั้งเดียวตอน import ผลลัพธ์เป็นความกว้างของแท่ง/ช่องว่าง
+ซึ่งแปลงเป็นคำสั่งของเครื่องพิมพ์ (ZPL/EPL/TSPL) หรือภาพ 1-bit ได้
+
+ใช้งาน:
+    python label_barcode.py            วัดความเร็วการเข้ารหัส 100,000 Lot
+"""
+
+from functools import lru_cache
+from time import perf_counter
+
+# ความกว้างของแท่ง/ช่องว่างของสัญลักษณ์ Code128 ค่า 0-106 (106 = stop)
+CODE128_PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312",
+    "132212", "221213", "221312", "231212", "112232", "122132", "122231", "113222",
+    "123122", "123221", "223211", "221132", "221231", "213212", "223112", "312131",
+    "311222", "321122", "321221", "312212", "322112", "322211", "212123", "212321",
+    "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121",
+    "313121", "211331", "231131", "213113", "213311", "213131", "311123", "311321",
+    "331121", "312113", "312311", "332111", "314111", "221411", "431111", "111224",
+    "111422", "121124", "121421", "141122", "141221", "112214", "112412", "122114",
+    "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112",
+    "421211", "212141", "214121", "412121", "111143", "111341", "131141", "114113",
+    "114311", "411113", "411311", "113141", "114131", "311141", "411131", "211412",
+    "211214", "211232", "2331112"
+)
+
+CODE128_START = {"A": 103, "B": 104, "C": 105}
+CODE128_SWITCH = {"A": 101, "B": 100, "C": 99}
+CODE128_STOP = 106
+
+# ตารางค่าของแต่ละตัวอักษรใน subset A และ B, และคู่ตัวเลขใน subset C
+CODE128_A = {chr(c): c - 32 for c in range(32, 96)}
+CODE128_A.update({chr(c): c + 64 for c in range(32)})
+CODE128_B = {chr(c): c - 32 for c in range(32, 128)}
+CODE128_C = {f"{n:02d}": n for n in range(100)}
+
+# ตัวอักษรของ Code39 ตามลำดับค่า (ใช้คำนวณ check digit)
+CODE39_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-. $/+%"
+
+# แท่ง/ช่องว่างของ Code39 (n = แคบ, w = กว้าง) เริ่มด้วยแท่ง
+CODE39_PATTERNS = {
+    "0": "nnnwwnwnn", "1": "wnnwnnnnw", "2": "nnwwnnnnw", "3": "wnwwnnnnn",
+    "4": "nnnwwnnnw", "5": "wnnwwnnnn", "6": "nnwwwnnnn", "7": "nnnwnnwnw",
+    "8": "wnnwnnwnn", "9": "nnwwnnwnn", "A": "wnnnnwnnw", "B": "nnwnnwnnw",
+    "C": "wnwnnwnnn", "D": "nnnnwwnnw", "E": "wnnnwwnnn", "F": "nnwnwwnnn",
+    "G": "nnnnnwwnw", "H": "wnnnnwwnn", "I": "nnwnnwwnn", "J": "nnnnwwwnn",
+    "K": "wnnnnnnww", "L": "nnwnnnnww", "M": "wnwnnnnwn", "N": "nnnnwnnww",
+    "O": "wnnnwnnwn", "P": "nnwnwnnwn", "Q": "nnnnnnwww", "R": "wnnnnnwwn",
+    "S": "nnwnnnwwn", "T": "nnnnwnwwn", "U": "wwnnnnnnw", "V": "nwwnnnnnw",
+    "W": "wwwnnnnnn", "X": "nwnnwnnnw", "Y": "wwnnwnnnn", "Z": "nwwnwnnnn",
+    "-": "nwnnnnwnw", ".": "wwnnnnwnn", " ": "nwwnnnwnn", "$": "nwnwnwnnn",
+    "/": "nwnwnnnwn", "+": "nwnnnwnwn", "%": "nnnwnwnwn", "*": "nwnnwnwnn"
+}
+CODE39_VALUES = {char: value for value, char in enumerate(CODE39_CHARS)}
+# อัตราส่วนแท่งกว้างต่อแท่งแคบ
+CODE39_WIDE = 3
+# ความกว้างแบบตัวเลข ("1"/"3") ของแต่ละตัวอักษร พร้อมช่องว่างแคบคั่นระหว่างตัวอักษร
+CODE39_WIDTHS = {
+    char: pattern.replace("n", "1").replace("w", str(CODE39_WIDE)) + "1"
+    for char, pattern in CODE39_PATTERNS.items()
+}
+
+
+def _digit_run(data, start):
+    """จำนวนตัวเลขที่อยู่ติดกันตั้งแต่ตำแหน่ง start"""
+    end = start
+    while end < len(data) and "0" <= data[end] <= "9":
+        end += 1
+    return end - start
+
+
+def _text_subset(data, start):
+    """เลือก A ถ้าเจออักขระควบคุมก่อนตัวพิมพ์เล็ก ไม่เช่นนั้นใช้ B"""
+    for char in data[start:]:
+        if char < " ":
+            return "A"
+        if char >= "`":
+            return "B"
+    return "B"
+
+
+def code128_values(data):
+    """
+    แปลงข้อความเป็นค่าสัญลักษณ์ Code128 (start, ข้อมูล, checksum, stop)
+
+    Args:
+        data (str): ข้อความ ASCII (0-127)
+
+    Returns:
+        list: ค่าสัญลักษณ์ 0-106
+    """
+    if not data:
+        raise ValueError("Code128 data must not be empty")
+    length = len(data)
+    run = _digit_run(data, 0)
+    if run == length and run >= 2 and run % 2 == 0 or run >= 4:
+        subset = "C"
+    else:
+        subset = _text_subset(data, 0)
+    values = [CODE128_START[subset]]
+
+    i = 0
+    while i < length:
+        if subset == "C":
+            if _digit_run(data, i) >= 2:
+                values.append(CODE128_C[data[i:i + 2]])
+                i += 2
+                continue
+            subset = _text_subset(data, i)
+            values.append(CODE128_SWITCH[subset])
+
+        # ตัวเลขติดกันตั้งแต่ 4 ตัว (ถึงท้ายข้อความ) หรือ 6 ตัวขึ้นไป คุ้มที่จะสลับไป C
+        run = _digit_run(data, i)
+        if run >= 6 or (run >= 4 and i + run == length):
+            if run % 2:
+                # ตัวเลขตัวแรกของจำนวนคี่เข้ารหัสใน subset ปัจจุบัน
+                values.append(CODE128_A[data[i]] if subset == "A" else CODE128_B[data[i]])
+                i += 1
+            subset = "C"
+            values.append(CODE128_SWITCH["C"])
+            continue
+
+        char = data[i]
+        table = CODE128_A if subset == "A" else CODE128_B
+        if char not in table:
+            other = "B" if subset == "A" else "A"
+            if char not in (CODE128_A if other == "A" else CODE128_B):
+                raise ValueError(f"Cannot encode {char!r} in Code128")
+            subset = other
+            values.append(CODE128_SWITCH[subset])
+            table = CODE128_A if subset == "A" else CODE128_B
+        values.append(table[char])
+        i += 1
+
+    checksum = values[0]
+    for position, value in enumerate(values[1:], 1):
+        checksum += position * value
+    values.append(checksum % 103)
+    values.append(CODE128_STOP)
+    return values
+
+
+@lru_cache(maxsize=4096)
+def code128_widths(data):
+    """ความกว้าง (หน่วย module) ของแท่ง/ช่องว่างทั้งหมดของ Code128 เริ่มด้วยแท่ง"""
+    return "".join([CODE128_PATTERNS[value] for value in code128_values(data)])
+
+
+def code39_check_digit(data):
+    """check digit ของ Code39 (ผลรวมค่าตัวอักษร mod 43)"""
+    try:
+        return CODE39_CHARS[sum(CODE39_VALUES[char] for char in data) % 43]
+    except KeyError as e:
+        raise ValueError(f"Cannot encode {e.args[0]!r} in Code39") from None
+
+
+def code39_text(data, check_digit=False):
+    """ข้อความ Code39 ที่มี * ครอบ (สำหรับฟอนต์บาร์โค้ดหรือพิมพ์เป็นข้อความ)"""
+    if check_digit:
+        data += code39_check_digit(data)
+    else:
+        for char in data:
+            if char not in CODE39_VALUES:
+                raise ValueError(f"Cannot encode {char!r} in Code39")
+    return f"*{data}*"
+
+
+@lru_cache(maxsize=4096)
+def code39_widths(data, check_digit=False):
+    """ความกว้าง (หน่วย module) ของแท่ง/ช่องว่างทั้งหมดของ Code39 เริ่มด้วยแท่ง"""
+    text = code39_text(data, check_digit)
+    # ตัดช่องว่างคั่นหลังตัวอักษรสุดท้ายออก
+    return "".join([CODE39_WIDTHS[char] for char in text])[:-1]
+
+
+def encode(data, symbology="code128", check_digit=False):
+    """
+    เข้ารหัสข้อความเป็นความกว้างของแท่ง/ช่องว่าง
+
+    Args:
+        data (str): ข้อความที่จะเข้ารหัส
+        symbology (str): "code128" หรือ "code39"
+        check_digit (bool): ใส่ check digit ของ Code39 (Code128 มี checksum เสมอ)
+
+    Returns:
+        str: ตัวเลขความกว้างของแต่ละแท่ง/ช่องว่าง เช่น "2112..."
+    """
+    if symbology == "code128":
+        return code128_widths(data)
+    if symbology == "code39":
+        return code39_widths(data, check_digit)
+    raise ValueError(f"Unsupported symbology: {symbology}")
+
+
+@lru_cache(maxsize=16)
+def _run_bits(module_width):
+    """สตริงบิตของแท่ง (1) และช่องว่าง (0) แต่ละความกว้าง สำหรับ module_width ที่กำหนด"""
+    return ({str(w): "1" * (w * module_width) for w in range(1, 5)},
+            {str(w): "0" * (w * module_width) for w in range(1, 5)})
+
+
+def raster_row(widths, module_width=2):
+    """
+    แปลงความกว้างของแท่งเป็นภาพ 1-bit หนึ่งแถว (1 = จุดดำ, MSB ก่อน)
+
+    Args:
+        widths (str): ผลของ encode()
+        module_width (int): จำนวนจุดต่อ module
+
+    Returns:
+        tuple: (ความกว้างเป็นจุด, bytes ของแถว)
+    """
+    bars, spaces = _run_bits(module_width)
+    # แท่งอยู่ตำแหน่งคู่ ช่องว่างอยู่ตำแหน่งคี่
+    bits = "".join([bars[bar] + spaces[space]
+                    for bar, space in zip(widths[0::2], widths[1::2])])
+    if len(widths) % 2:
+        bits += bars[widths[-1]]
+    dots = len(bits)
+    bits += "0" * (-dots % 8)
+    return dots, int(bits, 2).to_bytes(len(bits) // 8, "big")
+
+
+def raster_command(data, language="zpl", x=0, y=0, height=100, module_width=2,
+                   symbology="code128"):
+    """
+    คำสั่งพิมพ์บาร์โค้ดเป็นภาพ 1-bit สำหรับเครื่องพิมพ์ที่ไม่มีบาร์โค้ดในตัว
+
+    Args:
+        data (str): ข้อความที่จะเข้ารหัส
+        language (str): "zpl", "epl" หรือ "tspl"
+        x, y (int): ตำแหน่งเป็นจุด
+        height (int): ความสูงเป็นจุด
+        module_width (int): จำนวนจุดต่อ module
+        symbology (str): "code128" หรือ "code39"
+
+    Returns:
+        bytes: คำสั่งของเครื่องพิมพ์
+    """
+    dots, row = raster_row(encode(data, symbology), module_width)
+    row_bytes = len(row)
+    if language == "zpl":
+        hex_row = row.hex().upper()
+        # แถวที่เหมือนแถวก่อนหน้าย่อด้วย ":" (ZPL ASCII compression)
+        body = hex_row + ":" * (height - 1)
+        return (f"^FO{x},{y}^GFA,{row_bytes * height},{row_bytes * height},{row_bytes},"
+                f"{body}^FS\n").encode("ascii")
+    # EPL และ TSPL ใช้ 0 = จุดดำ
+    inverted = bytes(byte ^ 0xFF for byte in row)
+    if language == "epl":
+        return f"GW{x},{y},{row_bytes},{height},".encode("ascii") + inverted * height + b"\n"
+    if language == "tspl":
+        return f"BITMAP {x},{y},{row_bytes},{height},0,".encode("ascii") + inverted * height + b"\n"
+    raise ValueError(f"Unsupported printer language: {language}")
+
+
+def native_command(language="zpl", x=0, y=0, height=100, module_width=2,
+                   symbology="code128"):
+    """
+    คำสั่งบาร์โค้ดในตัวของเครื่องพิมพ์ (ไม่รวมข้อมูล) ผู้เรียกต่อท้ายด้วยข้อมูลหรือตัวแปร
+    เช่น ZPL ต่อด้วย ^FN3^FS หรือ ^FD...^FS, EPL/TSPL ต่อด้วยตัวแปรหรือ "ข้อความ"
+    """
+    code128 = symbology == "code128"
+    if symbology not in ("code128", "code39"):
+        raise ValueError(f"Unsupported symbology: {symbology}")
+    if language == "zpl":
+        symbol = f"^BCN,{height},N,N,N,A" if code128 else f"^B3N,N,{height},N,N"
+        return f"^FO{x},{y}^BY{module_width},3,{height}{symbol}"
+    if language == "epl":
+        return (f"B{x},{y},0,{1 if code128 else 3},{module_width},"
+                f"{module_width * CODE39_WIDE},{height},N,")
+    if language == "tspl":
+        return (f'BARCODE {x},{y},"{"128" if code128 else "39"}",{height},0,0,'
+                f"{module_width},{module_width * CODE39_WIDE},")
+    raise ValueError(f"Unsupported printer language: {language}")
+
+
+def benchmark_encode(count=100000, symbology="code128"):
+    """
+    วัดความเร็วการเข้ารหัส Lot จำนวน count รายการ (ไม่ซ้ำกัน จึงไม่ได้ประโยชน์จาก cache)
+
+    Returns:
+        dict: เวลาเฉลี่ยต่อ Lot (ไมโครวินาที) ของการเข้ารหัสและการสร้างภาพ 1-bit
+    """
+    lots = [f"QSTZ8B{n:06d}" if n % 2 else f"XTBZZQ{n:05d}A" for n in range(count)]
+    encode_func = code128_values if symbology == "code128" else code39_text
+
+    start = perf_counter()
+    for lot in lots:
+        encode_func(lot)
+    encoded = perf_counter() - start
+
+    start = perf_counter()
+    for lot in lots:
+        raster_row(encode(lot, symbology))
+    rastered = perf_counter() - start
+    code128_widths.cache_clear()
+    code39_widths.cache_clear()
+
+    return {
+        "count": count,
+        "encode_us": encoded / count * 1e6,
+        "raster_us": rastered / count * 1e6
+    }
+
+
+if __name__ == "__main__":
+    for name in ("code128", "code39"):
+        result = benchmark_encode(symbology=name)
+        print(f"{name}: {result['count']} lots: {result['encode_us']:.2f} us/lot (encode), "
+              f"{result['raster_us']:.2f} us/lot (1-bit raster)")
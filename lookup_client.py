@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+โหมด client ของ DataManager สำหรับสถานีที่ใช้เซิร์ฟเวอร์ข้อมูลกลาง (lookup_server.py)
+- เก็บสำเนาข้อมูลทั้งหมดในหน่วยความจำและในไฟล์ part_data_remote.json
+  การค้นหาตอนสแกนจึงไม่รอเครือข่าย และยังทำงานได้เมื่อเซิร์ฟเวอร์ช้าหรือติดต่อไม่ได้
+- thread เบื้องหลังดึงเฉพาะรายการที่เปลี่ยนตั้งแต่ version ล่าสุด
+  แล้วนำไปใช้ใน thread หลักตอนเรียก reload_if_changed() (ทุกครั้งที่สแกน)
+  ไฟล์สำเนาถูกเขียนจาก thread เบื้องหลังไม่เกินทุก CACHE_SAVE_SECONDS วินาที (และตอน close())
+- การเพิ่ม/แก้ไข/ลบ ส่งไปเซิร์ฟเวอร์ ถ้าส่งไม่สำเร็จจะคืนค่า False และย้อนข้อมูลในเครื่อง
+
+เปิดใช้โดยตั้ง MACARTON_LOOKUP_SERVER=http://host:8765 หรือเขียน URL ไว้ในไฟล์
+lookup_server.txt ข้างโปรแกรม
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+import metrics
+from data_manager import DataManager
+
+SERVER_URL_ENV = "MACARTON_LOOKUP_SERVER"
+SERVER_URL_FILE = "lookup_server.txt"
+# ดึงการเปลี่ยนแปลงทุกกี่วินาที และรอนานสุดเท่าไรเมื่อเซิร์ฟเวอร์ติดต่อไม่ได้
+SYNC_SECONDS = 3.0
+MAX_BACKOFF_SECONDS = 60.0
+# เขียนไฟล์สำเนาไม่บ่อยกว่านี้ (วินาที)
+CACHE_SAVE_SECONDS = 30.0
+
+
+def get_lookup_server_url():
+    """URL ของเซิร์ฟเวอร์ข้อมูลกลาง หรือ None ถ้าใช้ไฟล์ข้อมูลในเครื่อง"""
+    url = os.environ.get(SERVER_URL_ENV, "").strip()
+    if not url:
+        path = os.path.join(os.path.dirname(DataManager.get_data_file_path()), SERVER_URL_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                url = f.read().strip()
+        except OSError:
+            return None
+    return url.rstrip("/") or None
+
+
+class LookupClient:
+    """เรียก API ของ lookup_server.py (ข้อผิดพลาดของเครือข่ายเป็น OSError)"""
+
+    def __init__(self, base_url, timeout=2.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, body=None, timeout=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = Request(self.base_url + path, data=data,
+                          headers={"Content-Type": "application/json"})
+        with urlopen(request, timeout=timeout or self.timeout) as response:
+            try:
+                return json.loads(response.read())
+            except ValueError as e:
+                raise OSError(f"Invalid response from {self.base_url}: {e}")
+
+    def health(self):
+        return self._request("/health")
+
+    def snapshot(self):
+        return self._request("/snapshot")
+
+    def changes(self, epoch, since):
+        return self._request("/changes?" + urlencode({"epoch": epoch or "", "since": since}))
+
+    def lookup(self, lots):
+        """ค้นหาหลาย Lot ในครั้งเดียว คืนค่า [(part, rev) หรือ (None, None), ...]"""
+        results = self._request("/lookup", {"lots": list(lots)})["results"]
+        return [tuple(result) if result else (None, None) for result in results]
+
+    def mutate(self, records, timeout=5.0):
+        return self._request("/mutate", {"records": records}, timeout)
+
+
+class RemoteDataManager(DataManager):
+    """DataManager ที่ข้อมูลมาจากเซิร์ฟเวอร์กลาง ใช้แทน DataManager ได้ทุกที่"""
+
+    def __init__(self, server_url, cache_file=None, sync_seconds=SYNC_SECONDS, timeout=2.0):
+        self.server_url = server_url.rstrip("/")
+        self.client = LookupClient(self.server_url, timeout)
+        self.epoch = None
+        self.version = 0
+        self.sync_seconds = sync_seconds
+        self.server_online = None
+        self.last_sync = None
+        self.sync_errors = 0
+        self.cache_save_seconds = CACHE_SAVE_SECONDS
+        self._cache_lock = threading.Lock()     # epoch/version/data ที่เขียนลงไฟล์ต้องตรงกัน
+        self._save_lock = threading.Lock()
+        self._cache_dirty = False
+        self._cache_saved_at = time.monotonic()
+        # ค่าเดิมของ key ที่แก้ไขแต่ยังไม่ได้ส่งไปเซิร์ฟเวอร์ (ใช้ย้อนกลับเมื่อส่งไม่สำเร็จ)
+        self._undo = {}
+        super().__init__(cache_file or os.path.join(os.path.dirname(DataManager.get_data_file_path()),
+                                                    "part_data_remote.json"))
+        # ผลที่ thread เบื้องหลังดึงมา รอนำไปใช้ใน thread หลัก
+        self._incoming = queue.Queue()
+        self._fetched = (self.epoch, self.version)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sync_loop, name="lookup-sync", daemon=True)
+        self._thread.start()
+
+    def load_data(self):
+        """อ่านสำเนาล่าสุดจากไฟล์ (ใช้ได้ทันทีแม้เซิร์ฟเวอร์ติดต่อไม่ได้)"""
+        self.cache_reloads += 1
+        self._index = None
+        self._slots_engine = None
+        self.negative_cache.clear()
+        try:
+            with open(self.data_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        if cache.get("server") != self.server_url:
+            cache = {}
+        self.epoch = cache.get("epoch")
+        self.version = cache.get("version", 0)
+        return cache.get("data", {})
+
+    def save_data(self):
+        """เขียนสำเนาพร้อม epoch/version แบบ atomic"""
+        with self._save_lock:
+            with self._cache_lock:
+                cache = {"server": self.server_url, "epoch": self.epoch,
+                         "version": self.version, "data": dict(self.data)}
+                self._cache_dirty = False
+            self._cache_saved_at = time.monotonic()
+            tmp_file = f"{self.data_file}.{os.getpid()}.tmp"
+            try:
+                with metrics.timer("file_write_seconds", file="remote_cache"):
+                    with open(tmp_file, "w", encoding="utf-8") as f:
+                        json.dump(cache, f)
+                    os.replace(tmp_file, self.data_file)
+            except OSError as e:
+                self._cache_dirty = True
+                print(f"Cannot save lookup cache: {e}")
+
+    def _save_if_due(self):
+        # เรียกจาก thread เบื้องหลัง ไม่ให้การเขียนไฟล์ทั้งตารางอยู่ในเส้นทางการสแกน
+        if self._cache_dirty and time.monotonic() - self._cache_saved_at >= self.cache_save_seconds:
+            self.save_data()
+
+    def _sync_loop(self):
+        delay = 0
+        while not self._stop.wait(delay):
+            self._save_if_due()
+            epoch, version = self._fetched
+            try:
+                response = self.client.changes(epoch, version)
+            except OSError:
+                self.server_online = False
+                self.sync_errors += 1
+                delay = min(max(delay, self.sync_seconds) * 2, MAX_BACKOFF_SECONDS)
+                continue
+            self.server_online = True
+            self.last_sync = time.time()
+            delay = self.sync_seconds
+            if response.get("full") or response["epoch"] != epoch or response["version"] != version:
+                self._fetched = (response["epoch"], response["version"])
+                self._incoming.put(response)
+
+    def _apply(self, response):
+        with self._cache_lock:
+            self._apply_locked(response)
+            self._cache_dirty = True
+
+    def _apply_locked(self, response):
+        if response.get("full"):
+            self.data = response["data"]
+            self._index = None
+            self._slots_engine = None
+            self.negative_cache.clear()
+            self.cache_reloads += 1
+        else:
+            for record in response["changes"]:
+                key = record["key"]
+                if record["op"] == "set":
+                    self.data[key] = record["value"]
+                    self.negative_cache.discard(key)
+                    self.misses.forget(key)
+                    if self._index is not None:
+                        self._index.add(key, self.data[key])
+                    if self._slots is not None:
+                        self._slots.set(key, record["value"]["part"], record["value"]["revision"])
+                elif self.data.pop(key, None) is not None:
+                    if self._index is not None:
+                        self._index.remove(key)
+                    if self._slots is not None:
+                        self._slots.delete(key)
+        self.epoch = response["epoch"]
+        self.version = response["version"]
+
+    def reload_if_changed(self):
+        """นำการเปลี่ยนแปลงที่ดึงมาแล้วไปใช้ (ไม่รอเครือข่าย)"""
+        changed = False
+        while True:
+            try:
+                response = self._incoming.get_nowait()
+            except queue.Empty:
+                break
+            self._apply(response)
+            changed = True
+        if not changed:
+            self.cache_hits += 1
+            return False
+        return True
+
+    def _commit(self, records):
+        """ส่งการแก้ไขไปเซิร์ฟเวอร์ (หรือเก็บไว้ก่อนถ้าอยู่ใน batch) ส่งไม่สำเร็จจะ raise OSError"""
+        if self._pending is not None:
+            self._pending.extend(records)
+            return
+        undo, self._undo = self._undo, {}
+        if not records:
+            return
+        try:
+            self.client.mutate(records)
+        except OSError:
+            self._rollback(undo)
+            raise
+
+    def _rollback(self, undo):
+        """คืนค่าเดิมของ key ที่แก้ไข (ข้อมูลส่วนอื่นยังตรงกับเซิร์ฟเวอร์)"""
+        with self._cache_lock:
+            for key, value in undo.items():
+                if value is None:
+                    self.data.pop(key, None)
+                else:
+                    self.data[key] = value
+        self._index = None
+        self._slots_engine = None
+        self.negative_cache.clear()
+
+    def _send(self, key, method, *args):
+        if key not in self._undo:
+            value = self.data.get(key)
+            self._undo[key] = None if value is None else dict(value)
+        if self._pending is not None:
+            return method(*args)
+        try:
+            return method(*args)
+        except OSError:
+            return False
+        finally:
+            self._undo.clear()
+
+    def add_data(self, digits_2_3, digit_6, part, revision, description=""):
+        return self._send(f"{digits_2_3}_{digit_6}", super().add_data,
+                          digits_2_3, digit_6, part, revision, description)
+
+    def update_data(self, key, part, revision, description=""):
+        return self._send(key, super().update_data, key, part, revision, description)
+
+    def delete_data(self, key):
+        return self._send(key, super().delete_data, key)
+
+    def lookup_remote(self, lots):
+        """ค้นหาหลาย Lot จากเซิร์ฟเวอร์โดยตรงในครั้งเดียว (เช่น ตรวจสอบข้อมูลล่าสุดก่อนพิมพ์ชุดใหญ่)"""
+        return self.client.lookup(lots)
+
+    def get_cache_stats(self):
+        stats = super().get_cache_stats()
+        stats.update({
+            "server": self.server_url,
+            "server_online": self.server_online,
+            "version": self.version,
+            "last_sync": self.last_sync,
+            "sync_errors": self.sync_errors
+        })
+        return stats
+
+    def close(self):
+        self._stop.set()
+        self.reload_if_changed()
+        self.save_data()
+        self.misses.close()
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+เซิร์ฟเวอร์ข้อมูล Part/Revision กลางสำหรับหลายสถานีสแกน (HTTP + JSON)
+ทุกสถานีที่ตั้งค่า MACARTON_LOOKUP_SERVER (หรือไฟล์ lookup_server.txt) จะใช้ข้อมูลชุดเดียวกัน
+โดยเก็บสำเนาไว้ในเครื่องและดึงเฉพาะรายการที่เปลี่ยน (ดู lookup_client.py)
+
+API:
+    GET  /health                          สถานะและ version ปัจจุบัน
+    GET  /snapshot                        ข้อมูลทั้งหมด {"epoch", "version", "data"}
+    GET  /changes?epoch=E&since=N         รายการที่เปลี่ยนหลัง version N
+                                          (ถ้า epoch ไม่ตรงหรือเก่าเกินไปจะได้ snapshot ทั้งหมด)
+    POST /lookup  {"lots": [...]}         ค้นหาหลาย Lot ในครั้งเดียว
+    POST /mutate  {"records": [...]}      แก้ไขข้อมูล ({"op": "set", "key", "value"} / {"op": "del", "key"})
+
+ใช้งาน:
+    python lookup_server.py [--host 0.0.0.0] [--port 8765] [--data-file part_data.json]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from data_manager import validate_entry
+
+DEFAULT_PORT = 8765
+# จำนวนรายการแก้ไขล่าสุดที่เก็บไว้ให้สถานีดึงแบบ delta
+MAX_CHANGES = 10000
+
+
+class LookupState:
+    """DataManager ของเซิร์ฟเวอร์ พร้อม version และประวัติการแก้ไขล่าสุด"""
+
+    def __init__(self, manager, max_changes=MAX_CHANGES):
+        self.manager = manager
+        self._lock = threading.RLock()
+        self.changes = deque(maxlen=max_changes)    # (version, record)
+        self._new_epoch()
+
+    def _new_epoch(self):
+        # epoch ใหม่ = สถานีต้องดึง snapshot ทั้งหมด (เริ่มเซิร์ฟเวอร์ใหม่หรือไฟล์ถูกแก้จากภายนอก)
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self.changes.clear()
+
+    def _refresh(self):
+        if self.manager.reload_if_changed():
+            self._new_epoch()
+
+    def snapshot(self):
+        with self._lock:
+            self._refresh()
+            return {"epoch": self.epoch, "version": self.version,
+                    "data": dict(self.manager.data.items())}
+
+    def changes_since(self, epoch, since):
+        with self._lock:
+            self._refresh()
+            oldest = self.changes[0][0] if self.changes else self.version + 1
+            if epoch != self.epoch or since > self.version or since + 1 < oldest:
+                return dict(self.snapshot(), full=True)
+            return {"epoch": self.epoch, "version": self.version,
+                    "changes": [record for version, record in self.changes if version > since]}
+
+    def lookup(self, lots):
+        with self._lock:
+            self._refresh()
+            results = [None if part is None else [part, rev]
+                       for part, rev in self.manager.get_part_rev_many(lots)]
+            return {"epoch": self.epoch, "version": self.version, "results": results}
+
+    def mutate(self, records):
+        """
+        แก้ไขข้อมูลทั้งหมดในการบันทึกครั้งเดียว คืนค่า version ใหม่
+        ตรวจทุกรายการก่อนแก้ไข รายการที่ผิดรูปแบบทำให้ทั้งชุดถูกปฏิเสธ (ValueError/KeyError/TypeError)
+        """
+        for record in records:
+            validate_record(record)
+        with self._lock:
+            self._refresh()
+            manager = self.manager
+            applied = []
+            try:
+                with manager.batch():
+                    for record in records:
+                        key = record["key"]
+                        if record["op"] == "del":
+                            manager.delete_data(key)
+                        else:
+                            value = record["value"]
+                            if key in manager.data:
+                                manager.update_data(key, value["part"], value["revision"],
+                                                    value.get("description", ""))
+                            else:
+                                digits_2_3, _, digit_6 = key.partition("_")
+                                manager.add_data(digits_2_3, digit_6, value["part"], value["revision"],
+                                                 value.get("description", ""))
+                        applied.append(record)
+            finally:
+                # การแก้ไขของเราเองเปลี่ยน mtime ของไฟล์ อัปเดต signature ไม่ให้ถือเป็นการแก้จากภายนอก
+                manager.reload_if_changed()
+                # รายการที่แก้ไขไปแล้ว (แม้ชุดจะล้มเหลวกลางทาง) ต้องมี version ให้สถานีดึงไปได้
+                for record in applied:
+                    self.version += 1
+                    if record["op"] == "set":
+                        record = {"op": "set", "key": record["key"],
+                                  "value": dict(manager.data[record["key"]])}
+                    self.changes.append((self.version, record))
+            return {"epoch": self.epoch, "version": self.version}
+
+
+def validate_record(record):
+    """ตรวจรูปแบบของรายการแก้ไขหนึ่งรายการ raise ValueError/KeyError/TypeError ถ้าไม่ถูกต้อง"""
+    if not isinstance(record, dict):
+        raise TypeError(f"Record must be an object: {record!r}")
+    op, key = record["op"], record["key"]
+    if not isinstance(key, str) or not key:
+        raise ValueError(f"Invalid key: {key!r}")
+    if op == "del":
+        return
+    if op != "set":
+        raise ValueError(f"Unknown op: {op!r}")
+    value = record["value"]
+    if not isinstance(value, dict):
+        raise TypeError(f"Value of {key} must be an object")
+    for field in ("part", "revision"):
+        if not isinstance(value[field], str):
+            raise TypeError(f"{field} of {key} must be a string")
+    # key ต้องเป็น "{digits_2_3}_{digit_6}" และผ่านกฎเดียวกับหน้า Data Manager
+    digits_2_3, separator, digit_6 = key.partition("_")
+    if not separator:
+        raise ValueError(f"Invalid key: {key!r} (expected digits_2_3_digit_6, e.g. ST_B)")
+    error = validate_entry(digits_2_3, digit_6, value["part"], value["revision"])
+    if error:
+        raise ValueError(error)
+
+
+class LookupRequestHandler(BaseHTTPRequestHandler):
+    """แปลง HTTP request เป็นการเรียก LookupState"""
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        state = self.server.state
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            self._send_json(200, {"ok": True, "epoch": state.epoch, "version": state.version,
+                                  "keys": len(state.manager.data)})
+        elif url.path == "/snapshot":
+            self._send_json(200, state.snapshot())
+        elif url.path == "/changes":
+            epoch = query.get("epoch", [""])[0]
+            try:
+                since = int(query.get("since", ["0"])[0])
+            except ValueError:
+                self._send_json(400, {"error": "Bad request: since must be an integer"})
+                return
+            self._send_json(200, state.changes_since(epoch, since))
+        else:
+            self._send_json(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self):
+        state = self.server.state
+        path = urlsplit(self.path).path
+        try:
+            body = self._read_json()
+            if path == "/lookup":
+                self._send_json(200, state.lookup(body.get("lots", [])))
+            elif path == "/mutate":
+                self._send_json(200, state.mutate(body.get("records", [])))
+            else:
+                self._send_json(404, {"error": f"Unknown path: {path}"})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Bad request: {e}"})
+
+    def log_message(self, format, *args):
+        # ไม่พิมพ์ log ทุก request (สถานีดึงข้อมูลทุกไม่กี่วินาที)
+        pass
+
+
+def make_server(manager, host="127.0.0.1", port=DEFAULT_PORT):
+    """สร้างเซิร์ฟเวอร์ (port=0 ให้ระบบเลือก port ว่าง) เรียก serve_forever() เพื่อเริ่มทำงาน"""
+    server = ThreadingHTTPServer((host, port), LookupRequestHandler)
+    server.daemon_threads = True
+    server.state = LookupState(manager)
+    return server
+
+
+def main(argv=None):
+    from bulk_io import open_manager
+
+    parser = argparse.ArgumentParser(description="Central part lookup server for scanner stations")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-file", help="part_data.json or part_data.db (default: next to the program)")
+    args = parser.parse_args(argv)
+
+    manager = open_manager(args.data_file)
+    server = make_server(manager, args.host, args.port)
+    print(f"Serving {len(manager.data)} keys on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
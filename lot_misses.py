@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+จดจำ key ที่ค้นหาไม่พบ (negative cache) และสถิติ Lot ที่ไม่มีข้อมูล
+- NegativeCache: key ที่รู้แล้วว่าไม่มีข้อมูล จำกัดขนาดแบบ LRU ไม่ต้องค้นหาซ้ำ
+- MissTracker: นับจำนวนครั้งที่ไม่พบต่อ key พร้อมเวลาที่พบครั้งแรก/ล่าสุด
+  บันทึกไว้ข้างไฟล์ข้อมูล (part_data_misses.json) และส่งออกเป็น CSV/JSON
+  เพื่อให้ทีมข้อมูลรู้ว่าควรเพิ่ม key ไหนก่อน
+
+ใช้งาน:
+    python lot_misses.py                       แสดง key ที่ไม่พบบ่อยที่สุด
+    python lot_misses.py --export misses.csv   ส่งออกสถิติทั้งหมด
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import metrics
+
+# key ของ Lot ที่ไม่ตรงกับกฎใดใน lot_rules
+NO_RULE_KEY = "(no rule)"
+# บันทึกสถิติลงไฟล์จาก thread เบื้องหลังภายในกี่วินาทีหลังค้นหาไม่พบ (และตอนปิดโปรแกรม)
+SAVE_DELAY_SECONDS = 30.0
+
+EXPORT_FIELDS = ("key", "count", "first_seen", "last_seen", "last_lot")
+
+
+class NegativeCache:
+    """key ที่ค้นหาแล้วไม่พบ จำกัดจำนวนไว้ที่ maxsize (ลบตัวที่ไม่ได้ใช้นานที่สุดก่อน)"""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self.hits = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key):
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key):
+        """ลบ key ที่เพิ่งถูกเพิ่มข้อมูล"""
+        self._keys.pop(key, None)
+
+    def clear(self):
+        """ล้างทั้งหมดเมื่อข้อมูลถูกโหลดใหม่"""
+        self._keys.clear()
+
+
+def misses_file_for(data_file):
+    """ไฟล์สถิติที่อยู่คู่กับไฟล์ข้อมูล (part_data.json -> part_data_misses.json)"""
+    return os.path.splitext(data_file)[0] + "_misses.json"
+
+
+class MissTracker:
+    """
+    สถิติ Lot ที่ไม่มีข้อมูล แยกตาม key
+    record() นับในหน่วยความจำเท่านั้น (ถูกเรียกตอนค้นหา) การเขียนไฟล์ทำใน thread เบื้องหลัง
+    หลัง save_delay วินาที และใน close()
+    """
+
+    def __init__(self, path=None, save_delay=SAVE_DELAY_SECONDS):
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._timer = None
+        self.stats = {}    # key -> {"count", "first_seen", "last_seen", "last_lot"}
+        self._unsaved = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.stats = json.load(f)
+            except (OSError, ValueError):
+                self.stats = {}
+
+    def record(self, key, lot):
+        """บันทึกว่า Lot นี้ค้นหาไม่พบ"""
+        key = key or NO_RULE_KEY
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = self.stats[key] = {"count": 0, "first_seen": now}
+            entry["count"] += 1
+            entry["last_seen"] = now
+            entry["last_lot"] = lot
+            self._unsaved += 1
+            self._schedule_save()
+
+    def forget(self, key):
+        """ลบสถิติของ key ที่เพิ่มข้อมูลแล้ว"""
+        with self._lock:
+            if self.stats.pop(key, None) is not None:
+                self._unsaved += 1
+                self._schedule_save()
+
+    def _schedule_save(self):
+        # เรียกขณะถือ self._lock
+        if self._timer is None and self.path:
+            self._timer = threading.Timer(self.save_delay, self._save_later)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _save_later(self):
+        with self._lock:
+            self._timer = None
+        self.save()
+
+    def top(self, limit=None):
+        """รายการ (key, สถิติ) เรียงตามจำนวนครั้งมากไปน้อย แล้วตามเวลาล่าสุด"""
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda item: item[1]["last_seen"], reverse=True)
+        rows.sort(key=lambda item: item[1]["count"], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def save(self):
+        """เขียนสถิติลงไฟล์แบบ atomic ถ้ามีการเปลี่ยนแปลง"""
+        with self._save_lock:
+            with self._lock:
+                if not self.path or not self._unsaved:
+                    return
+                # คัดลอกแล้วแปลงเป็น JSON นอก lock ไม่ให้ record() ต้องรอ
+                stats = {key: dict(entry) for key, entry in self.stats.items()}
+                self._unsaved = 0
+            snapshot = json.dumps(stats, indent=2, ensure_ascii=False)
+            # ชื่อไฟล์ชั่วคราวแยกตาม process (หลายโปรแกรมอาจใช้ไฟล์สถิติเดียวกัน)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with metrics.timer("file_write_seconds", file="misses"):
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.write(snapshot)
+                    os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"Cannot save miss statistics: {e}")
+
+    def close(self):
+        """ยกเลิกการบันทึกที่รออยู่และเขียนสถิติทันที"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.save()
+
+    def export(self, path):
+        """ส่งออกสถิติเป็น CSV หรือ JSON คืนค่าจำนวนแถว"""
+        rows = self.top()
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_FIELDS)
+                for key, entry in rows:
+                    writer.writerow((key, entry["count"], entry["first_seen"],
+                                     entry["last_seen"], entry.get("last_lot", "")))
+        elif extension == ".json":
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([dict(entry, key=key) for key, entry in rows], f,
+                          indent=2, ensure_ascii=False)
+        else:
+            raise ValueError(f"Unsupported file type: {extension}")
+        return len(rows)
+
+
+def main(argv=None):
+    from data_manager import DataManager
+
+    parser = argparse.ArgumentParser(description="Lots scanned without part data")
+    parser.add_argument("--data-file", help="part_data.json or part_data.db (default: next to the program)")
+    parser.add_argument("--top", type=int, default=20, help="number of keys to show")
+    parser.add_argument("--export", help="write all statistics to CSV/JSON")
+    args = parser.parse_args(argv)
+
+    tracker = MissTracker(misses_file_for(args.data_file or DataManager.get_data_file_path()))
+    if args.export:
+        count = tracker.export(args.export)
+        print(f"Exported {count} keys to {args.export}")
+        return 0
+    for key, entry in tracker.top(args.top):
+        print(f"{key:12} {entry['count']:6}  first {entry['first_seen']}  "
+              f"last {entry['last_seen']}  ({entry.get('last_lot', '')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
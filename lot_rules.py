@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+กฎแปลงหมายเลข Lot เป็น key ของข้อมูล Part/Revision แยกตามตระกูลสินค้า
+กฎทั้งหมดถูก compile เป็น trie ตามตัวอักษรของ Lot ครั้งเดียว
+การค้นหาแต่ละครั้งอ่าน Lot ผ่านครั้งเดียวแล้วเลือกกฎที่ตรงตามลำดับที่แน่นอน:
+priority มากก่อน -> ตัวอักษรที่ระบุชัดมากก่อน -> ไม่มี * ก่อน -> ลำดับในไฟล์
+
+รูปแบบ (pattern) ของ Lot:
+    ตัวอักษรทั่วไป  ต้องตรงตัว
+    ?              ตัวอักษรใดก็ได้หนึ่งตัว
+    #              ตัวเลขหนึ่งตัว
+    @              ตัวอักษร A-Z หนึ่งตัว
+    *              (ท้ายรูปแบบเท่านั้น) ตัวอักษรที่เหลือกี่ตัวก็ได้
+
+รูปแบบ key:
+    {N}      ตัวอักษรตำแหน่ง N ของ Lot (เริ่มที่ 0)
+    {N:M}    ตัวอักษรตำแหน่ง N ถึง M-1
+    {ชื่อ}    กลุ่มที่ตั้งชื่อไว้ใน regex ของกฎ
+
+ไฟล์ lot_rules.json (ถ้ามี อยู่โฟลเดอร์เดียวกับ part_data.json) เป็นรายการกฎ เช่น
+    [{"name": "carton", "pattern": "??????*", "key": "{1:3}_{5}"},
+     {"name": "tray", "pattern": "T#####*", "key": "T_{1:3}", "priority": 10},
+     {"name": "export", "pattern": "E*", "regex": "^E(?P<line>[A-Z]{2})",
+      "key": "{line}_E", "priority": 5}]
+
+ใช้งาน:
+    python lot_rules.py QSTZ8B2206 ...    แสดงกฎและ key ของแต่ละ Lot
+"""
+
+import json
+import os
+import re
+import sys
+
+RULES_FILE = "lot_rules.json"
+
+# กฎเดิม: key = ตัวที่ 2-3 และตัวที่ 6 ของ Lot ("{digits_2_3}_{digit_6}")
+DEFAULT_RULES = [
+    {"name": "default", "pattern": "??????*", "key": "{1:3}_{5}", "priority": 0}
+]
+
+_KEY_FIELD = re.compile(r"\{(\w+)(?::(\d+))?\}")
+# ชนิดของช่องใน pattern ที่ไม่ใช่ตัวอักษรตรงตัว
+_CLASSES = {"?": "any", "#": "digit", "@": "alpha"}
+
+
+class LotRule:
+    """กฎหนึ่งข้อ: pattern, regex (ถ้ามี) และวิธีสร้าง key"""
+
+    def __init__(self, name, pattern, key, priority=0, regex=None, order=0):
+        if not pattern:
+            raise ValueError(f"Rule {name}: pattern must not be empty")
+        if "*" in pattern[:-1]:
+            raise ValueError(f"Rule {name}: '*' is only allowed at the end of the pattern")
+        self.name = name
+        self.pattern = pattern
+        self.key = key
+        self.priority = priority
+        try:
+            self.regex = re.compile(regex) if regex else None
+        except re.error as e:
+            raise ValueError(f"Rule {name}: invalid regex {regex!r}: {e}") from None
+        self.order = order
+        self.star = pattern.endswith("*")
+
+        body = pattern[:-1] if self.star else pattern
+        literals = sum(1 for char in body if char not in _CLASSES)
+        classes = sum(1 for char in body if char in ("#", "@"))
+        # ลำดับการเลือกเมื่อหลายกฎตรงกัน (ค่าน้อยชนะ)
+        self.rank = (-priority, -literals, -classes, self.star, order)
+
+        # แปลงรูปแบบ key เป็นรายการ (ข้อความ, ฟิลด์) ไว้ใช้ตอนสร้าง key
+        # และ regex ของ key ที่กฎนี้สร้างได้ (ใช้ตรวจ key ที่เพิ่มหรือนำเข้า)
+        self._parts = []
+        key_regex = []
+        shape = []
+        position = 0
+        for match in _KEY_FIELD.finditer(key):
+            literal = key[position:match.start()]
+            field, end = match.group(1), match.group(2)
+            key_regex.append(re.escape(literal))
+            shape.append(literal)
+            if field.isdigit():
+                start = int(field)
+                field = slice(start, int(end) if end else start + 1)
+                if field.stop <= field.start:
+                    raise ValueError(f"Rule {name}: empty key field {match.group(0)}")
+                if not self.star and field.stop > len(pattern):
+                    # Lot ที่ตรง pattern แบบไม่มี * ยาวเท่า pattern พอดี key นี้จึงสร้างไม่ได้เลย
+                    raise ValueError(f"Rule {name}: key field {match.group(0)} is past the end "
+                                     f"of pattern {pattern!r}")
+                key_regex.append(f".{{{field.stop - field.start}}}")
+                shape.append("?" * (field.stop - field.start))
+            elif self.regex is None or field not in self.regex.groupindex:
+                raise ValueError(f"Rule {name}: unknown key field {{{field}}}")
+            else:
+                key_regex.append(".+")
+                shape.append(f"{{{field}}}")
+            self._parts.append((literal, field))
+            position = match.end()
+        self._tail = key[position:]
+        self.key_regex = re.compile("".join(key_regex) + re.escape(self._tail))
+        # รูปแบบ key สำหรับข้อความแจ้งผู้ใช้ เช่น "??_?" หรือ "{line}_E"
+        self.key_shape = "".join(shape) + self._tail
+
+    def build_key(self, lot):
+        """สร้าง key จาก Lot คืนค่า None ถ้า regex ไม่ตรงหรือตำแหน่งเกินความยาว Lot"""
+        groups = None
+        if self.regex is not None:
+            match = self.regex.search(lot)
+            if match is None:
+                return None
+            groups = match.groupdict()
+        result = []
+        for literal, field in self._parts:
+            if isinstance(field, slice):
+                if field.stop > len(lot):
+                    return None
+                value = lot[field]
+            else:
+                value = groups.get(field)
+                if value is None:
+                    return None
+            result.append(literal)
+            result.append(value)
+        result.append(self._tail)
+        return "".join(result)
+
+    def __repr__(self):
+        return f"LotRule({self.name!r}, {self.pattern!r}, {self.key!r}, priority={self.priority})"
+
+
+def _rule_from_dict(rule, order):
+    """สร้าง LotRule จากรายการในไฟล์ raise ValueError ถ้าขาดฟิลด์หรือชนิดไม่ถูกต้อง"""
+    if not isinstance(rule, dict):
+        raise ValueError(f"Rule {order + 1}: expected an object, got {type(rule).__name__}")
+    name = rule.get("name", order + 1)
+    for field in ("name", "pattern", "key"):
+        if field not in rule:
+            raise ValueError(f"Rule {name}: missing {field!r}")
+        if not isinstance(rule[field], str) or not rule[field]:
+            raise ValueError(f"Rule {name}: {field!r} must be a non-empty string")
+    priority = rule.get("priority", 0)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise ValueError(f"Rule {name}: 'priority' must be an integer")
+    regex = rule.get("regex")
+    if regex is not None and not isinstance(regex, str):
+        raise ValueError(f"Rule {name}: 'regex' must be a string")
+    return LotRule(rule["name"], rule["pattern"], rule["key"], priority, regex, order)
+
+
+class _Node:
+    """โหนดของ trie: ทางไปต่อตามตัวอักษร/ชนิด และกฎที่จบที่โหนดนี้"""
+
+    __slots__ = ("children", "any", "digit", "alpha", "exact", "star")
+
+    def __init__(self):
+        self.children = {}
+        self.any = None
+        self.digit = None
+        self.alpha = None
+        self.exact = []    # กฎที่ Lot ต้องจบพอดีที่โหนดนี้
+        self.star = []     # กฎที่ลงท้ายด้วย * (Lot ยาวกว่านี้ได้)
+
+
+class LotRuleEngine:
+    """กฎทั้งหมดที่ compile เป็น trie แล้ว"""
+
+    def __init__(self, rules):
+        self.rules = []
+        self.root = _Node()
+        if not isinstance(rules, list) or not rules:
+            raise ValueError("Lot rules must be a non-empty list of rules")
+        for order, rule in enumerate(rules):
+            if not isinstance(rule, LotRule):
+                rule = _rule_from_dict(rule, order)
+            self.rules.append(rule)
+            self._insert(rule)
+        self._sort(self.root)
+        self.slot_layout = self._slot_layout()
+
+    def _slot_layout(self):
+        """
+        ((a, a+1, c), ความยาวขั้นต่ำ) ถ้ามีกฎเดียวแบบกฎเดิม (key = "{a:a+2}_{c}", pattern "???...*")
+        ให้ DataManager ใช้ตารางค้นหาแบบ direct-indexed (slot_table.py) ได้ ไม่งั้น None
+        """
+        if len(self.rules) != 1:
+            return None
+        rule = self.rules[0]
+        body = rule.pattern[:-1]
+        if rule.regex is not None or not rule.star or body.strip("?") or rule._tail:
+            return None
+        if [literal for literal, field in rule._parts] != ["", "_"]:
+            return None
+        pair, single = (field for literal, field in rule._parts)
+        if pair.stop - pair.start != 2 or single.stop - single.start != 1:
+            return None
+        return (pair.start, pair.start + 1, single.start), max(len(body), pair.stop, single.stop)
+
+    def _insert(self, rule):
+        node = self.root
+        body = rule.pattern[:-1] if rule.star else rule.pattern
+        for char in body:
+            kind = _CLASSES.get(char)
+            if kind is None:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+            else:
+                child = getattr(node, kind)
+                if child is None:
+                    child = _Node()
+                    setattr(node, kind, child)
+            node = child
+        (node.star if rule.star else node.exact).append(rule)
+
+    def _sort(self, node):
+        node.exact.sort(key=lambda rule: rule.rank)
+        node.star.sort(key=lambda rule: rule.rank)
+        for child in (*node.children.values(), node.any, node.digit, node.alpha):
+            if child is not None:
+                self._sort(child)
+
+    def candidates(self, lot):
+        """กฎที่ pattern ตรงกับ Lot เรียงตามลำดับการเลือก (อ่าน Lot ครั้งเดียว)"""
+        matched = []
+        active = [self.root]
+        for char in lot:
+            next_active = []
+            is_digit = "0" <= char <= "9"
+            is_alpha = "A" <= char <= "Z"
+            for node in active:
+                matched.extend(node.star)
+                child = node.children.get(char)
+                if child is not None:
+                    next_active.append(child)
+                if node.any is not None:
+                    next_active.append(node.any)
+                if is_digit and node.digit is not None:
+                    next_active.append(node.digit)
+                if is_alpha and node.alpha is not None:
+                    next_active.append(node.alpha)
+            active = next_active
+            if not active:
+                break
+        for node in active:
+            matched.extend(node.star)
+            matched.extend(node.exact)
+        matched.sort(key=lambda rule: rule.rank)
+        return matched
+
+    def explain(self, lot):
+        """กฎที่ถูกเลือกและ key ของ Lot คืนค่า (None, None) ถ้าไม่มีกฎใดตรง"""
+        for rule in self.candidates(lot):
+            key = rule.build_key(lot)
+            if key is not None:
+                return rule, key
+        return None, None
+
+    def resolve(self, lot):
+        """key ของ Lot หรือ None ถ้าไม่มีกฎใดตรง"""
+        return self.explain(lot)[1]
+
+    def accepts_key(self, key):
+        """True ถ้ามีกฎที่สร้าง key รูปแบบนี้ได้ (key ที่ไม่มีกฎใดสร้างได้จะค้นหาจาก Lot ไม่พบเลย)"""
+        return any(rule.key_regex.fullmatch(key) for rule in self.rules)
+
+    @property
+    def key_shapes(self):
+        """รูปแบบ key ของทุกกฎ (ไม่ซ้ำ ตามลำดับในไฟล์)"""
+        return list(dict.fromkeys(rule.key_shape for rule in self.rules))
+
+
+def get_rules_file_path():
+    """lot_rules.json ข้างโปรแกรม (ข้าง .exe เมื่อ build แล้ว) เหมือน DataManager.get_data_file_path()"""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, RULES_FILE)
+
+
+def load_rules(path=None):
+    """
+    โหลดกฎจากไฟล์ JSON ถ้าไม่มีไฟล์ใช้กฎเดิม (DEFAULT_RULES)
+    ไฟล์ที่ผิดรูปแบบ raise ValueError พร้อมชื่อไฟล์ ไม่ปล่อยให้ทุก Lot กลายเป็น "ไม่พบ"
+    """
+    path = path or get_rules_file_path()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                return LotRuleEngine(json.load(f))
+            except ValueError as e:
+                raise ValueError(f"Invalid {path}: {e}") from None
+    return LotRuleEngine(DEFAULT_RULES)
+
+
+_engine = None
+
+
+def get_rule_engine():
+    """กฎที่ใช้ร่วมกันทั้งโปรแกรม (โหลดครั้งแรกที่เรียก)"""
+    global _engine
+    if _engine is None:
+        _engine = load_rules()
+    return _engine
+
+
+def reload_rules(path=None):
+    """โหลดกฎใหม่หลังแก้ไฟล์ lot_rules.json"""
+    global _engine
+    _engine = load_rules(path)
+    return _engine
+
+
+if __name__ == "__main__":
+    engine = get_rule_engine()
+    for lot in sys.argv[1:]:
+        rule, key = engine.explain(lot.strip().upper())
+        print(f"{lot}: {key} ({rule.name if rule else 'no rule'})")
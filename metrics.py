@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+ตัวนับและ histogram ของเวลาในแต่ละขั้นตอน (ค้นหา, จัดรูปแบบ, พิมพ์แต่ละวิธี, เขียนไฟล์)
+เก็บในหน่วยความจำด้วย bucket คงที่ การบันทึกหนึ่งครั้งใช้เวลาไม่กี่ร้อยนาโนวินาที
+
+ส่งออกได้สองทาง (เปิดใช้ด้วย environment variable ตอนเริ่มโปรแกรม):
+    MACARTON_METRICS_PORT=9108      HTTP: /metrics (Prometheus text) และ /metrics.json
+    MACARTON_METRICS_FILE=path.json เขียนไฟล์ JSON ทุก MACARTON_METRICS_INTERVAL วินาที (ค่าเริ่มต้น 60)
+
+ใช้งาน:
+    python metrics.py metrics.json      แสดงสรุปจากไฟล์ dump
+"""
+
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+
+PREFIX = "macarton_"
+# ขอบบนของ bucket (วินาที) ตั้งแต่ 10 ไมโครวินาทีถึง 30 วินาที
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+           0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """จำนวนครั้งต่อ bucket พร้อมผลรวมและค่าสูงสุด"""
+
+    def __init__(self, bounds=BUCKETS, lock=None):
+        self.bounds = bounds
+        self._lock = lock or threading.Lock()
+        self.counts = [0] * (len(bounds) + 1)   # bucket สุดท้าย = มากกว่า bound สูงสุด
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+    def quantile(self, q):
+        """ค่าประมาณ quantile (ขอบบนของ bucket ที่ quantile อยู่ ไม่เกินค่าสูงสุดที่เคยเห็น)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                bound = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    """ตัวนับและ histogram แยกตามชื่อและ label ใช้ได้จากหลาย thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}      # (name, labels) -> จำนวน
+        self.histograms = {}    # (name, labels) -> Histogram
+        self.started = time.time()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def histogram(self, name, **labels):
+        """Histogram ของชื่อและ label นี้ เก็บไว้เรียก observe() ซ้ำในจุดที่เรียกบ่อย"""
+        key = (name, _label_key(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram(lock=self._lock))
+        return histogram
+
+    def observe(self, name, seconds, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    def timer(self, name, **labels):
+        """with registry.timer("file_write_seconds", file="journal"): ..."""
+        return _Timer(self, name, labels)
+
+    def reset(self):
+        """ล้างค่าทั้งหมด Histogram ที่เก็บไว้ใช้ (เช่น ระดับ module) ถูกล้างในตัว จึงยังบันทึกต่อได้"""
+        with self._lock:
+            self.counters.clear()
+            histograms = list(self.histograms.values())
+            self.started = time.time()
+        for histogram in histograms:
+            histogram.reset()
+
+    def snapshot(self):
+        """ค่าทั้งหมดในรูป dict (สำหรับ JSON และหน้าจอสถิติ)"""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = []
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "max": histogram.max,
+                    "p50": histogram.quantile(0.5),
+                    "p99": histogram.quantile(0.99),
+                    "buckets": dict(zip([str(bound) for bound in histogram.bounds] + ["+Inf"],
+                                        histogram.counts))
+                })
+        return {"started": self.started, "time": time.time(),
+                "counters": counters, "histograms": histograms}
+
+    def to_prometheus(self):
+        """ข้อความรูปแบบ Prometheus exposition"""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = [(key, list(h.counts), h.count, h.sum) for key, h in sorted(self.histograms.items())]
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                typed.add(name)
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+        for (name, labels), counts, count, total in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(list(BUCKETS) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{PREFIX}{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """เขียน snapshot เป็น JSON แบบ atomic"""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def format_summary(snapshot):
+    """สรุปเป็นข้อความสั้นๆ (เวลาเป็นมิลลิวินาที) สำหรับหน้าจอสถิติและ command line"""
+    lines = []
+    for row in snapshot["histograms"]:
+        name = row["name"] + _labels(tuple(row["labels"].items()))
+        if not row["count"]:
+            # histogram ที่สร้างไว้ล่วงหน้าแต่ยังไม่มีการวัด
+            lines.append(f"{name:48} n=0       p50=        -  p99=        -  max=        - ms")
+            continue
+        lines.append(f"{name:48} n={row['count']:<7} p50={row['p50'] * 1000:9.3f}  "
+                     f"p99={row['p99'] * 1000:9.3f}  max={row['max'] * 1000:9.3f} ms")
+    for row in snapshot["counters"]:
+        name = row["name"] + _labels(tuple(row["labels"].items()))
+        lines.append(f"{name:48} {row['value']}")
+    return "\n".join(lines) or "No measurements yet"
+
+
+def _label_key(labels):
+    if not labels:
+        return ()
+    if len(labels) == 1:
+        return tuple(labels.items())
+    return tuple(sorted(labels.items()))
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+# registry ที่ใช้ทั้งโปรแกรม
+REGISTRY = MetricsRegistry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+histogram = REGISTRY.histogram
+timer = REGISTRY.timer
+
+
+def serve(port, host="127.0.0.1", registry=REGISTRY):
+    """เปิด HTTP endpoint ใน background thread คืนค่า server (เรียก shutdown() เพื่อปิด)"""
+    # import เมื่อใช้เท่านั้น: http.server โหลด http.client, email และ ssl ซึ่งทำให้เปิดโปรแกรมช้าลง
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(registry.snapshot()), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+class MetricsDumper:
+    """เขียนไฟล์ JSON ทุก interval วินาที และอีกครั้งตอน stop()"""
+
+    def __init__(self, path, interval=60.0, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _write(self):
+        try:
+            self.registry.dump(self.path)
+        except OSError as e:
+            print(f"Cannot write metrics: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._write()
+
+
+_exporters = None
+
+def start_exporters():
+    """เปิด HTTP endpoint และ/หรือไฟล์ dump ตาม environment variable (เรียกซ้ำได้)"""
+    global _exporters
+    if _exporters is not None:
+        return _exporters
+    _exporters = []
+    port = os.environ.get("MACARTON_METRICS_PORT")
+    if port:
+        try:
+            _exporters.append(serve(int(port)))
+        except (OSError, ValueError) as e:
+            print(f"Cannot start metrics endpoint on port {port}: {e}")
+    path = os.environ.get("MACARTON_METRICS_FILE")
+    if path:
+        interval = os.environ.get("MACARTON_METRICS_INTERVAL", "60")
+        try:
+            interval = float(interval)
+            if not interval > 0:
+                raise ValueError(f"must be positive, got {interval}")
+        except ValueError as e:
+            print(f"Invalid MACARTON_METRICS_INTERVAL {interval!r} ({e}), using 60 seconds")
+            interval = 60.0
+        dumper = MetricsDumper(path, interval)
+        atexit.register(dumper.stop)
+        _exporters.append(dumper)
+    return _exporters
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize a metrics dump file")
+    parser.add_argument("file", help="JSON written by MACARTON_METRICS_FILE")
+    args = parser.parse_args(argv)
+    with open(args.file, "r", encoding="utf-8") as f:
+        print(format_summary(json.load(f)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
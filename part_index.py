@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+ดัชนีสำหรับค้นหาข้อมูล Part และ Revision
+- รายการ key เรียงลำดับ สำหรับค้นหาด้วย prefix ของ key
+- inverted index ของคำใน part, revision และ description สำหรับค้นหาด้วย prefix ของคำ
+"""
+
+import bisect
+import re
+
+_TOKEN_PATTERN = re.compile(r"[A-Z0-9]+")
+
+
+def tokenize(text, whole=False):
+    """แยกข้อความเป็นคำตัวพิมพ์ใหญ่ ถ้า whole=True จะรวมข้อความเต็มด้วย (เช่น "REV.04", "REV", "04")"""
+    text = (text or "").strip().upper()
+    if not text:
+        return set()
+    tokens = set(_TOKEN_PATTERN.findall(text))
+    if whole:
+        tokens.add(text)
+    return tokens
+
+
+def _row_tokens(value):
+    return (tokenize(value.get("part"), whole=True)
+            | tokenize(value.get("revision"), whole=True)
+            | tokenize(value.get("description")))
+
+
+class PartIndex:
+    """ดัชนีที่อัปเดตตามการเพิ่ม/แก้ไข/ลบของ DataManager"""
+
+    def __init__(self, data=None):
+        self.keys = []          # key ทั้งหมดเรียงลำดับ
+        self.tokens = []        # คำทั้งหมดเรียงลำดับ
+        self.postings = {}      # คำ -> set ของ key
+        self.row_tokens = {}    # key -> คำของแถวนั้น (ใช้ตอนลบ)
+        if data:
+            self.build(data)
+
+    def build(self, data):
+        """สร้างดัชนีใหม่จากข้อมูลทั้งหมด"""
+        self.keys = sorted(data)
+        self.postings = {}
+        self.row_tokens = {}
+        for key, value in data.items():
+            tokens = _row_tokens(value)
+            self.row_tokens[key] = tokens
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(key)
+        self.tokens = sorted(self.postings)
+
+    def add(self, key, value):
+        """เพิ่มหรืออัปเดตแถวในดัชนี"""
+        if key in self.row_tokens:
+            self.remove(key)
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        tokens = _row_tokens(value)
+        self.row_tokens[key] = tokens
+        for token in tokens:
+            keys = self.postings.get(token)
+            if keys is None:
+                keys = self.postings[token] = set()
+                bisect.insort(self.tokens, token)
+            keys.add(key)
+
+    def remove(self, key):
+        tokens = self.row_tokens.pop(key, None)
+        if tokens is None:
+            return
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+        for token in tokens:
+            keys = self.postings[token]
+            keys.discard(key)
+            if not keys:
+                del self.postings[token]
+                del self.tokens[bisect.bisect_left(self.tokens, token)]
+
+    @staticmethod
+    def _prefix_range(items, prefix):
+        start = bisect.bisect_left(items, prefix)
+        end = start
+        while end < len(items) and items[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def _match_word(self, word):
+        """key ที่ key ขึ้นต้นด้วย word หรือมีคำที่ขึ้นต้นด้วย word"""
+        start, end = self._prefix_range(self.keys, word)
+        result = set(self.keys[start:end])
+        start, end = self._prefix_range(self.tokens, word)
+        for token in self.tokens[start:end]:
+            result |= self.postings[token]
+        return result
+
+    def search(self, query):
+        """ค้นหาด้วยทุกคำใน query (AND) คืนค่า list ของ key เรียงลำดับ"""
+        words = (query or "").upper().split()
+        if not words:
+            return list(self.keys)
+        result = None
+        for word in words:
+            matched = self._match_word(word)
+            result = matched if result is None else result & matched
+            if not result:
+                return []
+        return sorted(result)
+
+    def matches(self, key, query):
+        """ตรวจสอบว่าแถวเดียวตรงกับ query หรือไม่ (ใช้ตอนอัปเดตตาราง)"""
+        tokens = self.row_tokens.get(key)
+        if tokens is None:
+            return False
+        for word in (query or "").upper().split():
+            if not key.startswith(word) and not any(token.startswith(word) for token in tokens):
+                return False
+        return True
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+ที่เก็บข้อมูล Part/Revision แบบ snapshot + write-ahead log
+การแก้ไขแต่ละครั้งจะต่อท้าย log แทนการเขียน part_data.json ใหม่ทั้งไฟล์
+และรวม log เข้า snapshot เป็นระยะ (compaction) ด้วยการเขียนไฟล์ชั่วคราวแล้ว rename
+"""
+
+import json
+import os
+import metrics
+
+
+class AppendLogStorage:
+    """จัดการไฟล์ snapshot (part_data.json) และไฟล์ log (part_data.json.log)"""
+
+    # จำนวน log ขั้นต่ำก่อนจะ compact (ถ้าตารางใหญ่กว่านี้จะรอจน log ยาวเท่าตาราง)
+    COMPACT_MIN_ENTRIES = 1000
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.log_file = data_file + ".log"
+        self.log_entries = 0
+
+    def load(self):
+        """อ่าน snapshot แล้ว replay log ทับ คืนค่า dict ของข้อมูลทั้งหมด"""
+        try:
+            with open(self.data_file, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+
+        self.log_entries = 0
+        try:
+            with open(self.log_file, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return data
+
+        good_offset = 0
+        for line in content.splitlines(keepends=True):
+            # บรรทัดสุดท้ายที่ไม่มี newline คือการเขียนที่ถูกตัดกลางคัน ให้ทิ้งไป
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            self._apply(data, record)
+            self.log_entries += 1
+            good_offset += len(line)
+
+        if good_offset != len(content):
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(good_offset)
+        return data
+
+    @staticmethod
+    def _apply(data, record):
+        if record["op"] == "set":
+            data[record["key"]] = record["value"]
+        elif record["op"] == "del":
+            data.pop(record["key"], None)
+
+    def append(self, records):
+        """ต่อท้าย log ด้วยรายการแก้ไขทั้งหมดในการเขียนครั้งเดียว"""
+        if not records:
+            return
+        payload = "".join(json.dumps(record) + "\n" for record in records)
+        with metrics.timer("file_write_seconds", file="part_log"), open(self.log_file, 'a') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.log_entries += len(records)
+
+    def needs_compaction(self, table_size):
+        return self.log_entries >= max(self.COMPACT_MIN_ENTRIES, table_size)
+
+    def write_snapshot(self, data):
+        """เขียน snapshot แบบ atomic แล้วล้าง log"""
+        tmp_file = self.data_file + ".tmp"
+        with metrics.timer("file_write_seconds", file="part_snapshot"):
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.data_file)
+        # ถ้าโปรแกรมหยุดก่อนลบ log การ replay ซ้ำก็ยังได้ผลเหมือนเดิม เพราะทุก record เป็นค่าสุดท้าย
+        try:
+            os.remove(self.log_file)
+        except OSError:
+            pass
+        self.log_entries = 0
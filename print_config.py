@@ -5,10 +5,32 @@
 กำหนดขนาดกระดาษ ตำแหน่งข้อความ และการจัดรูปแบบ
 """
 
+from datetime import date, datetime
+from functools import lru_cache
+from string import Formatter
+from time import perf_counter
+from label_barcode import code39_text, native_command
+
 class PrinterConfig:
     """คลาสสำหรับตั้งค่าเครื่องปริ้น"""
     PRINTER_NAME = "MACarton"
     PRINTER_MODEL = "generic"
+    # ส่งข้อมูลตรงไปยังเครื่องพิมพ์โดยไม่สร้างไฟล์ (ว่าง = ไม่ใช้)
+    # เช่น "socket://192.168.1.50:9100" (JetDirect), "device:///dev/usb/lp0", "lp://MACarton"
+    DEVICE_URI = ""
+    # เครื่องพิมพ์ทั้งหมดของสถานี ชื่อ -> DEVICE_URI ของเครื่องนั้น ("" = ส่งผ่าน spooler/lp ตามชื่อ)
+    # ว่าง = ใช้ PRINTER_NAME และ DEVICE_URI เครื่องเดียว งานพิมพ์จะถูกกระจายไปเครื่องที่คิวสั้นที่สุด
+    # เช่น {"MACarton": "", "MACarton-2": "socket://192.168.1.51:9100"}
+    PRINTERS = {}
+    ENCODING = "utf-8"
+    # ภาษาคำสั่งของเครื่องพิมพ์: "text" (ข้อความธรรมดา), "zpl", "epl" หรือ "tspl"
+    # ถ้าไม่ใช่ "text" การพิมพ์แบบ raw จะส่งเฉพาะค่าของฟิลด์ไปยังฟอร์มที่เก็บไว้ในเครื่องพิมพ์
+    LANGUAGE = "text"
+    DPI = 203
+    # บาร์โค้ดของ Lot บนป้ายภาษาเครื่องพิมพ์: "code128" หรือ "code39"
+    BARCODE = "code128"
+    # ใส่ check digit (mod 43) ในบาร์โค้ด Code39 ของป้ายข้อความ
+    BARCODE_CHECK_DIGIT = False
 
 class PaperConfig:
     """คลาสสำหรับตั้งค่าขนาดและประเภทกระดาษ"""
@@ -23,20 +45,158 @@ class PaperConfig:
         "landscape": "แนวนอน"      # แนวนอน
     }
 
+class ScanConfig:
+    """คลาสสำหรับตั้งค่าการกันสแกนซ้ำ"""
+    # สแกน Lot เดิมซ้ำภายในกี่วินาทีถือว่าเป็นการสแกนซ้ำ (ไม่พิมพ์)
+    DUPLICATE_WINDOW_SECONDS = 5
+    # เตือนเมื่อสแกน Lot ที่เคยสแกนแล้วในกะเดียวกัน (จำไว้ในไฟล์ Bloom filter)
+    SHIFT_DEDUP = False
+    SHIFT_STARTS = ("06:00", "14:00", "22:00")
+
 class LabelFormat:
     """คลาสสำหรับรูปแบบป้ายกำกับ Lot Scanner"""
     
+    # ฟิลด์ที่ใช้ใน "lines" ได้: lot, part, revision, rev (แบบสั้น), barcode,
+    # date (dd/mm/yy), time (HH:MM), datetime (เวลาเต็มตามที่สแกน)
     LAYOUT_TEMPLATES = {
         "macarton_label": {
             "name": "รูปแบบ MACarton",
             "description": "ป้ายกำกับขนาด 9x4 ซม. ตามรูปแบบ MACarton",
-            "format": "custom"
+            "format": "custom",
+            # รูปแบบแนวนอนขนาดเล็กสำหรับ 95x46mm (ประมาณ 30 ตัวอักษรต่อบรรทัด)
+            "lines": [
+                "{part}",
+                "{lot}",
+                "{barcode}",
+                "{date} {time} {rev}"
+            ]
+        },
+        "lot_record": {
+            "name": "รายการ Lot",
+            "description": "บันทึก Lot, Part, Revision และเวลาแบบเต็ม",
+            "format": "custom",
+            "lines": [
+                "Lot: {lot}",
+                "Part: {part}",
+                "Revision: {revision}",
+                "Time: {datetime}"
+            ]
         }
     }
 
+@lru_cache(maxsize=1024)
+def _format_datetime(time):
+    """แยก "YYYY-MM-DD HH:MM:SS" เป็นวันที่ (dd/mm/yy) และเวลา (HH:MM)"""
+    datetime_parts = time.split()
+    date_part = datetime_parts[0] if len(datetime_parts) > 0 else ""
+    time_part = datetime_parts[1] if len(datetime_parts) > 1 else ""
+    
+    # จัดรูปแบบวันที่ (เช่น 05/08/25)
+    if len(date_part) == 10 and date_part[4] == "-" and date_part[7] == "-" \
+            and date_part.replace("-", "").isdigit():
+        # รูปแบบมาตรฐาน ตรวจสอบด้วย date.fromisoformat ซึ่งเร็วกว่า strptime
+        try:
+            date.fromisoformat(date_part)
+            date_display = f"{date_part[8:10]}/{date_part[5:7]}/{date_part[2:4]}"
+        except ValueError:
+            date_display = date_part
+    elif date_part:
+        try:
+            date_display = datetime.strptime(date_part, "%Y-%m-%d").strftime("%d/%m/%y")
+        except ValueError:
+            date_display = date_part
+    else:
+        date_display = ""
+    
+    # จัดรูปแบบเวลา (เช่น 14:58) แสดงแค่ ชม:นาที
+    return date_display, time_part[:5]
+
+@lru_cache(maxsize=256)
+def _format_rev(rev):
+    """แสดง Revision แบบสั้น (REV.B -> B)"""
+    if rev and rev.strip():
+        if "REV." in rev.upper():
+            return rev.upper().replace("REV.", "")
+        return rev
+    return ""
+
+@lru_cache(maxsize=1024)
+def _code39(lot, check_digit):
+    # ข้อความ Code39 สำหรับฟอนต์บาร์โค้ด (ถ้ามีตัวอักษรที่ Code39 ไม่รองรับ พิมพ์ตามเดิม)
+    try:
+        return code39_text(lot, check_digit)
+    except ValueError:
+        return f"*{lot}*"
+
+def _barcode(lot):
+    # อ่าน BARCODE_CHECK_DIGIT ทุกครั้ง ค่าใน cache แยกตามการตั้งค่า
+    return _code39(lot, PrinterConfig.BARCODE_CHECK_DIGIT)
+
+# ฟิลด์ที่ใช้ในเทมเพลต: ชื่อฟิลด์ -> นิพจน์ Python ที่ใช้ตัวแปร lot, part, rev, time
+# (_dt คือผลของ _format_datetime(time) ซึ่งคำนวณครั้งเดียวต่อป้าย)
+FIELD_EXPRESSIONS = {
+    "lot": "lot",
+    "part": "part",
+    "revision": "rev",
+    "datetime": "time",
+    "rev": "_format_rev(rev)",
+    "barcode": "_barcode(lot)",
+    "date": "_dt[0]",
+    "time": "_dt[1]"
+}
+
+class CompiledTemplate:
+    """เทมเพลตที่ compile เป็นฟังก์ชัน render(lot, part, rev, time) ครั้งเดียว"""
+    
+    def __init__(self, name, lines):
+        self.name = name
+        self.pattern = "\n".join(lines)
+        
+        # แปลง "{part}\n{lot}..." เป็น f-string ที่อ้างถึงนิพจน์ของแต่ละฟิลด์
+        body = ""
+        uses_datetime = False
+        for literal, field, spec, conversion in Formatter().parse(self.pattern):
+            body += literal.replace("{", "{{").replace("}", "}}")
+            if field is None:
+                continue
+            if field not in FIELD_EXPRESSIONS:
+                raise ValueError(f"Unknown field {{{field}}} in template {name}")
+            uses_datetime = uses_datetime or field in ("date", "time")
+            body += "{" + FIELD_EXPRESSIONS[field]
+            body += f"!{conversion}" if conversion else ""
+            body += f":{spec}" if spec else ""
+            body += "}"
+        
+        source = "def render(lot, part, rev, time):\n"
+        if uses_datetime:
+            source += "    _dt = _format_datetime(time)\n"
+        source += f"    return f{body!r}\n"
+        namespace = {"_format_datetime": _format_datetime,
+                     "_format_rev": _format_rev,
+                     "_barcode": _barcode}
+        exec(compile(source, f"<template {name}>", "exec"), namespace)
+        self.source = source
+        self.render = namespace["render"]
+    
+    def render_batch(self, records):
+        """จัดรูปแบบหลายป้าย records = [(lot, part, rev, time), ...]"""
+        render = self.render
+        return [render(lot, part, rev, time) for lot, part, rev, time in records]
+
+_compiled_templates = {}
+
+def get_template(template="macarton_label"):
+    """คืนค่าเทมเพลตที่ compile แล้ว (compile ครั้งเดียวต่อเทมเพลต) ชื่อที่ไม่รู้จักใช้ macarton_label"""
+    compiled = _compiled_templates.get(template)
+    if compiled is None:
+        name = template if template in LabelFormat.LAYOUT_TEMPLATES else "macarton_label"
+        compiled = CompiledTemplate(name, LabelFormat.LAYOUT_TEMPLATES[name]["lines"])
+        _compiled_templates[template] = compiled
+    return compiled
+
 def format_label_text(lot, part, rev, time, template="macarton_label"):
     """
-    จัดรูปแบบข้อความตามเทมเพลต MACarton สำหรับกระดาษขนาด 95x46mm
+    จัดรูปแบบข้อความตามเทมเพลตใน LabelFormat.LAYOUT_TEMPLATES
     
     Args:
         lot (str): หมายเลข Lot
@@ -48,49 +208,160 @@ def format_label_text(lot, part, rev, time, template="macarton_label"):
     Returns:
         str: ข้อความที่จัดรูปแบบแล้ว
     """
-    # แยกวันที่และเวลา
-    datetime_parts = time.split()
-    date_part = datetime_parts[0] if len(datetime_parts) > 0 else ""
-    time_part = datetime_parts[1] if len(datetime_parts) > 1 else ""
+    return get_template(template).render(lot, part, rev, time)
+
+def render_labels(records, template="macarton_label"):
+    """
+    จัดรูปแบบป้ายหลายใบในครั้งเดียว
     
-    # จัดรูปแบบวันที่ (เช่น 05/08/25)
-    if date_part:
-        try:
-            from datetime import datetime
-            date_obj = datetime.strptime(date_part, "%Y-%m-%d")
-            date_display = date_obj.strftime("%d/%m/%y")
-        except:
-            date_display = date_part
-    else:
-        date_display = ""
+    Args:
+        records (list): รายการ (lot, part, rev, time)
+        template (str): ชื่อเทมเพลต
     
-    # จัดรูปแบบเวลา (เช่น 14:58)
-    if time_part:
-        time_display = time_part[:5]  # แสดงแค่ ชม:นาที
-    else:
-        time_display = ""
+    Returns:
+        list: ข้อความป้ายแต่ละใบ
+    """
+    return get_template(template).render_batch(records)
+
+def benchmark_render(count=100000, template="macarton_label"):
+    """
+    วัดเวลาจัดรูปแบบป้ายต่อใบ (ไมโครวินาที) ทั้งแบบทีละใบและแบบ batch
     
-    # แสดง Revision แบบสั้น
-    if rev and rev.strip():
-        if "REV." in rev.upper():
-            rev_display = rev.upper().replace("REV.", "")
-        else:
-            rev_display = rev
-    else:
-        rev_display = ""
+    Args:
+        count (int): จำนวนป้าย
+        template (str): ชื่อเทมเพลต
+    
+    Returns:
+        dict: ผลการวัด
+    """
+    records = [(f"Q{i % 100:02d}Z8B{i:04d}", "D3022A", "REV.B",
+                f"2025-01-15 14:{i // 60 % 60:02d}:{i % 60:02d}") for i in range(count)]
+    
+    start = perf_counter()
+    for lot, part, rev, time in records:
+        format_label_text(lot, part, rev, time, template)
+    single = perf_counter() - start
+    
+    start = perf_counter()
+    render_labels(records, template)
+    batch = perf_counter() - start
+    
+    return {
+        "labels": count,
+        "single_us_per_label": single / count * 1e6,
+        "batch_us_per_label": batch / count * 1e6
+    }
+
+# ชื่อฟอร์มที่เก็บไว้ในหน่วยความจำ flash ของเครื่องพิมพ์
+STORED_FORMAT_NAME = "MACARTON"
+
+def _label_dots(paper_size="Label"):
+    """ขนาดป้ายเป็นจุด (dots) ตามความละเอียดของเครื่องพิมพ์"""
+    paper = PaperConfig.PAPER_SIZES.get(paper_size, PaperConfig.PAPER_SIZES["Label"])
+    dots_per_mm = PrinterConfig.DPI / 25.4
+    return round(paper["width"] * dots_per_mm), round(paper["height"] * dots_per_mm)
+
+@lru_cache(maxsize=None)
+def get_native_format(language="zpl", paper_size="Label"):
+    """
+    สร้างคำสั่งเก็บฟอร์มป้าย (ส่วนที่ไม่เปลี่ยน) ไว้ในเครื่องพิมพ์ ส่งครั้งเดียวต่อเครื่องพิมพ์
+    ตำแหน่งเหมือนป้ายข้อความ: Part, Lot, บาร์โค้ดของ Lot (PrinterConfig.BARCODE), วันที่ เวลา Revision
     
-    # สร้างบาร์โค้ดแบบง่าย
-    barcode = f"*{lot}*"
+    Args:
+        language (str): "zpl", "epl" หรือ "tspl"
+        paper_size (str): ขนาดกระดาษ
     
-    # รูปแบบแนวนอนขนาดเล็กสำหรับ 95x46mm (ประมาณ 30 ตัวอักษรต่อบรรทัด)
-    label_text = f"""{part}
-{lot}
-{barcode}
-{date_display} {time_display} {rev_display}"""
+    Returns:
+        str: คำสั่งของเครื่องพิมพ์
+    """
+    width, height = _label_dots(paper_size)
+    paper = PaperConfig.PAPER_SIZES.get(paper_size, PaperConfig.PAPER_SIZES["Label"])
+    name = STORED_FORMAT_NAME
+    barcode = native_command(language, 24, 112, 120, 2, PrinterConfig.BARCODE)
     
-    return label_text
+    if language == "zpl":
+        return (
+            f"^XA\n^DFE:{name}.ZPL^FS\n"
+            f"^PW{width}\n^LL{height}\n^CI28\n"
+            f"^FO24,16^A0N,48,48^FN1^FS\n"
+            f"^FO24,72^A0N,32,32^FN2^FS\n"
+            f"{barcode}^FN3^FS\n"
+            f"^FO24,256^A0N,32,32^FN4^FS\n"
+            f"^XZ\n"
+        )
+    if language == "epl":
+        return (
+            f"q{width}\nQ{height},24\n"
+            f'FK"{name}"\nFS"{name}"\n'
+            f'V00,30,N,"Part"\nV01,30,N,"Lot"\nV02,40,N,"Footer"\n'
+            f"N\n"
+            f"A24,16,0,4,1,1,N,V00\n"
+            f"A24,72,0,3,1,1,N,V01\n"
+            f"{barcode}V01\n"
+            f"A24,256,0,3,1,1,N,V02\n"
+            f"FE\n"
+        )
+    if language == "tspl":
+        return (
+            f"SIZE {paper['width']} mm,{paper['height']} mm\nGAP 2 mm,0 mm\n"
+            f'DOWNLOAD F,"{name}.BAS"\n'
+            f"CLS\n"
+            f'TEXT 24,16,"4",0,1,1,PART$\n'
+            f'TEXT 24,72,"3",0,1,1,LOT$\n'
+            f"{barcode}LOT$\n"
+            f'TEXT 24,256,"3",0,1,1,FOOTER$\n'
+            f"PRINT 1\n"
+            f"EOP\n"
+        )
+    raise ValueError(f"Unsupported printer language: {language}")
+
+def _native_value(value, language):
+    """ตัดอักขระที่เป็นคำสั่งของภาษาเครื่องพิมพ์ออกจากค่าของฟิลด์"""
+    value = str(value or "").replace("\n", " ").replace("\r", " ")
+    if language == "zpl":
+        return value.replace("^", " ").replace("~", " ")
+    if language == "tspl":
+        return value.replace('"', "'")
+    return value
 
-def get_print_command(filename, config_name="normal", paper_size="Label"):
+def format_label_native(lot, part, rev, time, language="zpl"):
+    """
+    สร้างงานพิมพ์ที่ส่งเฉพาะค่าของฟิลด์ไปยังฟอร์มที่เก็บไว้ด้วย get_native_format
+    
+    Args:
+        lot (str): หมายเลข Lot
+        part (str): หมายเลขชิ้นส่วน
+        rev (str): เลขรุ่น
+        time (str): เวลาที่สแกน
+        language (str): "zpl", "epl" หรือ "tspl"
+    
+    Returns:
+        str: คำสั่งของเครื่องพิมพ์
+    """
+    date_display, time_display = _format_datetime(time)
+    footer = _native_value(f"{date_display} {time_display} {_format_rev(rev)}", language)
+    part = _native_value(part, language)
+    lot = _native_value(lot, language)
+    name = STORED_FORMAT_NAME
+    
+    if language == "zpl":
+        return (f"^XA^XFE:{name}.ZPL^FS"
+                f"^FN1^FD{part}^FS^FN2^FD{lot}^FS^FN3^FD{lot}^FS^FN4^FD{footer}^FS^XZ\n")
+    if language == "epl":
+        return f'FR"{name}"\n?\n{part}\n{lot}\n{footer}\nP1\n'
+    if language == "tspl":
+        return f'PART$="{part}"\nLOT$="{lot}"\nFOOTER$="{footer}"\n{name}\n'
+    raise ValueError(f"Unsupported printer language: {language}")
+
+def get_printers():
+    """เครื่องพิมพ์ของสถานี {ชื่อ: DEVICE_URI} ตาม PrinterConfig.PRINTERS (หรือเครื่องเดียวตามค่าเดิม)"""
+    return dict(PrinterConfig.PRINTERS) or {PrinterConfig.PRINTER_NAME: PrinterConfig.DEVICE_URI}
+
+def get_device_uri(printer):
+    """DEVICE_URI ของเครื่องพิมพ์ ("" ถ้าไม่ได้ตั้งไว้)"""
+    return get_printers().get(printer, "")
+
+def get_print_command(filename, config_name="normal", paper_size="Label", printer=None):
     """
     สร้างคำสั่งสำหรับการพิมพ์ตามการตั้งค่า MACarton
     
@@ -98,22 +369,42 @@ def get_print_command(filename, config_name="normal", paper_size="Label"):
         filename (str): ชื่อไฟล์ที่จะพิมพ์
         config_name (str): ชื่อการตั้งค่า
         paper_size (str): ขนาดกระดาษ
+        printer (str): ชื่อเครื่องพิมพ์ (ค่าเริ่มต้น PrinterConfig.PRINTER_NAME)
     
     Returns:
         str: คำสั่งสำหรับการพิมพ์
     """
     import platform
-    printer = PrinterConfig.PRINTER_NAME
+    printer = printer or PrinterConfig.PRINTER_NAME
     
     if platform.system().lower() == 'windows':
         # คำสั่งสำหรับ Windows - ใช้ print หรือ copy to printer port
         command = f'print /D:"{printer}" "{filename}"'
     else:
         # คำสั่งสำหรับ Linux/Unix - ใช้ lp
-        command = f"lp -d {printer} -o media=custom.90x40mm -o orientation-requested=4 -o font=Times-New-Roman -o cpi=12 -o lpi=6 -o page-top=0 -o page-bottom=0 -o page-left=0 -o page-right=0 {filename}"
+        command = " ".join(get_lp_args(printer, paper_size) + [filename])
     
     return command
 
+def get_lp_args(printer=None, paper_size="Label"):
+    """
+    สร้างคำสั่ง lp (ไม่มีชื่อไฟล์ lp จะอ่านข้อมูลจาก stdin)
+    
+    Args:
+        printer (str): ชื่อเครื่องพิมพ์
+        paper_size (str): ขนาดกระดาษ
+    
+    Returns:
+        list: คำสั่งและ option ของ lp
+    """
+    printer = printer or PrinterConfig.PRINTER_NAME
+    paper = PaperConfig.PAPER_SIZES.get(paper_size, PaperConfig.PAPER_SIZES["Label"])
+    return ["lp", "-d", printer,
+            "-o", f"media=custom.{paper['width']}x{paper['height']}mm",
+            "-o", "orientation-requested=4", "-o", "font=Times-New-Roman",
+            "-o", "cpi=12", "-o", "lpi=6",
+            "-o", "page-top=0", "-o", "page-bottom=0", "-o", "page-left=0", "-o", "page-right=0"]
+
 def get_paper_settings(paper_size="Label", orientation="landscape"):
     """
     ดึงการตั้งค่ากระดาษ
@@ -153,3 +444,16 @@ if __name__ == "__main__":
     # ทดสอบคำสั่งพิมพ์
     print("\nคำสั่งพิมพ์:")
     print(get_print_command("test.txt", "normal"))
+    
+    # ทดสอบคำสั่งภาษาเครื่องพิมพ์ (ZPL)
+    print("\nฟอร์ม ZPL (ส่งครั้งเดียว):")
+    print(get_native_format("zpl"))
+    print("งานพิมพ์ ZPL ต่อป้าย:")
+    print(format_label_native("QSTZ8B2206", "D3022A", "B", "2025-01-15 14:58:25", "zpl"))
+    
+    # วัดความเร็วการจัดรูปแบบป้าย
+    print("\nเวลาจัดรูปแบบป้าย:")
+    result = benchmark_render()
+    print(f"{result['labels']} labels: "
+          f"{result['single_us_per_label']:.2f} us/label (single), "
+          f"{result['batch_us_per_label']:.2f} us/label (batch)")
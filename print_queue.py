@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+คิวงานพิมพ์ที่ทำงานใน background thread
+หน้าจอสแกนส่งงานเข้าคิวแล้วกลับไปรับการสแกนต่อได้ทันที
+ผลการพิมพ์ถูกเก็บไว้ให้หน้าจอดึงไปแสดงผ่าน root.after (Tk ต้องถูกเรียกจาก main thread เท่านั้น)
+"""
+
+import functools
+import queue
+import threading
+import time
+
+
+class PrintJob:
+    """งานพิมพ์ป้ายหนึ่งใบ พร้อมเวลาที่ใช้ในแต่ละช่วง
+    fields = (lot, part, rev, time) ใช้สร้างคำสั่งภาษาเครื่องพิมพ์ (ZPL/EPL/TSPL)
+    """
+
+    def __init__(self, lot, text, fields=None):
+        self.lot = lot
+        self.text = text
+        self.fields = fields
+        # เครื่องพิมพ์ที่พิมพ์งานนี้ และเครื่องที่เคยพิมพ์ไม่สำเร็จ (ดู printer_pool.py)
+        self.printer = None
+        self.failed_printers = []
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+
+    @property
+    def wait_ms(self):
+        """เวลาที่รอในคิว"""
+        if self.started_at is None:
+            return None
+        return (self.started_at - self.submitted_at) * 1000
+
+    @property
+    def latency_ms(self):
+        """เวลาตั้งแต่ส่งเข้าคิวจนพิมพ์เสร็จ"""
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.submitted_at) * 1000
+
+
+class PrintQueue:
+    """
+    คิวงานพิมพ์แบบจำกัดขนาด และ worker thread หนึ่งตัว (print_func ค่าเริ่มต้นคือ printing.print_label)
+    ถ้าระบุ printer งานในคิวนี้จะถูกส่งไปเครื่องพิมพ์นั้น
+    """
+
+    def __init__(self, print_func=None, maxsize=50, printer=None, manual_fallback=True):
+        self.print_func = print_func
+        self.printer = printer
+        # False: print_label ไม่บันทึกไฟล์ไว้พิมพ์เองเมื่อพิมพ์ไม่สำเร็จ (ใช้ใน PrinterPool)
+        self.manual_fallback = manual_fallback
+        self.jobs = queue.Queue(maxsize)
+        self.results = queue.Queue()
+        self.busy = False
+        self.completed = 0
+        self.failed = 0
+        self.worker = threading.Thread(target=self._run, daemon=True,
+                                       name=f"print-worker-{printer}" if printer else "print-worker")
+        self.worker.start()
+
+    @property
+    def depth(self):
+        """จำนวนงานที่ยังพิมพ์ไม่เสร็จ (รวมงานที่กำลังพิมพ์)"""
+        return self.jobs.qsize() + (1 if self.busy else 0)
+
+    def submit(self, job):
+        """ส่งงานเข้าคิว คืนค่า False ถ้าคิวเต็ม"""
+        try:
+            self.jobs.put_nowait(job)
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        # import โมดูลการพิมพ์ใน worker thread เพื่อไม่ให้หน่วงการเปิดหน้าต่าง
+        from printing import PrintResult, print_label
+        if self.print_func is None:
+            self.print_func = print_label
+            if not self.manual_fallback:
+                self.print_func = functools.partial(print_label, manual_fallback=False)
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            self.busy = True
+            job.started_at = time.perf_counter()
+            try:
+                if self.printer is None:
+                    job.result = self.print_func(job.text, fields=job.fields)
+                else:
+                    job.printer = self.printer
+                    job.result = self.print_func(job.text, printer=self.printer, fields=job.fields)
+            except Exception as e:
+                job.result = PrintResult(False, None, "Error", f"Print failed: {str(e)}")
+            job.finished_at = time.perf_counter()
+            if job.result.success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            # ส่งผลก่อนล้าง busy เพื่อไม่ให้มีช่วงที่ทั้งคิวว่างและยังไม่มีผล (ดู ScanService.drain)
+            self.results.put(job)
+            self.busy = False
+
+    def poll_results(self):
+        """ดึงงานที่พิมพ์เสร็จแล้วทั้งหมด (เรียกจาก main thread)"""
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def take_pending(self):
+        """นำงานที่ยังไม่เริ่มพิมพ์ออกจากคิวทั้งหมด (ใช้ย้ายงานไปเครื่องพิมพ์อื่น)"""
+        pending = []
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # คำสั่งหยุด worker ต้องอยู่ในคิวต่อ
+                self.jobs.put(None)
+                break
+            pending.append(job)
+        return pending
+
+    def stop(self, timeout=5.0):
+        """รอให้งานที่ค้างอยู่พิมพ์เสร็จแล้วหยุด worker"""
+        self.jobs.put(None)
+        self.worker.join(timeout)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Raw printing แบบเปิด connection กับเครื่องพิมพ์ค้างไว้
+- ชื่อเครื่องพิมพ์ Windows: เปิด handle ด้วย win32print ครั้งเดียวแล้วใช้ซ้ำ
+- socket://host:9100: เปิด TCP connection ค้างไว้ และต่อใหม่อัตโนมัติเมื่อหลุด
+- รายชื่อเครื่องพิมพ์ถูก cache ไว้ตามเวลา (TTL) ไม่ต้องค้นหาใหม่ทุกครั้งที่กดปุ่ม
+"""
+
+import platform
+import select
+import socket
+import subprocess
+import threading
+import time
+from urllib.parse import urlsplit
+from print_config import PrinterConfig
+from raw_printer import JETDIRECT_PORT, open_printer
+
+try:
+    import win32print
+except ImportError:
+    win32print = None
+
+# ตรวจสุขภาพ connection ที่ไม่ได้ใช้นานเกินเวลานี้ก่อนส่งงาน
+HEALTH_CHECK_SECONDS = 30
+# อายุของรายชื่อเครื่องพิมพ์ที่ cache ไว้
+PRINTER_LIST_TTL = 60
+
+
+class Win32PrinterSession:
+    """handle ของเครื่องพิมพ์ Windows ที่เปิดค้างไว้"""
+
+    CHECK_EVERY_SEND = False
+
+    UNHEALTHY_STATUS = 0x00000002 | 0x00000080    # PRINTER_STATUS_ERROR | PRINTER_STATUS_OFFLINE
+
+    def __init__(self, name):
+        self.name = name
+        self.handle = None
+
+    def open(self):
+        self.handle = win32print.OpenPrinter(self.name)
+
+    def close(self):
+        if self.handle is not None:
+            try:
+                win32print.ClosePrinter(self.handle)
+            except Exception:
+                pass
+            self.handle = None
+
+    def is_healthy(self):
+        try:
+            status = win32print.GetPrinter(self.handle, 2)["Status"]
+        except Exception:
+            return False
+        return not status & self.UNHEALTHY_STATUS
+
+    def send(self, data, doc_name):
+        win32print.StartDocPrinter(self.handle, 1, (doc_name, None, "RAW"))
+        try:
+            win32print.StartPagePrinter(self.handle)
+            win32print.WritePrinter(self.handle, data)
+            win32print.EndPagePrinter(self.handle)
+        finally:
+            win32print.EndDocPrinter(self.handle)
+
+
+class SocketPrinterSession:
+    """TCP connection ไปยังเครื่องพิมพ์ port 9100 ที่เปิดค้างไว้"""
+
+    # ตรวจด้วย select() ได้เร็ว จึงตรวจก่อนส่งทุกงาน ไม่ให้ข้อมูลหายไปกับ connection ที่ถูกปิดแล้ว
+    CHECK_EVERY_SEND = True
+
+    def __init__(self, host, port=JETDIRECT_PORT, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.handle = None
+
+    def open(self):
+        self.handle = socket.create_connection((self.host, self.port), self.timeout)
+        self.handle.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        if self.handle is not None:
+            try:
+                self.handle.close()
+            except OSError:
+                pass
+            self.handle = None
+
+    def is_healthy(self):
+        # ถ้า socket อ่านได้โดยไม่มีข้อมูล แปลว่าเครื่องพิมพ์ปิด connection แล้ว
+        try:
+            readable, _, _ = select.select([self.handle], [], [], 0)
+            if readable:
+                return self.handle.recv(1024, socket.MSG_PEEK) != b""
+            return True
+        except OSError:
+            return False
+
+    def send(self, data, doc_name):
+        self.handle.sendall(data)
+
+
+class OneShotPrinterSession:
+    """เครื่องพิมพ์ที่ไม่มี connection ค้าง (device://, lp://) เปิดใหม่ทุกงาน"""
+
+    CHECK_EVERY_SEND = False
+
+    def __init__(self, uri):
+        self.printer = open_printer(uri)
+        self.handle = self.printer
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def is_healthy(self):
+        return True
+
+    def send(self, data, doc_name):
+        self.printer.send(data)
+
+
+def create_session(target):
+    """สร้าง session จากชื่อเครื่องพิมพ์ Windows หรือ URI"""
+    if "://" not in target:
+        if win32print is None:
+            raise RuntimeError("win32print is not available")
+        return Win32PrinterSession(target)
+    parts = urlsplit(target)
+    if parts.scheme == "socket":
+        return SocketPrinterSession(parts.hostname, parts.port or JETDIRECT_PORT)
+    return OneShotPrinterSession(target)
+
+
+class PrinterSessionPool:
+    """เก็บ session ของแต่ละเครื่องพิมพ์ไว้ใช้ซ้ำ และต่อใหม่เมื่อใช้งานไม่ได้"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sessions = {}
+        self.last_used = {}
+        self.reconnects = {}
+
+    def _get(self, target):
+        with self._lock:
+            entry = self.sessions.get(target)
+            if entry is None:
+                entry = self.sessions[target] = (create_session(target), threading.Lock())
+                self.last_used[target] = 0.0
+                self.reconnects[target] = 0
+            return entry
+
+    def _reconnect(self, target, session):
+        session.close()
+        session.open()
+        self.reconnects[target] += 1
+
+    def send(self, target, data, doc_name="Label"):
+        """ส่งข้อมูลไปยังเครื่องพิมพ์ ถ้าส่งไม่ได้จะต่อใหม่และลองอีกครั้ง"""
+        session, lock = self._get(target)
+        with lock:
+            if session.handle is None:
+                session.open()
+            elif ((session.CHECK_EVERY_SEND
+                   or time.monotonic() - self.last_used[target] > HEALTH_CHECK_SECONDS)
+                  and not session.is_healthy()):
+                self._reconnect(target, session)
+            try:
+                session.send(data, doc_name)
+            except Exception:
+                self._reconnect(target, session)
+                session.send(data, doc_name)
+            self.last_used[target] = time.monotonic()
+
+    def close_all(self):
+        with self._lock:
+            for session, lock in self.sessions.values():
+                with lock:
+                    session.close()
+            self.sessions.clear()
+
+
+session_pool = PrinterSessionPool()
+
+
+def print_raw_text(printer_name, text, doc_name="Label"):
+    """ส่งข้อความ raw ไปยังเครื่องพิมพ์ (ชื่อ Windows หรือ URI) ผ่าน session ที่เปิดค้างไว้"""
+    session_pool.send(printer_name, text.encode(PrinterConfig.ENCODING), doc_name)
+    return True
+
+
+_printer_list = None
+_printer_list_time = 0.0
+
+
+def _enumerate_printers():
+    if win32print is not None:
+        flags = win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
+        return [printer[2] for printer in win32print.EnumPrinters(flags)]
+    if platform.system().lower() == 'windows':
+        # ใช้คำสั่ง wmic สำหรับ Windows ที่ไม่มี win32print
+        result = subprocess.run(["wmic", "printer", "get", "name"],
+                                capture_output=True, text=True, check=True)
+        return [line.strip() for line in result.stdout.splitlines()[1:] if line.strip()]
+    # ใช้คำสั่ง lpstat สำหรับ Linux
+    result = subprocess.run(["lpstat", "-e"], capture_output=True, text=True, check=True)
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def get_available_printers(refresh=False):
+    """รายชื่อเครื่องพิมพ์ทั้งหมด (cache ไว้ PRINTER_LIST_TTL วินาที)"""
+    global _printer_list, _printer_list_time
+    now = time.monotonic()
+    if refresh or _printer_list is None or now - _printer_list_time > PRINTER_LIST_TTL:
+        _printer_list = _enumerate_printers()
+        _printer_list_time = now
+    return list(_printer_list)
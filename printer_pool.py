@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+กลุ่มเครื่องพิมพ์ของสถานี (PrinterConfig.PRINTERS) แต่ละเครื่องมีคิวและ worker thread ของตัวเอง
+- งานใหม่ถูกส่งไปเครื่องที่คาดว่าจะพิมพ์เสร็จเร็วที่สุด (จำนวนงานในคิว x เวลาพิมพ์เฉลี่ย)
+- เครื่องที่พิมพ์ไม่สำเร็จถูกพักไว้ (backoff เพิ่มเป็นเท่าตัว) งานนั้นและงานที่ค้างในคิวของเครื่องนั้น
+  ถูกย้ายไปเครื่องอื่นอัตโนมัติ ผลการพิมพ์ล้มเหลวจะแจ้งเมื่อไม่มีเครื่องอื่นให้ลองแล้วเท่านั้น
+- เก็บสถิติของแต่ละเครื่อง (จำนวนที่พิมพ์, ป้ายต่อนาที, เวลาพิมพ์เฉลี่ย)
+
+ใช้แทน PrintQueue ได้ (submit, depth, poll_results, stop)
+
+ใช้งาน:
+    python printer_pool.py 1 2 3               เทียบจำนวนป้ายต่อวินาทีกับเครื่องพิมพ์จำลอง 1, 2, 3 เครื่อง
+    python printer_pool.py 2 3 --jam P1        จำลองเครื่อง P1 กระดาษติด
+"""
+
+import threading
+import time
+from collections import deque
+import metrics
+from print_config import get_printers
+from print_queue import PrintQueue
+
+# เวลาพิมพ์ต่อป้ายที่สมมติไว้ก่อนมีสถิติจริง (วินาที)
+DEFAULT_PRINT_SECONDS = 0.5
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 600
+# ช่วงเวลาที่ใช้คำนวณป้ายต่อนาที
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+class PrinterState:
+    """คิวและสถิติของเครื่องพิมพ์หนึ่งเครื่อง"""
+
+    def __init__(self, name, queue):
+        self.name = name
+        self.queue = queue
+        self.completed = 0
+        self.failed = 0
+        self.failovers = 0
+        self.print_seconds = None        # ค่าเฉลี่ยแบบ exponential ของเวลาพิมพ์หนึ่งป้าย
+        self.consecutive_failures = 0
+        self.retry_at = 0.0
+        self.last_error = ""
+        self.finished_at = deque()       # เวลาที่พิมพ์สำเร็จ ภายใน THROUGHPUT_WINDOW_SECONDS
+
+    def healthy(self, now=None):
+        return self.retry_at <= (time.monotonic() if now is None else now)
+
+    def expected_wait(self):
+        """เวลาโดยประมาณจนงานใหม่จะพิมพ์เสร็จ"""
+        seconds = DEFAULT_PRINT_SECONDS if self.print_seconds is None else self.print_seconds
+        return (self.queue.depth + 1) * seconds
+
+    def record(self, job, now):
+        seconds = job.finished_at - job.started_at
+        if job.result.success:
+            self.completed += 1
+            self.consecutive_failures = 0
+            self.retry_at = 0.0
+            self.print_seconds = (seconds if self.print_seconds is None
+                                  else 0.8 * self.print_seconds + 0.2 * seconds)
+            self.finished_at.append(now)
+        else:
+            self.failed += 1
+            self.consecutive_failures += 1
+            self.last_error = job.result.message
+            self.retry_at = now + min(RETRY_BASE_SECONDS * 2 ** (self.consecutive_failures - 1),
+                                      RETRY_MAX_SECONDS)
+
+    def labels_per_minute(self, now):
+        cutoff = now - THROUGHPUT_WINDOW_SECONDS
+        while self.finished_at and self.finished_at[0] < cutoff:
+            self.finished_at.popleft()
+        return len(self.finished_at) * 60 / THROUGHPUT_WINDOW_SECONDS
+
+
+class PrinterPool:
+    """
+    Args:
+        printers (iterable): ชื่อเครื่องพิมพ์ (ค่าเริ่มต้นตาม PrinterConfig.PRINTERS)
+        print_func (callable): ฟังก์ชันพิมพ์ print_func(text, printer=..., fields=...)
+        maxsize (int): จำนวนงานสูงสุดในคิวของแต่ละเครื่อง
+    """
+
+    def __init__(self, printers=None, print_func=None, maxsize=50):
+        self._lock = threading.Lock()
+        # print_label ของแต่ละเครื่องไม่บันทึกไฟล์ไว้พิมพ์เอง งานอาจพิมพ์สำเร็จที่เครื่องอื่น
+        # ไฟล์ถูกบันทึกครั้งเดียวเมื่อไม่มีเครื่องให้ลองแล้ว (ดู _give_up)
+        self._manual_fallback = print_func is None
+        self.printers = [PrinterState(name, PrintQueue(print_func, maxsize, name, manual_fallback=False))
+                         for name in (printers or get_printers())]
+
+    @property
+    def depth(self):
+        return sum(state.queue.depth for state in self.printers)
+
+    @property
+    def completed(self):
+        return sum(state.completed for state in self.printers)
+
+    @property
+    def failed(self):
+        return sum(state.failed for state in self.printers)
+
+    def _candidates(self, exclude=()):
+        """เครื่องที่ส่งงานได้ เรียงตามเวลาที่คาดว่าจะพิมพ์เสร็จ (เครื่องที่ถูกพักอยู่ท้ายสุด)"""
+        now = time.monotonic()
+        states = [state for state in self.printers if state.name not in exclude]
+        return sorted(states, key=lambda state: (not state.healthy(now), state.expected_wait()))
+
+    def submit(self, job):
+        """ส่งงานไปเครื่องที่เหมาะที่สุด คืนค่า False ถ้าคิวของทุกเครื่องเต็ม"""
+        with self._lock:
+            for state in self._candidates():
+                if state.queue.submit(job):
+                    return True
+        return False
+
+    def _failover(self, state, jobs):
+        """ส่งงานไปเครื่องอื่นที่ยังไม่เคยพิมพ์ไม่สำเร็จ คืนค่างานที่ไม่มีเครื่องให้ส่ง"""
+        now = time.monotonic()
+        remaining = []
+        for job in jobs:
+            for other in self._candidates(exclude=job.failed_printers):
+                if other is state or not other.healthy(now):
+                    continue
+                if other.queue.submit(job):
+                    state.failovers += 1
+                    metrics.inc("print_failovers_total", source=state.name, target=other.name)
+                    break
+            else:
+                remaining.append(job)
+        return remaining
+
+    def poll_results(self):
+        """
+        ดึงงานที่พิมพ์เสร็จแล้ว (เรียกจาก main thread)
+        งานที่ล้มเหลวจะถูกย้ายไปเครื่องอื่นก่อน และคืนค่าเมื่อไม่มีเครื่องให้ลองแล้วเท่านั้น
+        """
+        finished = []
+        now = time.monotonic()
+        with self._lock:
+            for state in self.printers:
+                for job in state.queue.poll_results():
+                    state.record(job, now)
+                    result = "printed" if job.result.success else "failed"
+                    metrics.inc("printer_jobs_total", printer=state.name, result=result)
+                    metrics.observe("printer_job_seconds", job.finished_at - job.started_at,
+                                    printer=state.name)
+                    if job.result.success:
+                        finished.append(job)
+                        continue
+                    job.failed_printers.append(state.name)
+                    # เครื่องนี้ถูกพัก: ย้ายงานที่ล้มเหลวและงานที่ค้างอยู่ในคิวไปเครื่องอื่น
+                    for failed in self._failover(state, [job]):
+                        finished.append(self._give_up(failed))
+                    pending = state.queue.take_pending()
+                    for left in self._failover(state, pending):
+                        # ไม่มีเครื่องอื่นว่าง ให้เครื่องเดิมลองพิมพ์ต่อ
+                        state.queue.submit(left)
+        return finished
+
+    def _give_up(self, job):
+        """งานที่ไม่มีเครื่องให้ลองแล้ว: บันทึกไฟล์ไว้พิมพ์เอง (เฉพาะเมื่อใช้ print_label)"""
+        if self._manual_fallback:
+            from printing import save_manual_print
+            job.result = save_manual_print(job.text, job.printer)
+        return job
+
+    def stats(self):
+        """สถิติของแต่ละเครื่อง สำหรับหน้าจอสถานะและการรายงาน"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "printer": state.name,
+                "healthy": state.healthy(now),
+                "depth": state.queue.depth,
+                "completed": state.completed,
+                "failed": state.failed,
+                "failovers": state.failovers,
+                "labels_per_minute": state.labels_per_minute(now),
+                "print_seconds": state.print_seconds,
+                "retry_in": max(0.0, state.retry_at - now),
+                "last_error": state.last_error
+            } for state in self.printers]
+
+    def describe(self):
+        """ข้อความสรุปสถานะของทุกเครื่อง"""
+        lines = []
+        for row in self.stats():
+            status = "ready" if row["healthy"] else f"paused, retry in {row['retry_in']:.0f}s"
+            average = f"{row['print_seconds']:.2f}s/label" if row["print_seconds"] else "no data"
+            lines.append(f"{row['printer']}: {status}, queue {row['depth']}, "
+                         f"{row['completed']} printed, {row['failed']} failed, "
+                         f"{row['labels_per_minute']:.0f}/min, {average}")
+        return "\n".join(lines)
+
+    def stop(self, timeout=5.0):
+        for state in self.printers:
+            state.queue.stop(timeout)
+
+
+def simulate(printer_counts=(1, 2), labels=200, print_seconds=0.01, fail=None):
+    """
+    วัดจำนวนป้ายต่อวินาทีด้วยเครื่องพิมพ์จำลอง (หน่วงเวลา print_seconds ต่อป้าย)
+    fail = ชื่อเครื่องที่จำลองว่ากระดาษติด (พิมพ์ไม่สำเร็จทุกครั้ง)
+
+    Returns:
+        list: (จำนวนเครื่อง, ป้ายต่อวินาที, จำนวนที่พิมพ์สำเร็จ)
+    """
+    from print_queue import PrintJob
+    from printing import PrintResult
+
+    def fake_print(text, printer=None, fields=None):
+        time.sleep(print_seconds)
+        if printer == fail:
+            return PrintResult(False, None, "Error", f"{printer} is jammed")
+        return PrintResult(True, "simulated", "Success", "")
+
+    results = []
+    for count in printer_counts:
+        pool = PrinterPool([f"P{n + 1}" for n in range(count)], fake_print, maxsize=labels)
+        start = time.perf_counter()
+        for n in range(labels):
+            pool.submit(PrintJob(f"LOT{n:05d}", "label"))
+        printed = 0
+        done = 0
+        while done < labels:
+            finished = pool.poll_results()
+            done += len(finished)
+            printed += sum(1 for job in finished if job.result.success)
+            time.sleep(0.001)
+        results.append((count, labels / (time.perf_counter() - start), printed))
+        pool.stop()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Simulate label throughput for different pool sizes")
+    parser.add_argument("counts", type=int, nargs="*", default=[1, 2, 3], help="printer counts to compare")
+    parser.add_argument("--labels", type=int, default=200)
+    parser.add_argument("--print-ms", type=float, default=10.0, help="simulated time per label")
+    parser.add_argument("--jam", metavar="PRINTER", help="simulate a jammed printer (e.g. P1)")
+    args = parser.parse_args()
+    for count, rate, printed in simulate(args.counts, args.labels, args.print_ms / 1000, args.jam):
+        print(f"{count} printer(s): {rate:.0f} labels/s, {printed}/{args.labels} printed")
+    sys.exit(0)
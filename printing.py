@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+ส่งป้ายกำกับไปยังเครื่องพิมพ์ MACarton โดยไม่แสดงหน้าต่างใดๆ
+ผลการพิมพ์คืนค่าเป็น PrintResult เพื่อให้หน้าจอ (หรือ CLI) เป็นผู้แสดงผลเอง
+"""
+
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime
+import metrics
+from print_config import PrinterConfig, format_label_native, get_device_uri, get_native_format
+from print_raw import print_raw_text, win32print
+from raw_printer import LpPrinter, send_label
+
+# ตรวจสอบว่าเป็น Windows และ Raw Printing พร้อมใช้งาน (print_raw import win32print ไว้แล้ว)
+IS_WINDOWS = platform.system().lower() == 'windows'
+RAW_PRINT_AVAILABLE = IS_WINDOWS and win32print is not None
+
+
+class PrintResult:
+    """ผลการพิมพ์ป้ายหนึ่งใบ"""
+
+    def __init__(self, success, method, title, message):
+        self.success = success
+        self.method = method
+        self.title = title
+        self.message = message
+
+
+class PrintStrategyCache:
+    """
+    จำวิธีพิมพ์ที่สำเร็จล่าสุดของแต่ละเครื่องพิมพ์เพื่อลองก่อน
+    วิธีที่ล้มเหลวจะถูกข้ามไปจนกว่าจะถึงเวลาลองใหม่ (backoff เพิ่มเป็นเท่าตัว)
+    """
+
+    RETRY_BASE_SECONDS = 30
+    RETRY_MAX_SECONDS = 600
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.preferred = {}    # printer -> method
+        self.failures = {}     # (printer, method) -> {"count", "last_error", "retry_at"}
+
+    def order(self, printer, methods):
+        """เรียงวิธีพิมพ์: วิธีที่สำเร็จล่าสุด -> วิธีที่ยังไม่ถูกพัก -> วิธีที่ถูกพัก"""
+        now = time.monotonic()
+        with self._lock:
+            preferred = self.preferred.get(printer)
+            ready = []
+            waiting = []
+            for name, method in methods:
+                failure = self.failures.get((printer, name))
+                if name == preferred:
+                    ready.insert(0, (name, method))
+                elif failure and failure["retry_at"] > now:
+                    waiting.append((name, method))
+                else:
+                    ready.append((name, method))
+        # ถ้าทุกวิธีถูกพัก ยังต้องลองพิมพ์ตามลำดับเดิม
+        return ready + waiting
+
+    def record_success(self, printer, method):
+        with self._lock:
+            self.failures.pop((printer, method), None)
+            # วิธีที่ต้องให้ผู้ใช้กดเอง (เช่น notepad) ไม่ใช่วิธีหลัก
+            if method not in INTERACTIVE_METHODS:
+                self.preferred[printer] = method
+
+    def record_failure(self, printer, method, error):
+        with self._lock:
+            failure = self.failures.setdefault((printer, method), {"count": 0})
+            failure["count"] += 1
+            failure["last_error"] = str(error)
+            delay = min(self.RETRY_BASE_SECONDS * 2 ** (failure["count"] - 1),
+                        self.RETRY_MAX_SECONDS)
+            failure["retry_at"] = time.monotonic() + delay
+            if self.preferred.get(printer) == method:
+                del self.preferred[printer]
+
+    def describe(self, printer):
+        """ข้อความสรุปวิธีพิมพ์และประวัติความล้มเหลว สำหรับ check_printer_status"""
+        now = time.monotonic()
+        with self._lock:
+            lines = [f"Print method: {self.preferred.get(printer, 'not yet known')}"]
+            for (name_printer, method), failure in sorted(self.failures.items()):
+                if name_printer != printer:
+                    continue
+                retry_in = max(0, failure["retry_at"] - now)
+                lines.append(f"- {method}: failed {failure['count']}x, "
+                             f"retry in {retry_in:.0f}s ({failure['last_error']})")
+        return "\n".join(lines)
+
+
+strategy_cache = PrintStrategyCache()
+
+
+class _LabelFile:
+    """ข้อความป้าย และไฟล์ชั่วคราวที่สร้างเมื่อวิธีพิมพ์ต้องใช้ไฟล์เท่านั้น"""
+
+    def __init__(self, text, fields=None):
+        self.text = text
+        self.fields = fields
+        self.filename = None
+
+    def path(self):
+        if self.filename is None:
+            # ใส่ไมโครวินาทีเพื่อไม่ให้ชื่อไฟล์ชนกันเมื่อพิมพ์หลายใบในวินาทีเดียว
+            filename = f"macarton_label_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.txt"
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(self.text)
+            self.filename = filename
+        return self.filename
+
+    def discard(self):
+        """ลบไฟล์หลังพิมพ์สำเร็จ"""
+        if self.filename is not None:
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+            self.filename = None
+
+
+# เครื่องพิมพ์ที่ได้รับฟอร์มของภาษานั้นแล้ว: (เครื่องพิมพ์, ภาษา)
+_stored_formats = set()
+_stored_formats_lock = threading.Lock()
+
+
+def _send_raw(label, target):
+    """
+    ส่งป้ายแบบ raw ถ้าตั้ง PrinterConfig.LANGUAGE ไว้ จะส่งเฉพาะค่าของฟิลด์
+    ฟอร์มของป้ายจะถูกส่งนำหน้าเฉพาะงานแรกของเครื่องพิมพ์นั้น
+    """
+    language = PrinterConfig.LANGUAGE
+    if language == "text" or label.fields is None:
+        return print_raw_text(target, label.text, "MACarton Label")
+    key = (target, language)
+    payload = format_label_native(*label.fields, language=language)
+    with _stored_formats_lock:
+        stored = key in _stored_formats
+    if not stored:
+        payload = get_native_format(language) + payload
+    result = print_raw_text(target, payload, "MACarton Label")
+    with _stored_formats_lock:
+        _stored_formats.add(key)
+    return result
+
+
+def _print_raw(label, printer):
+    # พิมพ์ Raw Text โดยตรงไปยัง printer
+    if not _send_raw(label, printer):
+        raise RuntimeError("print_raw_text returned False")
+    return "Success", f"Printed {printer} Label (9x4 cm)"
+
+
+def _print_direct(label, printer):
+    # ส่งข้อมูลตรงไปยัง socket/device ของเครื่องพิมพ์นี้ (ใช้ connection ที่เปิดค้างไว้)
+    _send_raw(label, get_device_uri(printer))
+    return "Success", f"Printed {printer} Label (9x4 cm)"
+
+
+def _print_spooler(label, printer):
+    # ใช้คำสั่ง print กับชื่อ printer ที่ชัดเจน
+    subprocess.run(['print', f'/D:{printer}', label.path()],
+                   capture_output=True, text=True, check=True)
+    return "Success", f"Sent to {printer} printer via Print Spooler"
+
+
+def _print_copy_prn(label, printer):
+    # ใช้คำสั่ง copy ไปยัง default printer
+    subprocess.run(['copy', f'/B', label.path(), 'PRN'],
+                   shell=True, capture_output=True, text=True, check=True)
+    return "Success", "Printed to default printer"
+
+
+def _print_powershell(label, printer):
+    ps_command = f'Get-Content "{label.path()}" | Out-Printer -Name "{printer}"'
+    subprocess.run(['powershell', '-Command', ps_command],
+                   capture_output=True, text=True, check=True)
+    return "Success", "Printed via PowerShell"
+
+
+def _print_notepad(label, printer):
+    # ใช้ notepad /p เพื่อเปิด print dialog
+    subprocess.run(['notepad', '/p', label.path()], check=True)
+    return "Print Dialog", (f"Print dialog opened\nFile: {label.filename}\n"
+                            f"Please select {printer} printer and click Print")
+
+
+def _print_lp(label, printer):
+    # คำสั่งสำหรับ Linux/Unix - ส่งข้อความให้ lp ทาง stdin ไม่ต้องสร้างไฟล์
+    if PrinterConfig.LANGUAGE != "text" and label.fields is not None:
+        # คำสั่งภาษาเครื่องพิมพ์ส่งผ่าน "-o raw" พร้อมฟอร์ม เพราะ lp ไม่มี connection ค้าง
+        payload = (get_native_format(PrinterConfig.LANGUAGE)
+                   + format_label_native(*label.fields, language=PrinterConfig.LANGUAGE))
+        send_label(LpPrinter(printer, raw=True), payload)
+    else:
+        send_label(LpPrinter(printer), label.text)
+    return "Success", f"Printed {printer} Label (9x4 cm)"
+
+
+# วิธีพิมพ์ที่ใช้ได้บนเครื่องนี้ ตามลำดับเดิมเมื่อยังไม่รู้ว่าวิธีไหนใช้ได้
+# ("direct" ถูกเพิ่มหน้ารายการเฉพาะเครื่องพิมพ์ที่ตั้ง DEVICE_URI ไว้)
+PRINT_METHODS = []
+if IS_WINDOWS:
+    if RAW_PRINT_AVAILABLE:
+        PRINT_METHODS.append(("raw", _print_raw))
+    PRINT_METHODS += [
+        ("print", _print_spooler),
+        ("copy", _print_copy_prn),
+        ("powershell", _print_powershell),
+        ("notepad", _print_notepad)
+    ]
+else:
+    PRINT_METHODS.append(("lp", _print_lp))
+
+INTERACTIVE_METHODS = {"notepad"}
+
+
+def print_label(text, printer=PrinterConfig.PRINTER_NAME, fields=None, manual_fallback=True):
+    """
+    พิมพ์ป้ายโดยลองวิธีที่เคยสำเร็จก่อน และข้ามวิธีที่เพิ่งล้มเหลว
+    fields = (lot, part, rev, time) ใช้กับวิธีพิมพ์แบบ raw เมื่อตั้ง PrinterConfig.LANGUAGE ไว้
+    manual_fallback = False: ไม่บันทึกไฟล์ไว้พิมพ์เองเมื่อทุกวิธีล้มเหลว
+    (PrinterPool ย้ายงานไปเครื่องอื่นก่อน และบันทึกไฟล์เองเมื่อไม่มีเครื่องให้ลองแล้ว)
+    """
+    label = _LabelFile(text, fields)
+    methods = [("direct", _print_direct)] + PRINT_METHODS if get_device_uri(printer) else PRINT_METHODS
+    for name, method in strategy_cache.order(printer, methods):
+        start = time.perf_counter()
+        try:
+            title, message = method(label, printer)
+        except Exception as e:
+            metrics.observe("print_attempt_seconds", time.perf_counter() - start, method=name, result="failed")
+            metrics.inc("print_attempts_total", method=name, result="failed")
+            details = getattr(e, "stderr", None)
+            print(f"{name} print failed: {e}" + (f"\nError: {details}" if details else ""))
+            strategy_cache.record_failure(printer, name, e)
+            continue
+        metrics.observe("print_attempt_seconds", time.perf_counter() - start, method=name, result="ok")
+        metrics.inc("print_attempts_total", method=name, result="ok")
+        strategy_cache.record_success(printer, name)
+        if name not in INTERACTIVE_METHODS:
+            label.discard()
+        return PrintResult(True, name, title, message)
+
+    if not manual_fallback:
+        label.discard()
+        return PrintResult(False, None, "Error", f"All print methods failed on {printer}")
+    return save_manual_print(label, printer)
+
+
+def save_manual_print(label, printer=PrinterConfig.PRINTER_NAME):
+    """บันทึกป้าย (ข้อความหรือ _LabelFile) เป็นไฟล์ไว้พิมพ์เอง คืนค่า PrintResult ที่แจ้งชื่อไฟล์"""
+    if not isinstance(label, _LabelFile):
+        label = _LabelFile(label)
+    # ถ้าทุกวิธีไม่ได้ผล ให้บันทึกไฟล์ไว้พิมพ์เอง
+    try:
+        label.path()
+    except Exception as e:
+        return PrintResult(False, None, "Error", f"Cannot process file: {str(e)}")
+    if IS_WINDOWS:
+        return PrintResult(False, None, "File Saved",
+                           f"File saved as: {label.filename}\n"
+                           f"Please:\n"
+                           f"1. Check if {printer} printer is connected\n"
+                           f"2. Right-click the file and select 'Print'\n"
+                           f"3. Or drag the file to {printer} printer icon")
+    return PrintResult(False, None, "File Saved",
+                       f"File saved as: {label.filename}\nConnect to {printer} printer and print manually")
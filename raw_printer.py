@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+ส่งข้อมูลป้ายตรงไปยังเครื่องพิมพ์โดยไม่สร้างไฟล์ชั่วคราว
+- socket://host:9100   JetDirect / raw TCP port 9100
+- device:///dev/usb/lp0 หรือ device://LPT1   เขียนไปยัง device path โดยตรง
+- lp://ชื่อเครื่องพิมพ์   ส่งผ่าน lp ทาง stdin (CUPS)
+"""
+
+import socket
+import subprocess
+from urllib.parse import urlsplit
+from print_config import PrinterConfig, get_lp_args
+
+JETDIRECT_PORT = 9100
+
+
+class SocketPrinter:
+    """เครื่องพิมพ์ที่รับข้อมูล raw ทาง TCP (JetDirect)"""
+
+    def __init__(self, host, port=JETDIRECT_PORT, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def send(self, data):
+        with socket.create_connection((self.host, self.port), self.timeout) as conn:
+            conn.sendall(data)
+            # แจ้งเครื่องพิมพ์ว่าส่งข้อมูลครบแล้ว
+            conn.shutdown(socket.SHUT_WR)
+
+    def __repr__(self):
+        return f"socket://{self.host}:{self.port}"
+
+
+class DevicePrinter:
+    """เครื่องพิมพ์ที่เปิดเป็นไฟล์ได้โดยตรง เช่น /dev/usb/lp0 หรือ LPT1"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, data):
+        with open(self.path, "wb", buffering=0) as device:
+            device.write(data)
+
+    def __repr__(self):
+        return f"device://{self.path}"
+
+
+class LpPrinter:
+    """ส่งข้อมูลให้ lp ทาง stdin แทนการเขียนไฟล์
+    raw=True ส่งคำสั่งภาษาเครื่องพิมพ์ (ZPL/EPL/TSPL) ผ่าน "-o raw" ไม่ผ่าน text filter ของ CUPS
+    """
+
+    def __init__(self, printer, paper_size="Label", raw=False):
+        self.printer = printer
+        self.paper_size = paper_size
+        self.raw = raw
+
+    @property
+    def args(self):
+        """คำสั่ง lp ที่ใช้ส่งงาน"""
+        if self.raw:
+            return ["lp", "-d", self.printer, "-o", "raw"]
+        return get_lp_args(self.printer, self.paper_size)
+
+    def send(self, data):
+        subprocess.run(self.args, input=data, capture_output=True, check=True)
+
+    def __repr__(self):
+        return f"lp://{self.printer}"
+
+
+def open_printer(uri, raw=None):
+    """
+    สร้างเครื่องพิมพ์จาก URI (ดูรูปแบบที่รองรับด้านบน)
+    raw ใช้กับ lp:// เท่านั้น ถ้าไม่ระบุ จะส่งแบบ raw เมื่อ PrinterConfig.LANGUAGE ไม่ใช่ "text"
+    """
+    parts = urlsplit(uri)
+    if parts.scheme == "socket":
+        return SocketPrinter(parts.hostname, parts.port or JETDIRECT_PORT)
+    if parts.scheme == "device":
+        # device:///dev/usb/lp0 -> /dev/usb/lp0, device://LPT1 -> LPT1
+        return DevicePrinter(parts.path if not parts.netloc else parts.netloc + parts.path)
+    if parts.scheme == "lp":
+        if raw is None:
+            raw = PrinterConfig.LANGUAGE != "text"
+        return LpPrinter(parts.netloc or PrinterConfig.PRINTER_NAME, raw=raw)
+    raise ValueError(f"Unsupported printer URI: {uri}")
+
+
+def send_label(printer, text):
+    """เข้ารหัสข้อความป้ายแล้วส่งไปยังเครื่องพิมพ์"""
+    printer.send(text.encode(PrinterConfig.ENCODING))
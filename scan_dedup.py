@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+กันการพิมพ์ซ้ำเมื่อเครื่องสแกนส่ง Lot เดิมซ้ำ (double-fire) หรือกด Enter ซ้ำ
+- RecentScans: Lot ที่สแกนภายใน N วินาทีล่าสุด (hash set + คิวหมดอายุ) ตรวจได้ในเวลาคงที่
+- ShiftBloomFilter: (เลือกได้) Bloom filter ของ Lot ที่สแกนในกะปัจจุบัน บันทึกลงไฟล์
+  จึงยังจำได้หลังเปิดโปรแกรมใหม่ อาจตอบว่า "เคยสแกน" ผิดได้เล็กน้อย (false positive)
+  แต่ไม่มีทางตอบว่า "ไม่เคยสแกน" ผิด
+"""
+
+import glob
+import hashlib
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from print_config import ScanConfig
+
+
+class RecentScans:
+    """Lot ที่สแกนภายใน window_seconds วินาที จำกัดจำนวนไม่เกิน maxlen"""
+
+    def __init__(self, window_seconds=5.0, maxlen=10000):
+        self.window_seconds = window_seconds
+        self.maxlen = maxlen
+        self.last_seen = {}       # lot -> เวลาที่สแกนล่าสุด
+        self.expiry = deque()     # (เวลา, lot) เรียงตามเวลา
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        while self.expiry and (self.expiry[0][0] <= cutoff or len(self.expiry) >= self.maxlen):
+            seen_at, lot = self.expiry.popleft()
+            # ลบเฉพาะเมื่อเป็นการสแกนครั้งล่าสุดของ Lot นั้น
+            if self.last_seen.get(lot) == seen_at:
+                del self.last_seen[lot]
+
+    def seen(self, lot, now=None):
+        """จำนวนวินาทีตั้งแต่บันทึก Lot นี้ครั้งก่อน หรือ None ถ้าไม่ได้บันทึกภายใน window (ไม่บันทึก)"""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        previous = self.last_seen.get(lot)
+        return None if previous is None else now - previous
+
+    def add(self, lot, now=None):
+        """บันทึกการสแกน Lot นี้"""
+        now = time.monotonic() if now is None else now
+        self.last_seen[lot] = now
+        self.expiry.append((now, lot))
+
+    def forget(self, lot):
+        """ให้ Lot นี้สแกนใหม่ได้ทันที (เช่น เมื่อพิมพ์ไม่สำเร็จ)"""
+        self.last_seen.pop(lot, None)
+
+    def __len__(self):
+        return len(self.last_seen)
+
+
+def shift_start(now=None, starts=None):
+    """เวลาเริ่มกะที่ now อยู่ ตาม ScanConfig.SHIFT_STARTS"""
+    now = now or datetime.now()
+    starts = sorted(starts or ScanConfig.SHIFT_STARTS)
+    current = None
+    for start in starts:
+        hour, minute = map(int, start.split(":"))
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= now:
+            current = candidate
+    if current is None:
+        # ก่อนเริ่มกะแรกของวัน = กะสุดท้ายของเมื่อวาน
+        hour, minute = map(int, starts[-1].split(":"))
+        current = (now - timedelta(days=1)).replace(hour=hour, minute=minute,
+                                                    second=0, microsecond=0)
+    return current
+
+
+class ShiftBloomFilter:
+    """
+    Bloom filter ของ Lot ที่สแกนในกะเดียวกัน เก็บเป็นไฟล์ scan_shift_YYYYMMDD_HHMM.bloom
+    การเพิ่ม Lot เขียนเฉพาะ byte ที่เปลี่ยนลงไฟล์ ไฟล์ของกะก่อนๆ จะถูกลบเมื่อเริ่มกะใหม่
+    """
+
+    def __init__(self, directory, capacity=20000, hashes=10):
+        self.directory = directory
+        # ~14.4 bit ต่อ Lot กับ 10 hash ให้ false positive ประมาณ 0.1% ที่ capacity
+        self.size = capacity * 144 // 10
+        self.hashes = hashes
+        self.shift = None
+        self.bits = None
+        self.file = None
+
+    def _open(self, shift):
+        self.close()
+        name = f"scan_shift_{shift.strftime('%Y%m%d_%H%M')}.bloom"
+        path = os.path.join(self.directory, name)
+        for old in glob.glob(os.path.join(self.directory, "scan_shift_*.bloom")):
+            if os.path.basename(old) != name:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        length = (self.size + 7) // 8
+        if os.path.exists(path) and os.path.getsize(path) == length:
+            with open(path, "rb") as f:
+                self.bits = bytearray(f.read())
+        else:
+            self.bits = bytearray(length)
+            with open(path, "wb") as f:
+                f.write(self.bits)
+        self.file = open(path, "r+b", buffering=0)
+        self.shift = shift
+
+    def _positions(self, lot):
+        digest = hashlib.blake2b(lot.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def _current(self, now):
+        shift = shift_start(now)
+        if shift != self.shift:
+            self._open(shift)
+
+    def contains(self, lot, now=None):
+        """True ถ้า Lot นี้ (น่าจะ) ถูกบันทึกในกะนี้แล้ว (ไม่บันทึก)"""
+        self._current(now)
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(lot))
+
+    def add(self, lot, now=None):
+        """บันทึก Lot ในกะนี้ คืนค่า True ถ้า (น่าจะ) เคยบันทึกแล้ว"""
+        self._current(now)
+        seen = True
+        changed = set()
+        for position in self._positions(lot):
+            index, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[index] & mask:
+                seen = False
+                self.bits[index] |= mask
+                changed.add(index)
+        for index in sorted(changed):
+            self.file.seek(index)
+            self.file.write(self.bits[index:index + 1])
+        return seen
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ScanDeduplicator:
+    """
+    ตรวจ Lot ก่อนส่งพิมพ์: ซ้ำภายใน window หรือซ้ำภายในกะ (ถ้าเปิดใช้)
+    check() ไม่บันทึก Lot: เรียก record() เมื่อส่งเข้าคิวพิมพ์แล้ว และ record_printed() เมื่อพิมพ์สำเร็จ
+    Lot ที่ไม่มีข้อมูลหรือคิวเต็มจึงสแกนใหม่ได้ทันที และ Lot ที่ไม่ได้พิมพ์ไม่ถูกบันทึกในกะ
+    """
+
+    def __init__(self, window_seconds=None, shift_directory=None):
+        self.recent = RecentScans(ScanConfig.DUPLICATE_WINDOW_SECONDS
+                                  if window_seconds is None else window_seconds)
+        self.shift_filter = ShiftBloomFilter(shift_directory) if shift_directory else None
+        self.suppressed = 0
+
+    def check(self, lot):
+        """
+        คืนค่า (ชนิด, ข้อความ): ("window", ...) สแกนซ้ำภายใน N วินาที,
+        ("shift", ...) เคยพิมพ์ในกะนี้แล้ว หรือ (None, None) ถ้าไม่ซ้ำ
+        """
+        elapsed = self.recent.seen(lot)
+        if elapsed is not None:
+            self.suppressed += 1
+            return "window", f"Duplicate scan of {lot} ignored ({elapsed:.1f} s ago)"
+        if self.shift_filter is not None and self.shift_filter.contains(lot):
+            return "shift", f"Lot {lot} was already scanned in this shift"
+        return None, None
+
+    def record(self, lot):
+        """Lot ถูกส่งเข้าคิวพิมพ์แล้ว: การสแกนซ้ำภายใน window จะถูกข้าม"""
+        self.recent.add(lot)
+
+    def record_printed(self, lot):
+        """Lot พิมพ์สำเร็จแล้ว: บันทึกในกะปัจจุบัน"""
+        if self.shift_filter is not None:
+            self.shift_filter.add(lot)
+
+    def forget(self, lot):
+        self.recent.forget(lot)
+
+    def close(self):
+        if self.shift_filter is not None:
+            self.shift_filter.close()
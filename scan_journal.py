@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+บันทึกประวัติการสแกน/พิมพ์ทุกครั้งลง SQLite (scan_journal.db ข้างไฟล์ข้อมูล)
+มี index ตามเวลาและตาม Lot จึงตอบคำถามเช่น "Lot นี้พิมพ์ไปแล้ววันนี้หรือยัง"
+หรือ "พิมพ์ซ้ำทุกป้ายช่วง 14:00-15:00" ได้ทันทีแม้มีประวัติหลายเดือน
+ประวัติที่เก่ากว่า RETENTION_DAYS จะถูกลบออกเมื่อเปิด journal (หมุนเวียนพื้นที่ไฟล์)
+
+ใช้งาน:
+    python scan_journal.py check QSTZ8B2206
+    python scan_journal.py list 14:00 15:00
+    python scan_journal.py reprint "2025-01-15 14:00" "2025-01-15 15:00" --print
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+import metrics
+from lot_rules import get_rule_engine
+
+# เก็บประวัติย้อนหลังกี่วัน
+RETENTION_DAYS = 400
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    scanned_at TEXT NOT NULL,
+    lot TEXT NOT NULL,
+    key TEXT,
+    part TEXT,
+    revision TEXT,
+    status TEXT NOT NULL,
+    printer TEXT,
+    method TEXT,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_time ON scans (scanned_at);
+CREATE INDEX IF NOT EXISTS idx_scans_lot ON scans (lot, scanned_at);
+"""
+
+# ผลของการสแกนแต่ละครั้ง
+STATUS_PRINTED = "printed"
+STATUS_FAILED = "failed"
+STATUS_NO_DATA = "no_data"
+STATUS_QUEUE_FULL = "queue_full"
+
+
+def get_journal_path():
+    """scan_journal.db อยู่ที่เดียวกับ part_data.json"""
+    from data_manager import DataManager
+    return os.path.join(os.path.dirname(DataManager.get_data_file_path()), "scan_journal.db")
+
+
+def parse_time(text, end=False):
+    """
+    แปลงเวลา "HH:MM" (วันนี้), "YYYY-MM-DD" หรือ "YYYY-MM-DD HH:MM[:SS]" เป็นข้อความเวลาของ journal
+    end=True กับวันที่อย่างเดียวหมายถึงสิ้นวันนั้น
+    """
+    text = text.strip()
+    for fmt in (TIME_FORMAT, "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(text, fmt).strftime(TIME_FORMAT)
+        except ValueError:
+            pass
+    try:
+        day = datetime.strptime(text, "%Y-%m-%d")
+        return (day + timedelta(days=1) if end else day).strftime(TIME_FORMAT)
+    except ValueError:
+        pass
+    clock = datetime.strptime(text, "%H:%M")
+    return datetime.now().replace(hour=clock.hour, minute=clock.minute,
+                                  second=0, microsecond=0).strftime(TIME_FORMAT)
+
+
+class ScanJournal:
+    """ประวัติการสแกน/พิมพ์ใน SQLite"""
+
+    def __init__(self, path=None, retention_days=RETENTION_DAYS):
+        self.path = path or get_journal_path()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # ต้องตั้ง auto_vacuum ก่อนสร้างตาราง เพื่อคืนพื้นที่หลังลบประวัติเก่า
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if retention_days:
+            self.prune(retention_days)
+
+    def prune(self, retention_days=RETENTION_DAYS):
+        """ลบประวัติที่เก่ากว่า retention_days วัน คืนค่าจำนวนแถวที่ลบ"""
+        cutoff = (datetime.now() - timedelta(days=retention_days)).strftime(TIME_FORMAT)
+        with self._lock, self.conn:
+            count = self.conn.execute("DELETE FROM scans WHERE scanned_at < ?", (cutoff,)).rowcount
+        if count:
+            with self._lock:
+                self.conn.execute("PRAGMA incremental_vacuum")
+        return count
+
+    def record(self, lot, status, part=None, revision=None, scanned_at=None,
+               printer=None, method=None, latency_ms=None):
+        """บันทึกผลการสแกนหนึ่งครั้ง (ถ้าบันทึกไม่ได้จะไม่ขัดการสแกน)"""
+        scanned_at = scanned_at or datetime.now().strftime(TIME_FORMAT)
+        try:
+            key = get_rule_engine().resolve(lot)
+            with metrics.timer("file_write_seconds", file="journal"), self._lock, self.conn:
+                self.conn.execute(
+                    "INSERT INTO scans (scanned_at, lot, key, part, revision, status, printer, method, latency_ms) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (scanned_at, lot, key, part, revision, status, printer, method, latency_ms))
+            return True
+        except sqlite3.Error as e:
+            print(f"Cannot write scan journal: {e}")
+            return False
+
+    def last_printed(self, lot, since=None):
+        """การพิมพ์สำเร็จครั้งล่าสุดของ Lot (ตั้งแต่เวลา since) หรือ None"""
+        since = since or "0000"
+        with self._lock:
+            return self.conn.execute(
+                "SELECT * FROM scans WHERE lot = ? AND scanned_at >= ? AND status = ? "
+                "ORDER BY scanned_at DESC LIMIT 1", (lot, since, STATUS_PRINTED)).fetchone()
+
+    def printed_today(self, lot):
+        """การพิมพ์ของ Lot นี้วันนี้ (แถวล่าสุด) หรือ None ถ้ายังไม่เคยพิมพ์"""
+        return self.last_printed(lot, datetime.now().strftime("%Y-%m-%d"))
+
+    def between(self, start, end, status=STATUS_PRINTED):
+        """ประวัติในช่วงเวลา [start, end) เรียงตามเวลา (status=None คือทุกสถานะ)"""
+        sql = "SELECT * FROM scans WHERE scanned_at >= ? AND scanned_at < ?"
+        params = [start, end]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            return self.conn.execute(sql + " ORDER BY scanned_at, id", params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan/print history")
+    parser.add_argument("--journal", help="scan_journal.db (default: next to the program)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check_parser = commands.add_parser("check", help="was this lot already labeled today?")
+    check_parser.add_argument("lot")
+
+    for name, help_text in (("list", "show scans in a time range"),
+                            ("reprint", "print the labels from a time range again")):
+        range_parser = commands.add_parser(name, help=help_text)
+        range_parser.add_argument("start", help='"HH:MM" (today), "YYYY-MM-DD" or "YYYY-MM-DD HH:MM"')
+        range_parser.add_argument("end")
+        if name == "list":
+            range_parser.add_argument("--all", action="store_true", help="include failed and no-data scans")
+        else:
+            range_parser.add_argument("--output", help="write labels to this file ('-' for stdout)")
+            range_parser.add_argument("--print", dest="send_to_printer", action="store_true",
+                                      help="send the labels to the printer as one job")
+
+    args = parser.parse_args(argv)
+    journal = ScanJournal(args.journal, retention_days=None)
+    try:
+        if args.command == "check":
+            row = journal.printed_today(args.lot.strip().upper())
+            if row is None:
+                print(f"{args.lot}: not labeled today")
+                return 1
+            print(f"{args.lot}: labeled at {row['scanned_at']} ({row['part']} {row['revision']})")
+            return 0
+
+        rows = journal.between(parse_time(args.start), parse_time(args.end, end=True),
+                               None if getattr(args, "all", False) else STATUS_PRINTED)
+        if args.command == "list":
+            for row in rows:
+                latency = f"{row['latency_ms']:.0f} ms" if row["latency_ms"] is not None else ""
+                print(f"{row['scanned_at']}  {row['lot']:12} {row['part'] or '':10} "
+                      f"{row['revision'] or '':8} {row['status']:10} {row['method'] or ''} {latency}")
+            print(f"{len(rows)} scans", file=sys.stderr)
+            return 0
+
+        # พิมพ์ซ้ำด้วยเวลาเดิมของแต่ละป้าย
+        from batch_label import print_labels, write_labels
+        from print_config import get_template
+        render = get_template("macarton_label").render
+        labels = (render(row["lot"], row["part"], row["revision"], row["scanned_at"]) for row in rows)
+        if args.send_to_printer:
+            count = print_labels(labels)
+        elif not args.output or args.output == "-":
+            count = write_labels(labels, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                count = write_labels(labels, f)
+        print(f"Labels: {count}", file=sys.stderr)
+        return 0
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+แกนหลักของการสแกน: ค้นหา -> จัดรูปแบบป้าย -> ส่งเข้าคิวพิมพ์ -> บันทึกประวัติ
+ไม่ใช้ Tk จึงใช้ร่วมกันได้ทั้งหน้าจอ (main.py), command line และการวัดประสิทธิภาพ
+ส่วนประกอบที่โหลดช้า (ข้อมูล, journal, การพิมพ์) ถูกสร้างเมื่อใช้ครั้งแรก
+
+ใช้งาน:
+    python scan_service.py QSTZ8B2206 ...        สแกนและพิมพ์ (หรืออ่าน Lot จาก stdin)
+    python scan_service.py --no-print QSTZ8B2206  แสดงป้ายโดยไม่พิมพ์
+    python scan_service.py --benchmark 100000     วัด throughput ของ pipeline (ไม่พิมพ์จริง)
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+import metrics
+from print_config import PrinterConfig, ScanConfig, format_label_text
+from print_queue import PrintJob, PrintQueue
+from printer_pool import PrinterPool
+
+# ผลของการสแกน
+SCAN_EMPTY = "empty"
+SCAN_DUPLICATE = "duplicate"
+SCAN_DUPLICATE_SHIFT = "duplicate_shift"
+SCAN_NO_DATA = "no_data"
+SCAN_ERROR = "error"
+SCAN_QUEUE_FULL = "queue_full"
+SCAN_QUEUED = "queued"
+
+# histogram ของแต่ละขั้นตอน (ดู metrics.py)
+_SCAN_SECONDS = metrics.histogram("scan_seconds")
+_LOOKUP_SECONDS = metrics.histogram("stage_seconds", stage="lookup")
+_FORMAT_SECONDS = metrics.histogram("stage_seconds", stage="format")
+_PRINT_WAIT_SECONDS = metrics.histogram("print_wait_seconds")
+_PRINT_JOB_SECONDS = metrics.histogram("print_job_seconds")
+
+
+class ScanOutcome:
+    """ผลการสแกนหนึ่งครั้ง"""
+
+    def __init__(self, lot, status, message="", part=None, rev=None, text=None, job=None):
+        self.lot = lot
+        self.status = status
+        self.message = message
+        self.part = part
+        self.rev = rev
+        self.text = text
+        self.job = job
+
+    @property
+    def queued(self):
+        return self.status == SCAN_QUEUED
+
+
+class ScanService:
+    """
+    pipeline การสแกนที่ไม่ขึ้นกับหน้าจอ
+    ส่วนประกอบที่ไม่ได้ส่งมาจะใช้ค่าเริ่มต้นของโปรแกรม (สร้างเมื่อใช้ครั้งแรก)
+    """
+
+    def __init__(self, data_manager=None, journal=None, dedup=None, print_queue=None,
+                 template="macarton_label", printer=PrinterConfig.PRINTER_NAME):
+        self._data_manager = data_manager
+        self._journal = journal
+        self._dedup = dedup
+        self._print_queue = print_queue
+        self.template = template
+        self.printer = printer
+
+    @property
+    def data_manager(self):
+        if self._data_manager is None:
+            from data_manager import get_shared_data_manager
+            return get_shared_data_manager()
+        return self._data_manager
+
+    @property
+    def journal(self):
+        if self._journal is None:
+            from scan_journal import ScanJournal
+            self._journal = ScanJournal()
+        return self._journal
+
+    @property
+    def dedup(self):
+        if self._dedup is None:
+            from scan_dedup import ScanDeduplicator
+            shift_directory = None
+            if ScanConfig.SHIFT_DEDUP:
+                from data_manager import DataManager
+                shift_directory = os.path.dirname(DataManager.get_data_file_path())
+            self._dedup = ScanDeduplicator(shift_directory=shift_directory)
+        return self._dedup
+
+    @property
+    def print_queue(self):
+        if self._print_queue is None:
+            # ค่าเริ่มต้น: กลุ่มเครื่องพิมพ์ตาม PrinterConfig.PRINTERS (เครื่องเดียวถ้าไม่ได้ตั้งไว้)
+            # สร้างเมื่อส่งงานแรก จึงไม่มี thread พิมพ์ค้างเมื่อใช้แค่ lookup()/format()
+            self._print_queue = PrinterPool()
+        return self._print_queue
+
+    def warm_up(self):
+        """โหลดข้อมูลและส่วนประกอบทั้งหมดล่วงหน้า ให้การสแกนครั้งแรกเร็ว"""
+        self.data_manager
+        self.journal
+        self.dedup
+        self.print_queue
+
+    def lookup(self, lot):
+        """Part และ Revision ของ Lot หรือ (None, None)"""
+        return self.data_manager.get_part_rev(lot)
+
+    def format(self, lot, part, rev, time):
+        return format_label_text(lot, part, rev, time, self.template)
+
+    def scan(self, lot, force=False):
+        """
+        สแกน Lot หนึ่งครั้ง: กันสแกนซ้ำ -> ค้นหา -> จัดรูปแบบ -> ส่งเข้าคิวพิมพ์
+
+        Args:
+            lot (str): หมายเลข Lot
+            force (bool): พิมพ์แม้เคยสแกนแล้วในกะนี้ (ผู้ใช้ยืนยันแล้ว)
+
+        Returns:
+            ScanOutcome: ผลการสแกน
+        """
+        start = time.perf_counter()
+        outcome = self._scan(lot, force)
+        _SCAN_SECONDS.observe(time.perf_counter() - start)
+        metrics.inc("scans_total", status=outcome.status)
+        return outcome
+
+    def _scan(self, lot, force):
+        lot = lot.strip()
+        if not lot:
+            return ScanOutcome(lot, SCAN_EMPTY, "Please enter lot number")
+
+        # สแกนซ้ำภายในไม่กี่วินาที (เครื่องสแกนส่งซ้ำ/กด Enter ซ้ำ) ไม่ต้องพิมพ์อีก
+        if not force:
+            duplicate, message = self.dedup.check(lot)
+            if duplicate == "window":
+                return ScanOutcome(lot, SCAN_DUPLICATE, message)
+            if duplicate == "shift":
+                return ScanOutcome(lot, SCAN_DUPLICATE_SHIFT, message)
+
+        clock = time.perf_counter
+        start = clock()
+        try:
+            part, rev = self.lookup(lot)
+        except Exception as e:
+            return ScanOutcome(lot, SCAN_ERROR, f"Error processing lot number: {str(e)}")
+        _LOOKUP_SECONDS.observe(clock() - start)
+        if part is None or rev is None:
+            self.journal.record(lot, "no_data")
+            return ScanOutcome(lot, SCAN_NO_DATA, "No data found for this lot in the system")
+
+        start = clock()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        text = self.format(lot, part, rev, now)
+        _FORMAT_SECONDS.observe(clock() - start)
+
+        # ส่งงานเข้าคิวพิมพ์ แล้วกลับไปรับการสแกนต่อทันที
+        job = PrintJob(lot, text, (lot, part, rev, now))
+        if not self.print_queue.submit(job):
+            self.journal.record(lot, "queue_full", part, rev, now)
+            return ScanOutcome(lot, SCAN_QUEUE_FULL, "Print queue is full, please wait for the printer",
+                               part, rev, text)
+        # บันทึกเฉพาะ Lot ที่ส่งเข้าคิวแล้ว (Lot ที่ไม่มีข้อมูลหรือคิวเต็มสแกนใหม่ได้ทันที)
+        self.dedup.record(lot)
+        return ScanOutcome(lot, SCAN_QUEUED, "", part, rev, text, job)
+
+    def poll(self):
+        """งานพิมพ์ที่เสร็จแล้ว บันทึกลง journal (เรียกจาก thread ที่ใช้ journal)"""
+        finished = self.print_queue.poll_results()
+        for job in finished:
+            lot, part, rev, scanned_at = job.fields
+            _PRINT_WAIT_SECONDS.observe(job.wait_ms / 1000)
+            _PRINT_JOB_SECONDS.observe(job.latency_ms / 1000)
+            metrics.inc("print_jobs_total", result="printed" if job.result.success else "failed")
+            if job.result.success:
+                self.dedup.record_printed(lot)
+            else:
+                # ให้สแกนใหม่เพื่อพิมพ์ซ้ำได้ทันที
+                self.dedup.forget(lot)
+            self.journal.record(lot, "printed" if job.result.success else "failed",
+                                part, rev, scanned_at, job.printer or self.printer,
+                                job.result.method, job.latency_ms)
+        return finished
+
+    def drain(self, timeout=30.0):
+        """รอจนงานพิมพ์ในคิวเสร็จทั้งหมด คืนค่างานที่เสร็จ"""
+        finished = []
+        deadline = time.monotonic() + timeout
+        while True:
+            # poll ก่อนตรวจคิว: งานที่ล้มเหลวอาจถูกย้ายไปเครื่องพิมพ์อื่นระหว่าง poll
+            finished.extend(self.poll())
+            if not self.print_queue.depth or time.monotonic() >= deadline:
+                return finished
+            time.sleep(0.01)
+
+    def close(self):
+        if self._print_queue is not None:
+            self._print_queue.stop()
+        if self._journal is not None:
+            self._journal.close()
+        if self._dedup is not None:
+            self._dedup.close()
+
+
+def benchmark(count=100000, data_manager=None):
+    """
+    วัด throughput ของ scan() ทั้ง pipeline โดยไม่พิมพ์จริง และไม่เขียน journal ลงดิสก์
+
+    Returns:
+        dict: จำนวน Lot, เวลาเฉลี่ยต่อ Lot (ไมโครวินาที) และจำนวน Lot ต่อวินาที
+    """
+    from printing import PrintResult
+    from scan_dedup import ScanDeduplicator
+    from scan_journal import ScanJournal
+
+    def print_nothing(text, fields=None):
+        return PrintResult(True, "benchmark", "Success", "")
+
+    service = ScanService(data_manager, ScanJournal(":memory:"), ScanDeduplicator(),
+                          PrintQueue(print_nothing, maxsize=count + 1))
+    keys = list(service.data_manager.data) or ["ST_B"]
+    lots = [f"Q{keys[n % len(keys)][:2]}Z8{keys[n % len(keys)][-1]}{n:06d}" for n in range(count)]
+
+    start = time.perf_counter()
+    for lot in lots:
+        service.scan(lot)
+    scanned = time.perf_counter() - start
+    service.drain()
+    total = time.perf_counter() - start
+    service.close()
+    return {
+        "count": count,
+        "scan_us": scanned / count * 1e6,
+        "scans_per_second": count / scanned,
+        "end_to_end_seconds": total
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan lots without the GUI")
+    parser.add_argument("lots", nargs="*", help="lot numbers (default: one per line from stdin)")
+    parser.add_argument("--no-print", action="store_true", help="show the labels only")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="measure N scans with a no-op printer")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        result = benchmark(args.benchmark)
+        print(f"{result['count']} scans: {result['scan_us']:.1f} us/scan, "
+              f"{result['scans_per_second']:.0f} scans/s, "
+              f"{result['end_to_end_seconds']:.2f} s including print queue")
+        return 0
+
+    lots = [lot for lot in (line.strip().upper() for line in args.lots or sys.stdin) if lot]
+    if args.no_print:
+        # ใช้แค่ lookup()/format() จึงไม่มีการสร้างคิวพิมพ์
+        service = ScanService()
+        try:
+            for lot in lots:
+                part, rev = service.lookup(lot)
+                if part is None or rev is None:
+                    print(f"{lot}: No data found", file=sys.stderr)
+                    continue
+                print(service.format(lot, part, rev, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        finally:
+            service.close()
+        return 0
+
+    service = ScanService()
+    failed = 0
+    try:
+        for lot in lots:
+            outcome = service.scan(lot)
+            if not outcome.queued:
+                print(f"{lot}: {outcome.message}", file=sys.stderr)
+                failed += 1
+        for job in service.drain():
+            print(f"{job.lot}: {job.result.title} ({job.latency_ms:.0f} ms)", file=sys.stderr)
+            failed += 0 if job.result.success else 1
+    finally:
+        service.close()
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
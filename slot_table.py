@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+ตารางค้นหา Part/Revision แบบ direct-indexed สำหรับ key แบบ "XX_Y" (ตัวที่ 2-3 และตัวที่ 6 ของ Lot)
+ตัวอักษรสามตัวถูกแปลงเป็นเลขช่องของ array เดียว (A-Z0-9 = 0..35, ตัวอื่น = 36 ซึ่งไม่มีข้อมูลเสมอ)
+ช่องเก็บเลขของคู่ (part, revision) ที่ intern ไว้ในตารางเล็ก ข้อความที่ซ้ำกันจึงเก็บครั้งเดียว
+ตารางเต็ม 37^3 ช่องใช้หน่วยความจำประมาณ 200 KB
+
+ใช้เร่งการค้นหาที่พบข้อมูลเท่านั้น DataManager.data ยังเป็นข้อมูลหลัก
+Lot ที่ไม่พบในตารางจะถูกค้นหาด้วยวิธีเดิม (เช่น key ที่มีตัวอักษรนอก A-Z0-9)
+"""
+
+from array import array
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+BASE = len(ALPHABET) + 1
+SLOTS = BASE ** 3
+_INVALID = len(ALPHABET)
+_CODES = {char: code for code, char in enumerate(ALPHABET)}
+# สำหรับ bytes.translate: ตัวอักษรใน ALPHABET -> 0..35 อื่นๆ -> 36
+_TRANSLATE = bytes(_CODES.get(chr(byte), _INVALID) for byte in range(256))
+
+
+class SlotTable:
+    """
+    Args:
+        positions (tuple): ตำแหน่งของตัวอักษรสามตัวใน Lot (ค่าเริ่มต้นตามกฎเดิม: 1, 2, 5)
+        min_length (int): ความยาวขั้นต่ำของ Lot ที่กฎใช้ได้
+    """
+
+    def __init__(self, positions=(1, 2, 5), min_length=6):
+        self.positions = positions
+        self.min_length = min_length
+        self.slots = array("I", bytes(4 * SLOTS))   # 0 = ไม่มีข้อมูล
+        self.values = [None]                        # เลข -> (part, revision)
+        self._value_ids = {}                        # (part, revision) -> เลข
+        self._strings = {}                          # intern ข้อความ part/revision
+        self.size = 0
+
+    @classmethod
+    def from_data(cls, data, positions=(1, 2, 5), min_length=6):
+        table = cls(positions, min_length)
+        for key, value in data.items():
+            table.set(key, value["part"], value["revision"])
+        return table
+
+    @staticmethod
+    def slot_of_key(key):
+        """เลขช่องของ key "XX_Y" หรือ None ถ้า key อยู่นอกรูปแบบนี้"""
+        if len(key) != 4 or key[2] != "_":
+            return None
+        codes = [_CODES.get(char) for char in (key[0], key[1], key[3])]
+        if None in codes:
+            return None
+        return (codes[0] * BASE + codes[1]) * BASE + codes[2]
+
+    def _value_id(self, part, revision):
+        strings = self._strings
+        value = (strings.setdefault(part, part), strings.setdefault(revision, revision))
+        value_id = self._value_ids.get(value)
+        if value_id is None:
+            value_id = self._value_ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def set(self, key, part, revision):
+        """คืนค่า False ถ้า key ไม่อยู่ในรูปแบบที่ตารางเก็บได้"""
+        slot = self.slot_of_key(key)
+        if slot is None:
+            return False
+        if not self.slots[slot]:
+            self.size += 1
+        self.slots[slot] = self._value_id(part, revision)
+        return True
+
+    def delete(self, key):
+        slot = self.slot_of_key(key)
+        if slot is not None and self.slots[slot]:
+            self.slots[slot] = 0
+            self.size -= 1
+
+    def get(self, lot):
+        """(part, revision) ของ Lot หรือ None"""
+        if len(lot) < self.min_length:
+            return None
+        a, b, c = self.positions
+        code = _CODES.get
+        return self.values[self.slots[(code(lot[a], _INVALID) * BASE + code(lot[b], _INVALID)) * BASE
+                                      + code(lot[c], _INVALID)]]
+
+    def get_many(self, lots):
+        """
+        ค้นหาหลาย Lot พร้อมกัน: ตัวอักษรสามตำแหน่งของทุก Lot ถูกต่อเป็น bytes เดียว
+        แล้วแปลงเป็นรหัสด้วย translate ครั้งเดียว คืนค่ารายการ (part, revision) หรือ None
+        """
+        a, b, c = self.positions
+        min_length = self.min_length
+        chars = "".join([lot[a] + lot[b] + lot[c] if len(lot) >= min_length else "\0\0\0"
+                         for lot in lots])
+        codes = chars.encode("latin-1", "replace").translate(_TRANSLATE)
+        slots = self.slots
+        values = self.values
+        return [values[slots[(x * BASE + y) * BASE + z]]
+                for x, y, z in zip(codes[0::3], codes[1::3], codes[2::3])]
+
+    def memory_bytes(self):
+        """ขนาดโดยประมาณของ array และตารางคู่ค่า (ไม่รวมตัวข้อความ)"""
+        return self.slots.itemsize * len(self.slots) + 8 * len(self.values)
+
+    def __len__(self):
+        return self.size
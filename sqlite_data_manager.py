@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+DataManager ที่เก็บข้อมูลใน SQLite (part_data.db)
+ค้นหาผ่าน primary key จึงไม่ต้องโหลดทั้งตารางตอนเริ่มโปรแกรม
+และหลายสถานีบนเครื่องเดียวกันใช้ไฟล์เดียวกันได้ (WAL mode)
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from data_manager import DataManager, lot_key
+from lot_misses import MissTracker, NegativeCache, misses_file_for
+from part_storage import AppendLogStorage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS part_data (
+    key TEXT PRIMARY KEY,
+    part TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_part_data_part ON part_data(part);
+"""
+
+
+class SqliteTableView(Mapping):
+    """มุมมองแบบ dict ของตาราง part_data สำหรับโค้ดที่ใช้ data_manager.data"""
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def __getitem__(self, key):
+        row = self._manager._query_one(
+            "SELECT part, revision, description FROM part_data WHERE key = ?", (key,))
+        if row is None:
+            raise KeyError(key)
+        return {"part": row[0], "revision": row[1], "description": row[2]}
+
+    def __contains__(self, key):
+        return self._manager._query_one(
+            "SELECT 1 FROM part_data WHERE key = ?", (key,)) is not None
+
+    def __iter__(self):
+        for row in self._manager._query_all("SELECT key FROM part_data ORDER BY key"):
+            yield row[0]
+
+    def __len__(self):
+        return self._manager._query_one("SELECT COUNT(*) FROM part_data")[0]
+
+    def items(self):
+        rows = self._manager._query_all(
+            "SELECT key, part, revision, description FROM part_data ORDER BY key")
+        return [(key, {"part": part, "revision": revision, "description": description})
+                for key, part, revision, description in rows]
+
+
+class SqliteDataManager:
+    """DataManager ที่ใช้ SQLite มี API เดียวกับ DataManager"""
+
+    @staticmethod
+    def get_data_file_path():
+        # ใช้ path เดิมของ .exe เหมือน part_data.json
+        if getattr(sys, 'frozen', False):
+            base_path = os.path.dirname(sys.executable)
+        else:
+            base_path = os.path.dirname(__file__)
+        return os.path.join(base_path, 'part_data.db')
+
+    def __init__(self, data_file=None):
+        self.data_file = data_file or self.get_data_file_path()
+        self.cache_hits = 0
+        self.cache_reloads = 0
+        self._lock = threading.RLock()
+        self._in_batch = False
+        # isolation_level=None เพื่อควบคุม transaction เอง
+        self.conn = sqlite3.connect(self.data_file, timeout=5.0,
+                                    isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.data = SqliteTableView(self)
+        # key ที่ค้นหาไม่พบ ล้างเมื่อโปรแกรมอื่นแก้ฐานข้อมูล (PRAGMA data_version เปลี่ยน)
+        self.negative_cache = NegativeCache()
+        self.misses = MissTracker(misses_file_for(self.data_file))
+        self._data_version = self._query_one("PRAGMA data_version")[0]
+
+    def _query_one(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def _query_all(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql, params=()):
+        """รันคำสั่งแก้ไข ถ้าไม่ได้อยู่ใน batch() จะ commit ทันที"""
+        with self._lock:
+            if self._in_batch:
+                return self.conn.execute(sql, params).rowcount
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                return self.conn.execute(sql, params).rowcount
+
+    @contextmanager
+    def batch(self):
+        """รวมการแก้ไขหลายรายการไว้ใน transaction เดียว"""
+        with self._lock:
+            if self._in_batch:
+                yield self
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._in_batch = True
+            try:
+                yield self
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+            finally:
+                self._in_batch = False
+
+    def load_data(self):
+        # ข้อมูลอ่านจากฐานข้อมูลทุกครั้งที่ค้นหา ไม่ต้องโหลดล่วงหน้า
+        self.cache_reloads += 1
+        return self.data
+
+    def save_data(self):
+        # ทุกการแก้ไข commit ทันทีอยู่แล้ว
+        pass
+
+    def reload_if_changed(self):
+        # ข้อมูลอ่านจากฐานข้อมูลเสมอ ต้องล้างเฉพาะ key ที่จำไว้ว่าไม่พบ
+        version = self._query_one("PRAGMA data_version")[0]
+        if version != self._data_version:
+            self._data_version = version
+            self.negative_cache.clear()
+            return True
+        self.cache_hits += 1
+        return False
+
+    def get_cache_stats(self):
+        return {
+            "hits": self.cache_hits,
+            "reloads": self.cache_reloads,
+            "keys": len(self.data),
+            "negative_hits": self.negative_cache.hits,
+            "negative_keys": len(self.negative_cache)
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+        self.misses.close()
+
+    def add_data(self, digits_2_3, digit_6, part, revision, description=""):
+        key = f"{digits_2_3}_{digit_6}"
+        self.negative_cache.discard(key)
+        self.misses.forget(key)
+        description = description or f"Digits 2-3: {digits_2_3}, Digit 6: {digit_6}"
+        self._execute(
+            "INSERT OR REPLACE INTO part_data (key, part, revision, description) VALUES (?, ?, ?, ?)",
+            (key, part, revision, description))
+        return True
+
+    def update_data(self, key, part, revision, description=""):
+        if description:
+            count = self._execute(
+                "UPDATE part_data SET part = ?, revision = ?, description = ? WHERE key = ?",
+                (part, revision, description, key))
+        else:
+            count = self._execute(
+                "UPDATE part_data SET part = ?, revision = ? WHERE key = ?",
+                (part, revision, key))
+        return count > 0
+
+    def delete_data(self, key):
+        return self._execute("DELETE FROM part_data WHERE key = ?", (key,)) > 0
+
+    def get_part_rev(self, lot_number):
+        try:
+            key = lot_key(lot_number)
+            if key is not None and key not in self.negative_cache:
+                row = self._query_one(
+                    "SELECT part, revision FROM part_data WHERE key = ?", (key,))
+                if row is not None:
+                    return row[0], row[1]
+                self.negative_cache.add(key)
+            self.misses.record(key, lot_number)
+            return None, None
+        except Exception:
+            return None, None
+
+    def get_part_rev_many(self, lots):
+        """ค้นหาหลาย Lot คืนค่ารายการ (part, rev) หรือ (None, None) ตามลำดับ"""
+        return [self.get_part_rev(lot) for lot in lots]
+
+    def find_by_part(self, part):
+        """ค้นหา key ทั้งหมดที่ใช้ part นี้ (ใช้ index idx_part_data_part)"""
+        return [row[0] for row in self._query_all(
+            "SELECT key FROM part_data WHERE part = ? ORDER BY key", (part,))]
+
+    @staticmethod
+    def _search_clause(query):
+        """สร้างเงื่อนไข WHERE สำหรับ search(): ทุกคำต้องตรงกับ prefix ของ key/part/revision หรืออยู่ใน description"""
+        clauses = []
+        params = []
+        for word in (query or "").upper().split():
+            pattern = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("(key LIKE ? ESCAPE '\\' OR part LIKE ? ESCAPE '\\' "
+                           "OR revision LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            params.extend([pattern + "%", pattern + "%", pattern + "%", "%" + pattern + "%"])
+        return " AND ".join(clauses) or "1", params
+
+    def search(self, query):
+        """ค้นหา key ด้วย prefix ของ key/part/revision หรือข้อความใน description"""
+        where, params = self._search_clause(query)
+        return [row[0] for row in self._query_all(
+            f"SELECT key FROM part_data WHERE {where} ORDER BY key", params)]
+
+    def matches_search(self, key, query):
+        where, params = self._search_clause(query)
+        return self._query_one(
+            f"SELECT 1 FROM part_data WHERE key = ? AND {where}", [key] + params) is not None
+
+    def import_file(self, path, overwrite=False, dry_run=False):
+        """นำเข้าข้อมูลจำนวนมากจาก CSV/JSON/JSONL ใน transaction เดียว (ดู bulk_io.py)"""
+        from bulk_io import import_file
+        return import_file(self, path, overwrite, dry_run)
+
+    def export_file(self, path):
+        from bulk_io import export_file
+        return export_file(self, path)
+
+    def import_json(self, json_file):
+        """นำเข้าข้อมูลจาก part_data.json (รวม log ที่ยังไม่ได้ compact) ใน transaction เดียว"""
+        # อ่านไฟล์ผ่าน storage โดยตรง ไม่สร้าง DataManager (และไฟล์ *_misses.json) ชั่วคราว
+        source = AppendLogStorage(json_file).load()
+        rows = [(key, value["part"], value["revision"], value.get("description", ""))
+                for key, value in source.items()]
+        with self.batch():
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO part_data (key, part, revision, description) VALUES (?, ?, ?, ?)",
+                rows)
+        self.negative_cache.clear()
+        return len(rows)
+
+
+def migrate_json_to_sqlite(json_file=None, db_file=None):
+    """ย้ายข้อมูลจาก part_data.json ไปยัง part_data.db ครั้งเดียว"""
+    manager = SqliteDataManager(db_file)
+    try:
+        return manager.import_json(json_file or DataManager.get_data_file_path())
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    # python sqlite_data_manager.py [part_data.json] [part_data.db]
+    json_path = sys.argv[1] if len(sys.argv) > 1 else None
+    db_path = sys.argv[2] if len(sys.argv) > 2 else None
+    count = migrate_json_to_sqlite(json_path, db_path)
+    print(f"Imported {count} rows into {db_path or SqliteDataManager.get_data_file_path()}")
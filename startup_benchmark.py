@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+วัดเวลาเปิดโปรแกรมจนพร้อมสแกน (time-to-first-scan-ready)
+รันโปรแกรมหลายรอบโดยตั้ง MACARTON_STARTUP_REPORT ให้ main.py บันทึกเวลาแล้วปิดตัวเอง
+- total_ms: เวลาตั้งแต่สั่งรันจนโปรแกรมปิด (รวมเวลาแตกไฟล์ของ .exe แบบ onefile)
+- window_ms: เวลาใน Python ตั้งแต่เริ่ม main.py จนหน้าต่างแสดง
+- ready_ms: เวลาใน Python จนโหลดข้อมูลเสร็จและพร้อมสแกน
+
+ใช้งาน:
+    python startup_benchmark.py                         วัด python main.py
+    python startup_benchmark.py dist\\DewerCarton\\DewerCarton.exe --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def measure(command, runs=5, timeout=60):
+    """
+    รันคำสั่ง runs รอบ คืนค่าสรุป (min/median/max) ของแต่ละค่าเป็นมิลลิวินาที
+
+    Args:
+        command (list): คำสั่งที่ใช้เปิดโปรแกรม
+        runs (int): จำนวนรอบ
+        timeout (float): เวลาสูงสุดต่อรอบ (วินาที)
+
+    Returns:
+        dict: {"total_ms": {...}, "window_ms": {...}, "ready_ms": {...}}
+    """
+    samples = {"total_ms": [], "window_ms": [], "ready_ms": []}
+    fd, report_file = tempfile.mkstemp(prefix="macarton_startup_", suffix=".json")
+    os.close(fd)
+    env = dict(os.environ, MACARTON_STARTUP_REPORT=report_file)
+    try:
+        for _ in range(runs):
+            if os.path.exists(report_file):
+                os.remove(report_file)
+            start = time.perf_counter()
+            subprocess.run(command, env=env, timeout=timeout, check=True)
+            samples["total_ms"].append((time.perf_counter() - start) * 1000)
+            with open(report_file, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            samples["window_ms"].append(report["window_ms"])
+            samples["ready_ms"].append(report["ready_ms"])
+    finally:
+        if os.path.exists(report_file):
+            os.remove(report_file)
+    return {
+        name: {"min": min(values), "median": statistics.median(values), "max": max(values)}
+        for name, values in samples.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time-to-first-scan-ready")
+    parser.add_argument("program", nargs="?", help="executable to start (default: python main.py)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    if args.program:
+        command = [args.program]
+    else:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+    result = measure(command, args.runs)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    for name, value in result.items():
+        print(f"{name:10} min {value['min']:8.1f}  median {value['median']:8.1f}  max {value['max']:8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
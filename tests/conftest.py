@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""ให้ test import โมดูลของโปรแกรมจากโฟลเดอร์หลักได้โดยตรง (โปรแกรมไม่ได้เป็น package)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from bulk_io import export_file, import_file, main
+from data_manager import DataManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    data_file = tmp_path / "part_data.json"
+    data_file.write_text(json.dumps({"ST_B": {"part": "D3022A", "revision": "REV.B",
+                                              "description": ""}}), encoding="utf-8")
+    manager = DataManager(str(data_file))
+    yield manager
+    manager.close()
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_csv_import_reports_bad_rows_by_line(manager, tmp_path):
+    path = write(tmp_path, "matrix.csv",
+                 "key,part,revision\n"
+                 "AB_C,D1000A,REV.A\n"
+                 "S_B,D2000A,REV.A\n"          # key ไม่ตรงกฎ
+                 "XY_Z,,REV.A\n"               # ไม่มี part
+                 "ST_B,D9999A,REV.Z\n")        # มีอยู่แล้วด้วยค่าอื่น
+    report = import_file(manager, path)
+    assert report.added == 1
+    assert [line for line, message in report.errors] == [3, 4]
+    assert [(line, key) for line, key, message in report.conflicts] == [(5, "ST_B")]
+    assert manager.data["AB_C"]["part"] == "D1000A"
+    assert manager.data["ST_B"]["part"] == "D3022A"
+
+
+def test_csv_import_overwrite_and_reload(manager, tmp_path):
+    path = write(tmp_path, "matrix.csv", "digits_2_3,digit_6,part,revision\nST,B,D9999A,REV.Z\n")
+    report = import_file(manager, path, overwrite=True)
+    assert report.updated == 1 and report.ok
+    manager.close()
+    assert DataManager(manager.data_file).data["ST_B"]["part"] == "D9999A"
+
+
+def test_jsonl_import_reports_malformed_lines(manager, tmp_path):
+    path = write(tmp_path, "rows.jsonl", "\n".join([
+        '{"key": "AB_C", "part": 3022, "revision": "REV.A"}',
+        '{not json',
+        '[1, 2]',
+        '{"key": "XY_Z", "part": ["D1"], "revision": "REV.A"}',
+        '',
+        '{"key": "QQ_Q", "part": "D4000A", "revision": "REV.C"}',
+    ]) + "\n")
+    report = import_file(manager, path)
+    assert report.added == 2
+    errors = dict(report.errors)
+    assert sorted(errors) == [2, 3, 4]
+    assert errors[2].startswith("Invalid JSON")
+    assert errors[3] == "Expected an object, got list"
+    assert errors[4] == "part must be a string, got list"
+    # ตัวเลขใน JSON ถูกแปลงเป็นข้อความ
+    assert manager.data["AB_C"]["part"] == "3022"
+    assert manager.data["QQ_Q"]["part"] == "D4000A"
+
+
+def test_json_import_table_and_list(manager, tmp_path):
+    table = write(tmp_path, "table.json", json.dumps({
+        "AB_C": {"part": 3022, "revision": "REV.A"},
+        "XY_Z": {"part": "D1", "revision": {"bad": 1}},
+    }))
+    report = import_file(manager, table)
+    assert report.added == 1
+    assert report.errors == [(2, "revision must be a string, got dict")]
+    assert manager.data["AB_C"]["part"] == "3022"
+
+    rows = write(tmp_path, "rows.json", json.dumps([{"key": "QQ_Q", "part": "P", "revision": "R"}, 5]))
+    report = import_file(manager, rows, dry_run=True)
+    assert report.added == 1
+    assert report.errors == [(2, "Expected an object, got int")]
+    assert "QQ_Q" not in manager.data
+
+
+def test_json_import_scalar_top_level(manager, tmp_path):
+    report = import_file(manager, write(tmp_path, "scalar.json", "42"))
+    assert report.errors == [(1, "Expected an object or a list of rows, got int")]
+    assert report.added == 0
+
+
+@pytest.mark.parametrize("name", ["export.csv", "export.json", "export.jsonl"])
+def test_export_round_trip(manager, tmp_path, name):
+    manager.add_data("AB", "C", "D1000A", "REV.A", "first")
+    path = str(tmp_path / name)
+    assert export_file(manager, path) == 2
+
+    target_file = tmp_path / "target.json"
+    target_file.write_text("{}", encoding="utf-8")
+    target = DataManager(str(target_file))
+    try:
+        report = import_file(target, path)
+        assert report.added == 2 and report.ok
+        assert target.data["AB_C"] == manager.data["AB_C"]
+    finally:
+        target.close()
+
+
+def test_main_imports_into_data_file(tmp_path, capsys):
+    data_file = tmp_path / "part_data.json"
+    data_file.write_text("{}", encoding="utf-8")
+    path = write(tmp_path, "matrix.csv", "key,part,revision\nAB_C,D1000A,REV.A\n")
+    assert main(["--data-file", str(data_file), "import", path]) == 0
+    assert "Added: 1" in capsys.readouterr().out
+    # ปิด DataManager ของไฟล์ที่ระบุแล้ว log ถูกรวมเข้าไฟล์หลัก
+    assert json.loads(data_file.read_text(encoding="utf-8"))["AB_C"]["part"] == "D1000A"
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from data_manager import DataManager
+from lookup_client import LookupClient, RemoteDataManager
+from lookup_server import make_server
+
+PART_DATA = {
+    "ST_B": {"part": "D3022A", "revision": "REV.B", "description": ""},
+    "AB_C": {"part": "D1000A", "revision": "REV.A", "description": ""},
+}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def server(tmp_path):
+    data_file = tmp_path / "part_data.json"
+    data_file.write_text(json.dumps(PART_DATA), encoding="utf-8")
+    manager = DataManager(str(data_file))
+    server = make_server(manager, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.data_file = data_file
+    yield server
+    server.shutdown()
+    server.server_close()
+    manager.close()
+
+
+def test_full_fetch_without_epoch(server):
+    response = LookupClient(server.url).changes(None, 0)
+    assert response["full"] is True
+    assert response["version"] == 0
+    assert response["data"] == PART_DATA
+
+
+def test_delta_after_mutate(server):
+    client = LookupClient(server.url)
+    snapshot = client.snapshot()
+    result = client.mutate([{"op": "set", "key": "XY_Z", "value": {"part": "P1", "revision": "R1"}},
+                            {"op": "del", "key": "AB_C"}])
+    assert result["epoch"] == snapshot["epoch"]
+    assert result["version"] == snapshot["version"] + 2
+
+    response = client.changes(snapshot["epoch"], snapshot["version"])
+    assert "full" not in response
+    assert [(record["op"], record["key"]) for record in response["changes"]] == [
+        ("set", "XY_Z"), ("del", "AB_C")]
+    assert response["changes"][0]["value"]["part"] == "P1"
+
+    # ถึง version ล่าสุดแล้ว ไม่มีรายการใหม่
+    latest = client.changes(result["epoch"], result["version"])
+    assert latest["changes"] == []
+
+
+def test_external_edit_starts_new_epoch(server):
+    client = LookupClient(server.url)
+    snapshot = client.snapshot()
+    edited = dict(PART_DATA, QQ_Q={"part": "EXT", "revision": "REV.X", "description": "edited"})
+    server.data_file.write_text(json.dumps(edited), encoding="utf-8")
+
+    response = client.changes(snapshot["epoch"], snapshot["version"])
+    assert response["full"] is True
+    assert response["epoch"] != snapshot["epoch"]
+    assert response["data"]["QQ_Q"]["part"] == "EXT"
+
+
+def test_invalid_mutate_batch_is_rejected_without_changes(server):
+    client = LookupClient(server.url)
+    snapshot = client.snapshot()
+    with pytest.raises(urllib.error.HTTPError) as error:
+        client.mutate([{"op": "set", "key": "XY_Z", "value": {"part": "P1", "revision": "R1"}},
+                       {"op": "set", "key": "AB_C"}])
+    assert error.value.code == 400
+
+    after = client.snapshot()
+    assert after["version"] == snapshot["version"]
+    assert after["data"] == PART_DATA
+    assert client.changes(snapshot["epoch"], snapshot["version"])["changes"] == []
+
+
+@pytest.mark.parametrize("key", ["STB", "S_B", "ST_", "ST_B_1"])
+def test_mutate_rejects_keys_outside_lot_rules(server, key):
+    client = LookupClient(server.url)
+    snapshot = client.snapshot()
+    with pytest.raises(urllib.error.HTTPError) as error:
+        client.mutate([{"op": "set", "key": key, "value": {"part": "P1", "revision": "R1"}}])
+    assert error.value.code == 400
+    assert client.snapshot()["version"] == snapshot["version"]
+    assert json.loads(server.data_file.read_text(encoding="utf-8")) == PART_DATA
+
+
+def test_bad_since_is_a_bad_request(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        LookupClient(server.url)._request("/changes?epoch=x&since=abc")
+    assert error.value.code == 400
+
+
+def test_remote_manager_syncs_and_rolls_back(server, tmp_path):
+    remote = RemoteDataManager(server.url, str(tmp_path / "remote.json"), sync_seconds=0.05)
+    try:
+        assert wait_for(lambda: remote.reload_if_changed() or remote.version == 0 and remote.epoch)
+        assert remote.data == PART_DATA
+        assert remote.get_part_rev("QSTZ8B2206") == ("D3022A", "REV.B")
+
+        # การแก้ไขผ่านสถานีกลับมาเป็น delta
+        assert remote.add_data("XY", "Z", "P1", "R1")
+        assert wait_for(lambda: remote.reload_if_changed() and remote.version == 1)
+        assert remote.data["XY_Z"]["part"] == "P1"
+
+        # เซิร์ฟเวอร์ติดต่อไม่ได้: แก้ไขไม่สำเร็จและย้อนข้อมูลในเครื่อง
+        server.shutdown()
+        server.server_close()
+        assert remote.update_data("ST_B", "CHANGED", "REV.Z") is False
+        assert remote.add_data("NE", "W", "P2", "R2") is False
+        assert remote.data["ST_B"]["part"] == "D3022A"
+        assert "NE_W" not in remote.data
+        assert remote.get_part_rev("QSTZ8B2206") == ("D3022A", "REV.B")
+    finally:
+        remote.close()
+
+    # close() เขียนสำเนาล่าสุด สถานีเปิดใหม่ได้แม้เซิร์ฟเวอร์ปิดอยู่
+    with open(tmp_path / "remote.json", "r", encoding="utf-8") as f:
+        cache = json.load(f)
+    assert cache["version"] == 1
+    assert cache["data"]["XY_Z"]["part"] == "P1"
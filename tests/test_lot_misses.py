@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import os
+import time
+
+from data_manager import DataManager
+from lot_misses import NO_RULE_KEY, MissTracker, NegativeCache, misses_file_for
+
+
+def test_negative_cache_evicts_least_recently_used():
+    cache = NegativeCache(maxsize=2)
+    cache.add("AB_C")
+    cache.add("XY_Z")
+    assert "AB_C" in cache          # AB_C ถูกใช้ล่าสุด
+    cache.add("QQ_Q")
+    assert "XY_Z" not in cache
+    assert "AB_C" in cache and "QQ_Q" in cache
+    assert cache.evictions == 1
+    cache.discard("AB_C")
+    assert len(cache) == 1
+
+
+def test_tracker_counts_and_persists_on_close(tmp_path):
+    path = str(tmp_path / "part_data_misses.json")
+    tracker = MissTracker(path)
+    tracker.record("XY_Z", "QXYZ8Z0001")
+    tracker.record("XY_Z", "QXYZ8Z0002")
+    tracker.record(None, "BAD")
+    tracker.record("QQ_Q", "QQQZ8Q0001")
+    tracker.forget("QQ_Q")
+    assert not os.path.exists(path)     # ยังไม่ถึงเวลาบันทึก
+    tracker.close()
+
+    stats = MissTracker(path).stats
+    assert sorted(stats) == [NO_RULE_KEY, "XY_Z"]
+    assert stats["XY_Z"]["count"] == 2
+    assert stats["XY_Z"]["last_lot"] == "QXYZ8Z0002"
+    assert [key for key, entry in MissTracker(path).top(1)] == ["XY_Z"]
+    assert os.listdir(tmp_path) == ["part_data_misses.json"]
+
+
+def test_tracker_saves_in_background(tmp_path):
+    path = str(tmp_path / "part_data_misses.json")
+    tracker = MissTracker(path, save_delay=0.05)
+    tracker.record("XY_Z", "QXYZ8Z0001")
+    deadline = time.monotonic() + 5.0
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["XY_Z"]["count"] == 1
+    tracker.close()
+
+
+def test_tracker_export_csv(tmp_path):
+    tracker = MissTracker(None)
+    tracker.record("XY_Z", "QXYZ8Z0001")
+    path = str(tmp_path / "misses.csv")
+    assert tracker.export(path) == 1
+    with open(path, newline="", encoding="utf-8") as f:
+        row, = csv.DictReader(f)
+    assert (row["key"], row["count"], row["last_lot"]) == ("XY_Z", "1", "QXYZ8Z0001")
+
+
+def test_data_manager_misses_and_negative_cache(tmp_path):
+    data_file = tmp_path / "part_data.json"
+    data_file.write_text(json.dumps({"ST_B": {"part": "D3022A", "revision": "REV.B"}}), encoding="utf-8")
+    manager = DataManager(str(data_file))
+    try:
+        assert manager.get_part_rev("QXYZ8Z0001") == (None, None)
+        assert manager.get_part_rev("QXYZ8Z0002") == (None, None)
+        assert "XY_Z" in manager.negative_cache
+        assert manager.misses.stats["XY_Z"]["count"] == 2
+
+        # เพิ่มข้อมูลแล้ว key ต้องค้นหาเจอทันทีและหายจากสถิติ
+        manager.add_data("XY", "Z", "D2000A", "REV.A")
+        assert manager.get_part_rev("QXYZ8Z0003") == ("D2000A", "REV.A")
+        assert "XY_Z" not in manager.misses.stats
+    finally:
+        manager.close()
+    assert os.path.exists(misses_file_for(str(data_file)))
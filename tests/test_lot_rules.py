@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+import lot_rules
+from data_manager import DataManager
+from lot_rules import DEFAULT_RULES, LotRule, LotRuleEngine, load_rules
+
+
+def rule(name, pattern, key, priority=0, regex=None):
+    entry = {"name": name, "pattern": pattern, "key": key, "priority": priority}
+    if regex:
+        entry["regex"] = regex
+    return entry
+
+
+# (กรณี, กฎตามลำดับในไฟล์, Lot, ชื่อกฎที่ต้องถูกเลือก)
+ORDERING = [
+    ("priority beats literals",
+     [rule("literal", "QS????*", "{0:2}"), rule("priority", "??????*", "{1:3}", priority=5)],
+     "QSTZ8B", "priority"),
+    ("more literals beat classes",
+     [rule("classes", "Q#####*", "{1:3}"), rule("literals", "Q1????*", "{1:3}")],
+     "Q12345", "literals"),
+    ("digit/alpha classes beat '?'",
+     [rule("any", "Q?????*", "{1:3}"), rule("digits", "Q#####*", "{1:3}")],
+     "Q12345", "digits"),
+    ("exact length beats '*'",
+     [rule("star", "Q#####*", "{1:3}"), rule("exact", "Q#####", "{1:3}")],
+     "Q12345", "exact"),
+    ("file order breaks ties",
+     [rule("first", "Q?????*", "{1:3}"), rule("second", "Q?????*", "{2:4}")],
+     "Q12345", "first"),
+    ("alpha class does not match digits",
+     [rule("alpha", "Q@@@@@*", "{1:3}"), rule("fallback", "??????*", "{1:3}")],
+     "Q12345", "fallback"),
+    ("exact pattern does not match longer lots",
+     [rule("exact", "Q#####", "{1:3}"), rule("fallback", "??????*", "{1:3}")],
+     "Q123456", "fallback"),
+]
+
+
+@pytest.mark.parametrize("rules, lot, expected",
+                         [case[1:] for case in ORDERING], ids=[case[0] for case in ORDERING])
+def test_rule_order(rules, lot, expected):
+    selected, key = LotRuleEngine(rules).explain(lot)
+    assert selected.name == expected
+    assert key is not None
+
+
+@pytest.mark.parametrize("lot, key", [
+    ("QSTZ8B2206", "ST_B"),
+    ("ABCDEF", "BC_F"),
+    ("ABCDE", None),       # สั้นกว่า pattern
+    ("", None),
+])
+def test_default_rule(lot, key):
+    assert LotRuleEngine(DEFAULT_RULES).resolve(lot) == key
+
+
+def test_regex_named_groups():
+    engine = LotRuleEngine([
+        rule("carton", "??????*", "{1:3}_{5}"),
+        rule("export", "E*", "{line}_E", priority=5, regex=r"^E(?P<line>[A-Z]{2})"),
+    ])
+    assert engine.explain("EAB1234")[0].name == "export"
+    assert engine.resolve("EAB1234") == "AB_E"
+    # regex ไม่ตรง: ใช้กฎถัดไป
+    assert engine.explain("E12345")[0].name == "carton"
+    assert engine.resolve("E12345") == "12_5"
+    assert engine.resolve("E1") is None
+
+
+def test_out_of_range_slice_falls_through():
+    engine = LotRuleEngine([
+        rule("long", "T*", "T_{1:8}", priority=10),
+        rule("short", "T*", "T_{1:3}"),
+    ])
+    assert engine.resolve("T123456789") == "T_1234567"
+    assert engine.explain("T1234")[0].name == "short"
+    assert engine.resolve("T1234") == "T_12"
+    assert engine.resolve("T1") is None
+
+
+@pytest.mark.parametrize("pattern, key, message", [
+    ("Q*??", "{1:3}", "only allowed at the end"),
+    ("Q?????*", "{line}_E", "unknown key field"),
+    ("??????*", "{3:1}_{5}", "empty key field"),
+    ("??????", "{1:3}_{6}", "past the end of pattern"),
+    ("", "{0}", "must not be empty"),
+])
+def test_invalid_rules(pattern, key, message):
+    with pytest.raises(ValueError, match=message):
+        LotRule("bad", pattern, key)
+
+
+@pytest.mark.parametrize("content, message", [
+    ("{not json", "Invalid .*lot_rules.json"),
+    ("[]", "non-empty list"),
+    ('{"name": "carton"}', "non-empty list"),
+    ('["??????*"]', "expected an object"),
+    ('[{"name": "carton", "pattern": "??????*"}]', "missing 'key'"),
+    ('[{"name": "carton", "pattern": 6, "key": "{1:3}_{5}"}]', "'pattern' must be a non-empty string"),
+    ('[{"name": "carton", "pattern": "??????*", "key": "{1:3}", "priority": "high"}]', "'priority'"),
+    ('[{"name": "export", "pattern": "E*", "key": "{line}", "regex": "^E(?P<line>"}]', "invalid regex"),
+])
+def test_load_rules_rejects_bad_file(tmp_path, content, message):
+    path = tmp_path / "lot_rules.json"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        load_rules(str(path))
+
+
+def test_load_rules_from_file(tmp_path):
+    path = tmp_path / "lot_rules.json"
+    path.write_text(json.dumps([rule("tray", "T#####*", "T_{1:3}")]), encoding="utf-8")
+    assert load_rules(str(path)).resolve("T12345") == "T_12"
+    assert load_rules(str(tmp_path / "missing.json")).resolve("QSTZ8B") == "ST_B"
+
+
+def test_bad_rules_file_is_not_reported_as_a_miss(tmp_path, monkeypatch):
+    data_file = tmp_path / "part_data.json"
+    data_file.write_text(json.dumps({"ST_B": {"part": "D3022A", "revision": "REV.B"}}), encoding="utf-8")
+    rules_file = tmp_path / "lot_rules.json"
+    rules_file.write_text('[{"name": "carton", "pattern": "??????*"}]', encoding="utf-8")
+    manager = DataManager(str(data_file))
+    try:
+        monkeypatch.setattr(lot_rules, "get_rules_file_path", lambda: str(rules_file))
+        monkeypatch.setattr(lot_rules, "_engine", None)
+        with pytest.raises(ValueError, match="missing 'key'"):
+            manager.get_part_rev("QSTZ8B2206")
+        assert manager.misses.stats == {}
+    finally:
+        manager.close()
+
+
+@pytest.mark.parametrize("rules, layout", [
+    (DEFAULT_RULES, ((1, 2, 5), 6)),
+    ([rule("short", "????*", "{0:2}_{3}")], ((0, 1, 3), 4)),
+    ([rule("wide", "??????????*", "{1:3}_{5}")], ((1, 2, 5), 10)),
+    ([rule("two", "??????*", "{1:3}_{5}"), rule("tray", "T#####*", "T_{1:3}")], None),
+    ([rule("regex", "E*", "{line}_E", regex=r"^E(?P<line>..)")], None),
+    ([rule("literal", "Q?????*", "{1:3}_{5}")], None),
+    ([rule("exact", "??????", "{1:3}_{5}")], None),
+    ([rule("dash", "??????*", "{1:3}-{5}")], None),
+    ([rule("tail", "??????*", "{1:3}_{5}X")], None),
+    ([rule("three", "??????*", "{1:4}_{5}")], None),
+])
+def test_slot_layout(rules, layout):
+    engine = LotRuleEngine(rules)
+    assert engine.slot_layout == layout
+    assert engine._slot_layout() == layout
+
+
+@pytest.mark.parametrize("key, accepted", [
+    ("ST_B", True),
+    ("T_12", True),
+    ("AB_E", True),
+    ("S_B", False),
+    ("T_123", False),
+])
+def test_accepts_key(key, accepted):
+    engine = LotRuleEngine([
+        rule("carton", "??????*", "{1:3}_{5}"),
+        rule("tray", "T#####*", "T_{1:3}", priority=10),
+        rule("export", "E*", "{line}_E", priority=5, regex=r"^E(?P<line>[A-Z]{2})"),
+    ])
+    assert engine.accepts_key(key) is accepted
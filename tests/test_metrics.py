@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import atexit
+import json
+
+import metrics
+
+
+def test_format_summary_empty_registry():
+    registry = metrics.MetricsRegistry()
+    assert metrics.format_summary(registry.snapshot()) == "No measurements yet"
+
+
+def test_format_summary_histogram_without_observations():
+    # scan_service สร้าง histogram ไว้ตอน import ก่อนมีการสแกนครั้งแรก
+    registry = metrics.MetricsRegistry()
+    registry.histogram("stage_seconds", stage="lookup")
+    summary = metrics.format_summary(registry.snapshot())
+    assert 'stage_seconds{stage="lookup"}' in summary
+    assert "n=0" in summary
+    assert "p50=        -" in summary
+
+
+def test_format_summary_with_observations():
+    registry = metrics.MetricsRegistry()
+    registry.observe("scan_seconds", 0.002)
+    registry.inc("scans_total", status="queued")
+    summary = metrics.format_summary(registry.snapshot())
+    assert "scan_seconds" in summary and "n=1" in summary
+    assert 'scans_total{status="queued"}' in summary
+
+
+def test_main_summarizes_dump_with_empty_histograms(tmp_path, capsys):
+    registry = metrics.MetricsRegistry()
+    registry.histogram("print_wait_seconds")
+    path = str(tmp_path / "metrics.json")
+    registry.dump(path)
+    assert metrics.main([path]) == 0
+    assert "print_wait_seconds" in capsys.readouterr().out
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f)["histograms"][0]["p50"] is None
+
+
+def test_reset_keeps_bound_histograms_recording():
+    registry = metrics.MetricsRegistry()
+    bound = registry.histogram("scan_seconds")
+    bound.observe(0.002)
+    registry.inc("scans_total", status="queued")
+    registry.reset()
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == []
+    assert [h["count"] for h in snapshot["histograms"]] == [0]
+    assert bound.max == 0.0 and not any(bound.counts)
+
+    bound.observe(0.004)
+    histogram, = registry.snapshot()["histograms"]
+    assert histogram["count"] == 1
+    assert histogram["sum"] == 0.004
+
+
+def test_bad_dump_interval_falls_back_to_default(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(metrics, "_exporters", None)
+    monkeypatch.delenv("MACARTON_METRICS_PORT", raising=False)
+    monkeypatch.setenv("MACARTON_METRICS_FILE", str(tmp_path / "metrics.json"))
+    monkeypatch.setenv("MACARTON_METRICS_INTERVAL", "1m")
+    dumper, = metrics.start_exporters()
+    try:
+        assert dumper.interval == 60.0
+        assert "Invalid MACARTON_METRICS_INTERVAL" in capsys.readouterr().out
+    finally:
+        atexit.unregister(dumper.stop)
+        dumper.stop()
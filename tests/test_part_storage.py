@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+from data_manager import DataManager
+from part_storage import AppendLogStorage
+
+SNAPSHOT = {
+    "ST_B": {"part": "D3022A", "revision": "REV.B", "description": ""},
+    "AB_C": {"part": "D1000A", "revision": "REV.A", "description": ""},
+}
+
+
+def set_record(key, part):
+    return {"op": "set", "key": key, "value": {"part": part, "revision": "REV.A", "description": ""}}
+
+
+def make_storage(tmp_path):
+    data_file = tmp_path / "part_data.json"
+    data_file.write_text(json.dumps(SNAPSHOT), encoding="utf-8")
+    return AppendLogStorage(str(data_file))
+
+
+def test_replay_applies_log_over_snapshot(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.append([set_record("ST_B", "D3022B"), {"op": "del", "key": "AB_C"}])
+    storage.append([set_record("XY_Z", "D2000A")])
+    assert storage.log_entries == 3
+
+    reopened = AppendLogStorage(storage.data_file)
+    data = reopened.load()
+    assert reopened.log_entries == 3
+    assert data == {"ST_B": set_record("ST_B", "D3022B")["value"],
+                    "XY_Z": set_record("XY_Z", "D2000A")["value"]}
+
+
+def test_replay_drops_torn_tail(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.append([set_record("XY_Z", "D2000A")])
+    good_size = os.path.getsize(storage.log_file)
+    with open(storage.log_file, "a", encoding="utf-8") as f:
+        f.write('{"op": "set", "key": "QQ_Q", "val')
+
+    data = storage.load()
+    assert "XY_Z" in data and "QQ_Q" not in data
+    assert storage.log_entries == 1
+    # ส่วนที่เขียนไม่ครบถูกตัดทิ้ง การต่อท้ายครั้งถัดไปจึงเริ่มบรรทัดใหม่ได้ถูกต้อง
+    assert os.path.getsize(storage.log_file) == good_size
+    storage.append([set_record("QQ_Q", "D4000A")])
+    assert AppendLogStorage(storage.data_file).load()["QQ_Q"]["part"] == "D4000A"
+
+
+def test_replay_stops_at_corrupt_line(tmp_path):
+    storage = make_storage(tmp_path)
+    with open(storage.log_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps(set_record("XY_Z", "D2000A")) + "\n")
+        f.write("not json\n")
+        f.write(json.dumps(set_record("QQ_Q", "D4000A")) + "\n")
+    data = storage.load()
+    assert "XY_Z" in data and "QQ_Q" not in data
+    assert storage.log_entries == 1
+
+
+def test_snapshot_clears_log(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.append([set_record("XY_Z", "D2000A")])
+    data = storage.load()
+    storage.write_snapshot(data)
+    assert not os.path.exists(storage.log_file)
+    assert not os.path.exists(storage.data_file + ".tmp")
+    assert storage.log_entries == 0
+    assert AppendLogStorage(storage.data_file).load() == data
+
+
+def test_needs_compaction(tmp_path):
+    storage = AppendLogStorage(str(tmp_path / "part_data.json"))
+    storage.log_entries = AppendLogStorage.COMPACT_MIN_ENTRIES - 1
+    assert not storage.needs_compaction(10)
+    storage.log_entries = AppendLogStorage.COMPACT_MIN_ENTRIES
+    assert storage.needs_compaction(10)
+    # ตารางใหญ่: รอจน log ยาวเท่าตาราง
+    assert not storage.needs_compaction(AppendLogStorage.COMPACT_MIN_ENTRIES + 1)
+
+
+def test_data_manager_compacts_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(AppendLogStorage, "COMPACT_MIN_ENTRIES", 3)
+    storage = make_storage(tmp_path)
+    manager = DataManager(storage.data_file)
+    try:
+        manager.add_data("XY", "Z", "D2000A", "REV.A")
+        manager.update_data("ST_B", "D3022B", "REV.C")
+        assert manager.storage.log_entries == 2
+        assert os.path.exists(storage.log_file)
+        # log ยาวเท่าตาราง (3 แถว) และถึงเกณฑ์ขั้นต่ำ: รวมเข้า snapshot
+        manager.update_data("AB_C", "D1000B", "REV.B")
+        assert manager.storage.log_entries == 0
+        assert not os.path.exists(storage.log_file)
+        with open(storage.data_file, encoding="utf-8") as f:
+            assert json.load(f) == manager.data
+    finally:
+        manager.close()
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from print_config import PrinterConfig, _barcode
+
+
+def test_barcode_follows_check_digit_setting(monkeypatch):
+    monkeypatch.setattr(PrinterConfig, "BARCODE_CHECK_DIGIT", False)
+    assert _barcode("QSTZ8B2206") == "*QSTZ8B2206*"
+    monkeypatch.setattr(PrinterConfig, "BARCODE_CHECK_DIGIT", True)
+    assert _barcode("QSTZ8B2206") == "*QSTZ8B2206I*"
+    monkeypatch.setattr(PrinterConfig, "BARCODE_CHECK_DIGIT", False)
+    assert _barcode("QSTZ8B2206") == "*QSTZ8B2206*"
+
+
+def test_barcode_keeps_unsupported_text():
+    assert _barcode("lot#1") == "*lot#1*"
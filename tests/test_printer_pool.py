@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import pytest
+
+from print_queue import PrintJob
+from printer_pool import PrinterPool
+from printing import PrintResult
+
+
+def stand_in_printers(jammed=(), print_seconds=0.002):
+    """ฟังก์ชันพิมพ์จำลอง: เครื่องใน jammed พิมพ์ไม่สำเร็จทุกครั้ง"""
+    printed = []
+
+    def print_func(text, printer=None, fields=None):
+        time.sleep(print_seconds)
+        if printer in jammed:
+            return PrintResult(False, None, "Error", f"{printer} is jammed")
+        printed.append((printer, text))
+        return PrintResult(True, "simulated", "Success", "")
+    return print_func, printed
+
+
+def drain(pool, count, timeout=10.0):
+    finished = []
+    deadline = time.monotonic() + timeout
+    while len(finished) < count and time.monotonic() < deadline:
+        finished.extend(pool.poll_results())
+        time.sleep(0.002)
+    assert len(finished) == count
+    return finished
+
+
+@pytest.fixture
+def pools():
+    created = []
+    yield created
+    for pool in created:
+        pool.stop()
+
+
+def test_jobs_spread_over_healthy_printers(pools):
+    print_func, printed = stand_in_printers()
+    pool = PrinterPool(["P1", "P2"], print_func)
+    pools.append(pool)
+    for n in range(20):
+        assert pool.submit(PrintJob(f"LOT{n:03d}", f"label {n}"))
+    finished = drain(pool, 20)
+    assert all(job.result.success for job in finished)
+    assert {printer for printer, text in printed} == {"P1", "P2"}
+    assert pool.completed == 20 and pool.failed == 0
+
+
+def test_failed_jobs_move_to_other_printer(pools):
+    print_func, printed = stand_in_printers(jammed={"P1"})
+    pool = PrinterPool(["P1", "P2"], print_func)
+    pools.append(pool)
+    for n in range(20):
+        pool.submit(PrintJob(f"LOT{n:03d}", f"label {n}"))
+    finished = drain(pool, 20)
+
+    assert all(job.result.success for job in finished)
+    assert all(job.printer == "P2" for job in finished)
+    assert sorted(text for printer, text in printed) == sorted(f"label {n}" for n in range(20))
+    p1, p2 = pool.stats()
+    assert p1["failed"] >= 1 and not p1["healthy"]
+    assert p1["failovers"] >= 1
+    assert p2["completed"] == 20
+    assert any(job.failed_printers == ["P1"] for job in finished)
+
+
+def test_manual_file_saved_once_when_every_printer_fails(pools, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    print_func, printed = stand_in_printers(jammed={"P1", "P2"})
+    pool = PrinterPool(["P1", "P2"], print_func)
+    # เหมือน pool ที่ใช้ print_label: ไฟล์พิมพ์เองถูกบันทึกใน _give_up เท่านั้น
+    pool._manual_fallback = True
+    pools.append(pool)
+    for n in range(3):
+        pool.submit(PrintJob(f"LOT{n:03d}", f"label {n}"))
+    finished = drain(pool, 3)
+
+    assert printed == []
+    assert all(job.result.title == "File Saved" for job in finished)
+    # เครื่องที่ถูกพักอยู่แล้วไม่ถูกลองซ้ำ งานจึงอาจล้มเหลวที่เครื่องเดียวก่อนบันทึกไฟล์
+    assert all(job.failed_printers and set(job.failed_printers) <= {"P1", "P2"} for job in finished)
+    saved = sorted(os.listdir(tmp_path))
+    assert len(saved) == 3
+    contents = sorted((tmp_path / name).read_text(encoding="utf-8") for name in saved)
+    assert contents == ["label 0", "label 1", "label 2"]
+
+
+def test_no_manual_file_with_custom_print_func(pools, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    print_func, printed = stand_in_printers(jammed={"P1"})
+    pool = PrinterPool(["P1"], print_func)
+    pools.append(pool)
+    pool.submit(PrintJob("LOT001", "label"))
+    job, = drain(pool, 1)
+    assert not job.result.success
+    assert job.result.message == "P1 is jammed"
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from print_config import PrinterConfig
+from print_raw import PrinterSessionPool
+from raw_printer import LpPrinter, SocketPrinter, open_printer, send_label
+
+
+class StandInPrinter(socketserver.ThreadingTCPServer):
+    """เครื่องพิมพ์จำลองแบบ port 9100: เก็บข้อมูลที่ได้รับของแต่ละ connection"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, close_after_first_read=False):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.close_after_first_read = close_after_first_read
+        self.connections = []
+        self.lock = threading.Lock()
+        self.closed = threading.Condition(self.lock)
+
+    @property
+    def uri(self):
+        return f"socket://127.0.0.1:{self.server_address[1]}"
+
+    def received(self, count=1, timeout=5.0):
+        """ข้อมูลของ connection ที่ปิดแล้ว (รอจนครบ count connection)"""
+        with self.closed:
+            self.closed.wait_for(lambda: len(self.connections) >= count, timeout)
+            return list(self.connections)
+
+
+class StandInHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        chunks = []
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+            if self.server.close_after_first_read:
+                break
+        with self.server.closed:
+            self.server.connections.append(b"".join(chunks))
+            self.server.closed.notify_all()
+
+
+@pytest.fixture
+def printer():
+    server = StandInPrinter()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def refused_port():
+    """port ที่ไม่มีใครรอรับ connection"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_socket_printer_sends_exact_bytes(printer):
+    payload = b"^XA^FO50,50^FDST_B^FS^XZ\r\n" + bytes(range(256))
+    target = open_printer(printer.uri)
+    assert isinstance(target, SocketPrinter)
+    target.send(payload)
+    assert printer.received() == [payload]
+
+
+def test_send_label_encodes_text(printer):
+    text = "Lot: QSTZ8B2206\nPart: D3022A\nRev: REV.B\n"
+    send_label(open_printer(printer.uri), text)
+    assert printer.received() == [text.encode(PrinterConfig.ENCODING)]
+
+
+@pytest.mark.parametrize("language, raw", [("zpl", True), ("epl", True), ("tspl", True), ("text", False)])
+def test_lp_printer_raw_follows_language(monkeypatch, language, raw):
+    monkeypatch.setattr(PrinterConfig, "LANGUAGE", language)
+    target = open_printer("lp://Zebra")
+    assert isinstance(target, LpPrinter)
+    assert target.printer == "Zebra"
+    assert target.raw is raw
+    if raw:
+        assert target.args == ["lp", "-d", "Zebra", "-o", "raw"]
+    else:
+        assert "raw" not in target.args
+
+
+def test_lp_printer_raw_flag_overrides_language(monkeypatch):
+    monkeypatch.setattr(PrinterConfig, "LANGUAGE", "text")
+    assert open_printer("lp://Zebra", raw=True).args == ["lp", "-d", "Zebra", "-o", "raw"]
+
+
+def test_socket_printer_connection_refused():
+    with pytest.raises(ConnectionRefusedError):
+        SocketPrinter("127.0.0.1", refused_port(), timeout=1.0).send(b"label")
+
+
+def test_session_pool_reuses_one_connection(printer):
+    pool = PrinterSessionPool()
+    pool.send(printer.uri, b"first\n")
+    pool.send(printer.uri, b"second\n")
+    pool.close_all()
+    assert printer.received() == [b"first\nsecond\n"]
+    assert pool.reconnects[printer.uri] == 0
+
+
+def test_session_pool_reconnects_after_printer_closes():
+    server = StandInPrinter(close_after_first_read=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    pool = PrinterSessionPool()
+    try:
+        pool.send(server.uri, b"first\n")
+        assert server.received(1) == [b"first\n"]
+        time.sleep(0.05)    # ให้ FIN ของเครื่องพิมพ์มาถึงก่อนงานถัดไป
+        pool.send(server.uri, b"second\n")
+        pool.close_all()
+        assert server.received(2) == [b"first\n", b"second\n"]
+        assert pool.reconnects[server.uri] == 1
+    finally:
+        pool.close_all()
+        server.shutdown()
+        server.server_close()
+
+
+def test_session_pool_connection_refused():
+    pool = PrinterSessionPool()
+    with pytest.raises(OSError):
+        pool.send(f"socket://127.0.0.1:{refused_port()}", b"label")
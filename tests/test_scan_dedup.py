@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import os
+from datetime import datetime
+
+from scan_dedup import RecentScans, ScanDeduplicator, ShiftBloomFilter, shift_start
+
+SHIFTS = ("06:00", "14:00", "22:00")
+
+
+def test_recent_scans_expire_after_window():
+    recent = RecentScans(window_seconds=5.0)
+    recent.add("QSTZ8B2206", now=100.0)
+    assert recent.seen("QSTZ8B2206", now=104.5) == 4.5
+    assert recent.seen("QSTZ8B2206", now=105.0) is None
+    assert len(recent) == 0
+
+
+def test_recent_scans_rescan_extends_window():
+    recent = RecentScans(window_seconds=5.0)
+    recent.add("A", now=0.0)
+    recent.add("A", now=3.0)
+    # รายการเก่าของ A หมดอายุแล้ว แต่การสแกนครั้งล่าสุดยังอยู่ใน window
+    assert recent.seen("A", now=6.0) == 3.0
+    assert recent.seen("A", now=8.0) is None
+
+
+def test_recent_scans_limit_drops_oldest():
+    recent = RecentScans(window_seconds=60.0, maxlen=3)
+    for index, lot in enumerate("ABCD"):
+        recent.add(lot, now=float(index))
+    assert recent.seen("A", now=4.0) is None
+    assert recent.seen("D", now=4.0) == 1.0
+    assert len(recent) < 3
+
+
+def test_recent_scans_forget():
+    recent = RecentScans(window_seconds=5.0)
+    recent.add("A", now=0.0)
+    recent.forget("A")
+    assert recent.seen("A", now=1.0) is None
+
+
+def test_shift_start_before_first_shift_is_previous_night():
+    assert shift_start(datetime(2026, 10, 18, 5, 59), SHIFTS) == datetime(2026, 10, 17, 22, 0)
+    assert shift_start(datetime(2026, 10, 18, 6, 0), SHIFTS) == datetime(2026, 10, 18, 6, 0)
+    assert shift_start(datetime(2026, 10, 18, 23, 30), SHIFTS) == datetime(2026, 10, 18, 22, 0)
+
+
+def test_bloom_filter_rolls_over_at_shift_change(tmp_path):
+    bloom = ShiftBloomFilter(str(tmp_path), capacity=100)
+    morning = datetime(2026, 10, 18, 13, 59)
+    afternoon = datetime(2026, 10, 18, 14, 0)
+    try:
+        assert bloom.add("QSTZ8B2206", morning) is False
+        assert bloom.contains("QSTZ8B2206", morning)
+        assert bloom.add("QSTZ8B2206", morning) is True
+        assert os.listdir(tmp_path) == ["scan_shift_20261018_0600.bloom"]
+
+        assert not bloom.contains("QSTZ8B2206", afternoon)
+        # ไฟล์ของกะก่อนถูกลบเมื่อเริ่มกะใหม่
+        assert os.listdir(tmp_path) == ["scan_shift_20261018_1400.bloom"]
+        bloom.add("QABC1D0001", afternoon)
+    finally:
+        bloom.close()
+
+
+def test_bloom_filter_survives_restart_within_shift(tmp_path):
+    night = datetime(2026, 10, 18, 23, 0)
+    bloom = ShiftBloomFilter(str(tmp_path), capacity=100)
+    bloom.add("QSTZ8B2206", night)
+    bloom.close()
+
+    bloom = ShiftBloomFilter(str(tmp_path), capacity=100)
+    try:
+        # ก่อน 06:00 ของวันถัดไปยังเป็นกะกลางคืนเดิม
+        assert bloom.contains("QSTZ8B2206", datetime(2026, 10, 19, 5, 59))
+        assert not bloom.contains("QABC1D0001", datetime(2026, 10, 19, 5, 59))
+        assert not bloom.contains("QSTZ8B2206", datetime(2026, 10, 19, 6, 0))
+    finally:
+        bloom.close()
+
+
+def test_deduplicator_records_only_after_submit_and_print(tmp_path):
+    dedup = ScanDeduplicator(window_seconds=60.0, shift_directory=str(tmp_path))
+    try:
+        assert dedup.check("QSTZ8B2206") == (None, None)
+        # ยังไม่ได้ record: สแกนซ้ำได้
+        assert dedup.check("QSTZ8B2206") == (None, None)
+        dedup.record("QSTZ8B2206")
+        assert dedup.check("QSTZ8B2206")[0] == "window"
+        assert dedup.suppressed == 1
+
+        dedup.forget("QSTZ8B2206")
+        assert dedup.check("QSTZ8B2206") == (None, None)
+        dedup.record_printed("QSTZ8B2206")
+        assert dedup.check("QSTZ8B2206")[0] == "shift"
+    finally:
+        dedup.close()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from scan_journal import TIME_FORMAT, ScanJournal, main
+
+
+def test_records_survive_reopen(tmp_path):
+    path = str(tmp_path / "scan_journal.db")
+    journal = ScanJournal(path)
+    journal.record("QSTZ8B2206", "printed", "D3022A", "REV.B", "2026-10-18 14:05:00",
+                   "Zebra", "raw", 12.5)
+    journal.record("QSTZ8B2206", "failed", "D3022A", "REV.B", "2026-10-18 14:06:00")
+    journal.record("QXXZ8Q0001", "no_data", scanned_at="2026-10-18 14:07:00")
+    journal.close()
+
+    journal = ScanJournal(path, retention_days=None)
+    try:
+        row = journal.last_printed("QSTZ8B2206")
+        assert row["scanned_at"] == "2026-10-18 14:05:00"
+        assert (row["key"], row["part"], row["printer"], row["latency_ms"]) == ("ST_B", "D3022A", "Zebra", 12.5)
+        assert journal.last_printed("QSTZ8B2206", since="2026-10-18 14:06") is None
+
+        printed = journal.between("2026-10-18 14:00:00", "2026-10-18 15:00:00")
+        assert [row["lot"] for row in printed] == ["QSTZ8B2206"]
+        every = journal.between("2026-10-18 14:00:00", "2026-10-18 15:00:00", status=None)
+        assert [row["status"] for row in every] == ["printed", "failed", "no_data"]
+        # ช่วงเวลาเป็นแบบ [start, end)
+        assert journal.between("2026-10-18 14:05:00", "2026-10-18 14:07:00", status=None)[-1]["status"] == "failed"
+    finally:
+        journal.close()
+
+
+def test_old_scans_are_pruned_on_open(tmp_path):
+    path = str(tmp_path / "scan_journal.db")
+    now = datetime.now()
+    journal = ScanJournal(path, retention_days=None)
+    journal.record("QOLDZ80001", "printed", "P", "R", (now - timedelta(days=31)).strftime(TIME_FORMAT))
+    journal.record("QNEWZ80001", "printed", "P", "R", (now - timedelta(days=1)).strftime(TIME_FORMAT))
+    journal.close()
+
+    journal = ScanJournal(path, retention_days=30)
+    try:
+        assert journal.last_printed("QOLDZ80001") is None
+        assert journal.last_printed("QNEWZ80001") is not None
+    finally:
+        journal.close()
+
+
+def test_check_and_reprint_commands(tmp_path, capsys):
+    path = str(tmp_path / "scan_journal.db")
+    journal = ScanJournal(path)
+    journal.record("QSTZ8B2206", "printed", "D3022A", "REV.B")
+    journal.close()
+
+    assert main(["--journal", path, "check", "qstz8b2206"]) == 0
+    assert "labeled at" in capsys.readouterr().out
+    assert main(["--journal", path, "check", "QABC1D0001"]) == 1
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    output = tmp_path / "reprint.txt"
+    assert main(["--journal", path, "reprint", today, today, "--output", str(output)]) == 0
+    assert "QSTZ8B2206" in output.read_text(encoding="utf-8")
+    assert "Labels: 1" in capsys.readouterr().err
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from slot_table import SLOTS, SlotTable
+
+DATA = {
+    "ST_B": {"part": "D3022A", "revision": "REV.B"},
+    "AB_C": {"part": "D1000A", "revision": "REV.A"},
+    "09_9": {"part": "D3022A", "revision": "REV.B"},
+}
+
+LOTS = [
+    "QSTZ8B2206",   # ST_B
+    "QABZ8C",       # AB_C ยาวพอดี
+    "Q09Z89",       # 09_9
+    "QABZ8",        # สั้นกว่ากฎ
+    "",
+    "QabZ8c2206",   # ตัวพิมพ์เล็กไม่อยู่ในตาราง
+    "QSTZ8é2206",   # latin-1 นอก A-Z0-9
+    "QSTZ8ข2206",   # ตัวอักษรนอก latin-1
+    "QXYZ8Z0001",   # ไม่มีข้อมูล
+]
+
+
+@pytest.fixture
+def table():
+    return SlotTable.from_data(DATA)
+
+
+def test_get_many_matches_get(table):
+    expected = [table.get(lot) for lot in LOTS]
+    assert expected == [("D3022A", "REV.B"), ("D1000A", "REV.A"), ("D3022A", "REV.B"),
+                        None, None, None, None, None, None]
+    assert table.get_many(LOTS) == expected
+    assert table.get_many([]) == []
+
+
+def test_get_many_with_other_positions():
+    table = SlotTable.from_data({"T1_2": {"part": "P", "revision": "R"}}, positions=(0, 1, 3), min_length=4)
+    assert table.get_many(["T102", "T10", "T1X2", "X102"]) == [("P", "R"), None, ("P", "R"), None]
+
+
+def test_keys_outside_the_table(table):
+    assert SlotTable.slot_of_key("ST_B") is not None
+    assert SlotTable.slot_of_key("T_12") is None
+    assert SlotTable.slot_of_key("st_b") is None
+    assert table.set("T_12", "P", "R") is False
+    assert len(table) == 3
+
+
+def test_values_are_interned_and_deleted(table):
+    # คู่ค่าเดียวกันใช้ช่องค่าเดียว (None คือช่องว่าง)
+    assert len(table.values) == 3
+    table.set("ST_B", "D1000A", "REV.A")
+    assert table.get("QSTZ8B2206") == ("D1000A", "REV.A")
+    assert len(table.values) == 3
+    table.delete("ST_B")
+    table.delete("ST_B")
+    assert table.get_many(["QSTZ8B2206"]) == [None]
+    assert len(table) == 2
+    assert table.memory_bytes() >= 4 * SLOTS
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+from sqlite_data_manager import SqliteDataManager, migrate_json_to_sqlite
+
+
+def test_migrate_replays_log_without_touching_json_folder(tmp_path):
+    source = tmp_path / "json"
+    source.mkdir()
+    json_file = source / "part_data.json"
+    json_file.write_text(json.dumps({
+        "ST_B": {"part": "D3022A", "revision": "REV.B", "description": ""},
+        "AB_C": {"part": "D1000A", "revision": "REV.A", "description": ""},
+    }), encoding="utf-8")
+    # log ที่ยังไม่ได้ compact: แก้ ST_B, ลบ AB_C, เพิ่ม XY_Z
+    (source / "part_data.json.log").write_text("".join(json.dumps(record) + "\n" for record in [
+        {"op": "set", "key": "ST_B", "value": {"part": "D3022B", "revision": "REV.C", "description": ""}},
+        {"op": "del", "key": "AB_C"},
+        {"op": "set", "key": "XY_Z", "value": {"part": "D2000A", "revision": "REV.A", "description": "x"}},
+    ]), encoding="utf-8")
+    db_file = tmp_path / "part_data.db"
+
+    assert migrate_json_to_sqlite(str(json_file), str(db_file)) == 2
+    assert sorted(os.listdir(source)) == ["part_data.json", "part_data.json.log"]
+
+    manager = SqliteDataManager(str(db_file))
+    try:
+        assert dict(manager.data.items()) == {
+            "ST_B": {"part": "D3022B", "revision": "REV.C", "description": ""},
+            "XY_Z": {"part": "D2000A", "revision": "REV.A", "description": "x"},
+        }
+        assert manager.get_part_rev("QSTZ8B2206") == ("D3022B", "REV.C")
+    finally:
+        manager.close()